@@ -1,27 +1,86 @@
 """Nextmv Python SDK."""
 
+import importlib
+from typing import TYPE_CHECKING, Any
+
 from .__about__ import __version__
-from .input import Input as Input
-from .input import InputFormat as InputFormat
-from .input import InputLoader as InputLoader
-from .input import LocalInputLoader as LocalInputLoader
-from .input import load_local as load_local
-from .logger import log as log
-from .logger import redirect_stdout as redirect_stdout
-from .logger import reset_stdout as reset_stdout
-from .options import Options as Options
-from .options import Parameter as Parameter
-from .output import DataPoint as DataPoint
-from .output import LocalOutputWriter as LocalOutputWriter
-from .output import Output as Output
-from .output import OutputFormat as OutputFormat
-from .output import OutputWriter as OutputWriter
-from .output import ResultStatistics as ResultStatistics
-from .output import RunStatistics as RunStatistics
-from .output import Series as Series
-from .output import SeriesData as SeriesData
-from .output import Statistics as Statistics
-from .output import write_local as write_local
+
+if TYPE_CHECKING:
+    from .input import Input as Input
+    from .input import InputFormat as InputFormat
+    from .input import InputLoader as InputLoader
+    from .input import LocalInputLoader as LocalInputLoader
+    from .input import load_local as load_local
+    from .logger import log as log
+    from .logger import redirect_stdout as redirect_stdout
+    from .logger import reset_stdout as reset_stdout
+    from .options import Options as Options
+    from .options import Parameter as Parameter
+    from .output import DataPoint as DataPoint
+    from .output import LocalOutputWriter as LocalOutputWriter
+    from .output import Output as Output
+    from .output import OutputFormat as OutputFormat
+    from .output import OutputWriter as OutputWriter
+    from .output import ResultStatistics as ResultStatistics
+    from .output import RunStatistics as RunStatistics
+    from .output import Series as Series
+    from .output import SeriesData as SeriesData
+    from .output import Statistics as Statistics
+    from .output import write_local as write_local
 
 VERSION = __version__
 """The version of the Nextmv Python SDK."""
+
+_LAZY_ATTRIBUTES = {
+    "Input": "input",
+    "InputFormat": "input",
+    "InputLoader": "input",
+    "LocalInputLoader": "input",
+    "load_local": "input",
+    "log": "logger",
+    "redirect_stdout": "logger",
+    "reset_stdout": "logger",
+    "Options": "options",
+    "Parameter": "options",
+    "DataPoint": "output",
+    "LocalOutputWriter": "output",
+    "Output": "output",
+    "OutputFormat": "output",
+    "OutputWriter": "output",
+    "ResultStatistics": "output",
+    "RunStatistics": "output",
+    "Series": "output",
+    "SeriesData": "output",
+    "Statistics": "output",
+    "write_local": "output",
+}
+"""Public names of the package and the module that defines each of them.
+They are imported on first access."""
+
+_LAZY_SUBMODULES = {"base_model", "input", "logger", "options", "output"}
+"""Submodules that used to be imported with the package, and that are still
+available as its attributes, imported on first access."""
+
+
+def __getattr__(name: str) -> Any:
+    """Imports a public name on first access (PEP 562), so that importing the
+    package does not import the modules, and their dependencies, that are
+    not used."""
+
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    """Lists the public names, including the ones not imported yet."""
+
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
@@ -1,33 +1,188 @@
 """Functionality for interacting with the Nextmv Cloud."""
 
-from .acceptance_test import AcceptanceTest as AcceptanceTest
-from .acceptance_test import Comparison as Comparison
-from .acceptance_test import ComparisonInstance as ComparisonInstance
-from .acceptance_test import Metric as Metric
-from .acceptance_test import MetricParams as MetricParams
-from .acceptance_test import MetricType as MetricType
-from .account import Account as Account
-from .account import Queue as Queue
-from .account import QueuedRun as QueuedRun
-from .application import Application as Application
-from .application import Configuration as Configuration
-from .application import DownloadURL as DownloadURL
-from .application import ErrorLog as ErrorLog
-from .application import Metadata as Metadata
-from .application import PollingOptions as PollingOptions
-from .application import RunInformation as RunInformation
-from .application import RunResult as RunResult
-from .application import UploadURL as UploadURL
-from .batch_experiment import BatchExperiment as BatchExperiment
-from .batch_experiment import BatchExperimentInformation as BatchExperimentInformation
-from .batch_experiment import BatchExperimentMetadata as BatchExperimentMetadata
-from .batch_experiment import BatchExperimentRun as BatchExperimentRun
-from .client import Client as Client
-from .input_set import InputSet as InputSet
-from .manifest import Manifest as Manifest
-from .manifest import ManifestBuild as ManifestBuild
-from .manifest import ManifestPython as ManifestPython
-from .manifest import ManifestRuntime as ManifestRuntime
-from .manifest import ManifestType as ManifestType
-from .status import Status as Status
-from .status import StatusV2 as StatusV2
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from .acceptance_test import AcceptanceTest as AcceptanceTest
+    from .acceptance_test import Comparison as Comparison
+    from .acceptance_test import ComparisonInstance as ComparisonInstance
+    from .acceptance_test import Metric as Metric
+    from .acceptance_test import MetricParams as MetricParams
+    from .acceptance_test import MetricType as MetricType
+    from .account import Account as Account
+    from .account import Queue as Queue
+    from .account import QueuedRun as QueuedRun
+    from .application import AdaptivePollingOptions as AdaptivePollingOptions
+    from .application import Application as Application
+    from .application import Configuration as Configuration
+    from .application import DownloadURL as DownloadURL
+    from .application import ErrorLog as ErrorLog
+    from .application import Metadata as Metadata
+    from .application import PollingOptions as PollingOptions
+    from .application import RunDeadlineExceededError as RunDeadlineExceededError
+    from .application import RunInformation as RunInformation
+    from .application import RunLog as RunLog
+    from .application import RunResult as RunResult
+    from .application import RunResultFile as RunResultFile
+    from .application import UploadURL as UploadURL
+    from .archive import RunArchive as RunArchive
+    from .archive import SyncStats as SyncStats
+    from .async_application import AsyncApplication as AsyncApplication
+    from .async_client import AsyncClient as AsyncClient
+    from .batch_experiment import BatchExperiment as BatchExperiment
+    from .batch_experiment import BatchExperimentInformation as BatchExperimentInformation
+    from .batch_experiment import BatchExperimentMetadata as BatchExperimentMetadata
+    from .batch_experiment import BatchExperimentRun as BatchExperimentRun
+    from .cache import Cache as Cache
+    from .cache import CacheEntry as CacheEntry
+    from .cache import DiskCache as DiskCache
+    from .cache import MemoryCache as MemoryCache
+    from .cache import TieredCache as TieredCache
+    from .client import Client as Client
+    from .client import EncodedPayload as EncodedPayload
+    from .download import ChecksumError as ChecksumError
+    from .download import DownloadedFile as DownloadedFile
+    from .download import RangedDownloader as RangedDownloader
+    from .executor import RunExecutor as RunExecutor
+    from .executor import RunFuture as RunFuture
+    from .export import ExportFormat as ExportFormat
+    from .export import ExportStats as ExportStats
+    from .export import RunExporter as RunExporter
+    from .input_set import InputSet as InputSet
+    from .logs import LogChunk as LogChunk
+    from .logs import LogFollower as LogFollower
+    from .logs import LogTail as LogTail
+    from .manifest import Manifest as Manifest
+    from .manifest import ManifestBuild as ManifestBuild
+    from .manifest import ManifestPython as ManifestPython
+    from .manifest import ManifestRuntime as ManifestRuntime
+    from .manifest import ManifestType as ManifestType
+    from .metrics import Histogram as Histogram
+    from .metrics import MetricsRegistry as MetricsRegistry
+    from .metrics import RequestRecord as RequestRecord
+    from .polling import AdaptivePollingSchedule as AdaptivePollingSchedule
+    from .polling import DurationModel as DurationModel
+    from .polling import PollingSchedule as PollingSchedule
+    from .rate_limit import EndpointClass as EndpointClass
+    from .rate_limit import EndpointLimit as EndpointLimit
+    from .rate_limit import RateLimiter as RateLimiter
+    from .routing import InstanceRouter as InstanceRouter
+    from .scheduler import SubmissionScheduler as SubmissionScheduler
+    from .status import Status as Status
+    from .status import StatusV2 as StatusV2
+    from .upload import UploadCache as UploadCache
+    from .upload import UploadURLPool as UploadURLPool
+    from .waiter import RunWaiter as RunWaiter
+
+_LAZY_ATTRIBUTES = {
+    "AcceptanceTest": "acceptance_test",
+    "Comparison": "acceptance_test",
+    "ComparisonInstance": "acceptance_test",
+    "Metric": "acceptance_test",
+    "MetricParams": "acceptance_test",
+    "MetricType": "acceptance_test",
+    "Account": "account",
+    "Queue": "account",
+    "QueuedRun": "account",
+    "AdaptivePollingOptions": "application",
+    "Application": "application",
+    "Configuration": "application",
+    "DownloadURL": "application",
+    "ErrorLog": "application",
+    "Metadata": "application",
+    "PollingOptions": "application",
+    "RunDeadlineExceededError": "application",
+    "RunInformation": "application",
+    "RunLog": "application",
+    "RunResult": "application",
+    "RunResultFile": "application",
+    "UploadURL": "application",
+    "RunArchive": "archive",
+    "SyncStats": "archive",
+    "AsyncApplication": "async_application",
+    "AsyncClient": "async_client",
+    "BatchExperiment": "batch_experiment",
+    "BatchExperimentInformation": "batch_experiment",
+    "BatchExperimentMetadata": "batch_experiment",
+    "BatchExperimentRun": "batch_experiment",
+    "Cache": "cache",
+    "CacheEntry": "cache",
+    "DiskCache": "cache",
+    "MemoryCache": "cache",
+    "TieredCache": "cache",
+    "Client": "client",
+    "EncodedPayload": "client",
+    "ChecksumError": "download",
+    "DownloadedFile": "download",
+    "RangedDownloader": "download",
+    "RunExecutor": "executor",
+    "RunFuture": "executor",
+    "ExportFormat": "export",
+    "ExportStats": "export",
+    "RunExporter": "export",
+    "InputSet": "input_set",
+    "LogChunk": "logs",
+    "LogFollower": "logs",
+    "LogTail": "logs",
+    "Manifest": "manifest",
+    "ManifestBuild": "manifest",
+    "ManifestPython": "manifest",
+    "ManifestRuntime": "manifest",
+    "ManifestType": "manifest",
+    "Histogram": "metrics",
+    "MetricsRegistry": "metrics",
+    "RequestRecord": "metrics",
+    "AdaptivePollingSchedule": "polling",
+    "DurationModel": "polling",
+    "PollingSchedule": "polling",
+    "EndpointClass": "rate_limit",
+    "EndpointLimit": "rate_limit",
+    "RateLimiter": "rate_limit",
+    "InstanceRouter": "routing",
+    "SubmissionScheduler": "scheduler",
+    "Status": "status",
+    "StatusV2": "status",
+    "UploadCache": "upload",
+    "UploadURLPool": "upload",
+    "RunWaiter": "waiter",
+}
+"""Public names of the package and the module that defines each of them.
+They are imported on first access."""
+
+_LAZY_SUBMODULES = {
+    "acceptance_test",
+    "account",
+    "application",
+    "batch_experiment",
+    "client",
+    "input_set",
+    "manifest",
+    "status",
+}
+"""Submodules that used to be imported with the package, and that are still
+available as its attributes, imported on first access."""
+
+
+def __getattr__(name: str) -> Any:
+    """Imports a public name on first access (PEP 562), so that importing the
+    package does not import the modules, and their dependencies, that are
+    not used."""
+
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f".{name}", __name__)
+
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+
+    return value
+
+
+def __dir__():
+    """Lists the public names, including the ones not imported yet."""
+
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
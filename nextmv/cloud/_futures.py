@@ -0,0 +1,52 @@
+"""Internal helpers to complete the futures of runs, which can be cancelled
+by their callers at any time."""
+
+import contextlib
+from concurrent.futures import Future
+from typing import Any, Optional
+
+
+def complete(future: Future, result: Any = None, exception: Optional[BaseException] = None) -> bool:
+    """
+    Set the outcome of a future, unless it is already done. If the future was
+    cancelled, its waiters are notified instead, so that
+    `concurrent.futures.wait` and `as_completed` return.
+
+    Args:
+        future: Future to complete.
+        result: Result of the future, if there is no exception.
+        exception: Exception of the future.
+
+    Returns:
+        Whether the outcome was set.
+    """
+
+    try:
+        if not future.set_running_or_notify_cancel():
+            return False
+    except RuntimeError:
+        # The outcome was already set, or the cancellation notified.
+        return False
+
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(result)
+
+    return True
+
+
+def notify_cancel(future: Future) -> None:
+    """
+    Notify the waiters of a cancelled future. A future cancelled while
+    pending is not seen as done by `concurrent.futures.wait` and
+    `as_completed` until then. It does nothing if the future is not
+    cancelled, or if its waiters were already notified.
+
+    Args:
+        future: Future that may have been cancelled.
+    """
+
+    if future.cancelled():
+        with contextlib.suppress(RuntimeError):
+            future.set_running_or_notify_cancel()
@@ -0,0 +1,100 @@
+"""Internal helpers to stream transferred content to and from local files, and
+to keep the state of transfers that can be resumed."""
+
+import contextlib
+import itertools
+import os
+import tempfile
+import zlib
+from typing import IO, Dict, Iterator, Optional, Union
+
+from nextmv import serialization
+
+CHUNK_SIZE: int = 1024 * 1024
+"""Size of the chunks in which files are read and downloads are streamed to
+disk."""
+
+GZIP_MAGIC: bytes = b"\x1f\x8b"
+"""Leading bytes of gzip-compressed content."""
+
+
+def read_chunks(f: IO[bytes]) -> Iterator[bytes]:
+    """Reads a binary file object in chunks."""
+
+    return iter(lambda: f.read(CHUNK_SIZE), b"")
+
+
+def gunzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Decompresses the chunks on the fly if the content they make up is
+    gzip-compressed, otherwise yields them untouched."""
+
+    chunks = iter(chunks)
+    first = b""
+    for chunk in chunks:
+        first += chunk
+        if len(first) >= len(GZIP_MAGIC):
+            break
+
+    if not first.startswith(GZIP_MAGIC):
+        if first:
+            yield first
+        yield from chunks
+        return
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in itertools.chain([first], chunks):
+        while chunk:
+            yield decompressor.decompress(chunk)
+            # Concatenated gzip members are decompressed one after the other.
+            chunk = decompressor.unused_data
+            if chunk:
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    yield decompressor.flush()
+
+
+def write_chunks(path: Union[str, os.PathLike], chunks: Iterator[bytes]) -> int:
+    """Writes the chunks to a temporary file next to `path` and atomically
+    moves it into place. Returns the number of bytes written."""
+
+    tmp_path = f"{os.fspath(path)}.part"
+    written = 0
+    try:
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    return written
+
+
+def read_state(path: str) -> Optional[Dict]:
+    """Reads the state of a resumable transfer, if there is a valid one."""
+
+    try:
+        with open(path, "rb") as f:
+            return serialization.loads(f.read())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_state(path: str, state: Dict) -> None:
+    """Atomically writes the state of a resumable transfer."""
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(serialization.dumps(state))
+
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp_path)
+        raise
@@ -1,28 +1,53 @@
 """This module contains the application class."""
 
-import json
+import os
 import shutil
+import threading
 import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import requests
+from pydantic import ConfigDict, Field
 
+from nextmv import serialization
 from nextmv.base_model import BaseModel
 from nextmv.cloud import package
 from nextmv.cloud.acceptance_test import AcceptanceTest, Metric
 from nextmv.cloud.batch_experiment import BatchExperiment, BatchExperimentMetadata, BatchExperimentRun
-from nextmv.cloud.client import Client, get_size
+from nextmv.cloud.cache import Cache, CacheEntry
+from nextmv.cloud.client import Client, EncodedPayload, UploadData, _is_stream, _request_deadline
+from nextmv.cloud.download import DownloadedFile, RangedDownloader
+from nextmv.cloud.export import ExportFormat, ExportStats, RunExporter
 from nextmv.cloud.input_set import InputSet
 from nextmv.cloud.manifest import Manifest
-from nextmv.cloud.status import Status, StatusV2
+from nextmv.cloud.polling import AdaptivePollingSchedule, DurationModel, PollingSchedule
+from nextmv.cloud.status import _TERMINAL_STATUSES, Status, StatusV2
+from nextmv.cloud.upload import UploadCache, UploadURLPool, input_digest
 from nextmv.logger import log
 
 _MAX_RUN_SIZE: int = 5 * 1024 * 1024
 """Maximum size of the run input/output. This value is used to determine
 whether to use the large input upload and/or result download endpoints."""
 
+_TOO_LARGE_STATUS_CODE: int = 413
+"""Status code with which the API refuses to respond a run input inline
+because it is too large, and a download URL must be requested instead."""
+
+_AMBIGUOUS_TOO_LARGE_STATUS_CODE: int = 400
+"""Status code with which the API may also refuse to respond a large run
+input inline, but that it uses for other errors as well."""
+
+_STALE_UPLOAD_STATUS_CODES: Tuple[int, ...] = (400, 404, 410)
+"""Status codes with which the API rejects a run whose upload is missing or
+has expired. The API also uses them for unrelated errors, so the error must
+refer to the upload as well."""
+
+_FINISHED_BATCH_EXPERIMENT_STATUSES: List[str] = ["completed", "failed", "canceled"]
+"""Statuses of a batch experiment that has finished executing."""
+
 
 class DownloadURL(BaseModel):
     """Result of getting a download URL."""
@@ -87,11 +112,85 @@ class PollingOptions(BaseModel):
     max_tries: int = 20
     """Maximum number of tries to use."""
 
+    def schedule(self, run_id: str) -> PollingSchedule:
+        """
+        Create the schedule of the polls of a run.
+
+        Args:
+            run_id: ID of the run.
+
+        Returns:
+            Schedule of the polls of the run.
+        """
+
+        return PollingSchedule(run_id=run_id, options=self)
+
+
+class AdaptivePollingOptions(PollingOptions):
+    """Options to poll for a run result near its predicted completion. The
+    duration of the runs of every instance is learned from the runs that
+    finished, so the same options should be reused across runs. Until an
+    instance has enough finished runs, the static strategy of
+    `PollingOptions` is used. `max_duration` is the time budget of the
+    polling strategy, in seconds."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    min_delay: float = 0.2
+    """Minimum delay to use between polls near the predicted completion, in
+    seconds."""
+    finish_polls: int = 5
+    """Number of polls spread over the interval in which a run is predicted
+    to finish."""
+    duration_model: DurationModel = Field(default_factory=DurationModel, exclude=True)
+    """Model of the duration of the runs, shared by every run polled with
+    these options."""
+
+    def schedule(self, run_id: str) -> PollingSchedule:
+        """
+        Create the schedule of the polls of a run.
+
+        Args:
+            run_id: ID of the run.
+
+        Returns:
+            Schedule of the polls of the run.
+        """
+
+        return AdaptivePollingSchedule(run_id=run_id, options=self)
+
 
 _DEFAULT_POLLING_OPTIONS: PollingOptions = PollingOptions()
 """Default polling options to use when polling for a run result."""
 
 
+class RunDeadlineExceededError(TimeoutError):
+    """A run did not finish before the deadline given to
+    `Application.new_run_with_result`. The run was cancelled when the
+    deadline passed, unless it had already finished."""
+
+    def __init__(self, run_id: Optional[str], deadline: float, metadata: Optional[Metadata] = None):
+        """
+        Args:
+            run_id: ID of the run, or None if the deadline passed before the
+                run was submitted.
+            deadline: Deadline of the run, in seconds.
+            metadata: Last known metadata of the run, if it was polled before
+                the deadline.
+        """
+
+        if run_id is None:
+            message = f"run was not submitted within its deadline of {deadline} seconds"
+        else:
+            status = metadata.status_v2.value if metadata is not None else "unknown"
+            message = f"run {run_id} did not finish within its deadline of {deadline} seconds (status: {status})"
+
+        super().__init__(message)
+        self.run_id = run_id
+        self.deadline = deadline
+        self.metadata = metadata
+
+
 class RunInformation(BaseModel):
     """Information of a run."""
 
@@ -116,6 +215,30 @@ class RunResult(RunInformation):
     """Output of the run. Only available if the run succeeded."""
 
 
+class RunResultFile(RunInformation):
+    """Result of a run whose output was downloaded to a local file instead of
+    being loaded into memory."""
+
+    error_log: Optional[ErrorLog] = None
+    """Error log of the run. Only available if the run failed."""
+    output_path: Optional[str] = None
+    """Path of the file holding the output of the run. Only available if the
+    run succeeded."""
+
+    def output_file(self) -> Optional[DownloadedFile]:
+        """
+        Handle to the output of the run, which is parsed lazily.
+
+        Returns:
+            Handle to the output file, or None if the run has no output.
+        """
+
+        if self.output_path is None:
+            return None
+
+        return DownloadedFile(path=self.output_path)
+
+
 class RunLog(BaseModel):
     """Log of a run."""
 
@@ -154,12 +277,34 @@ class Application:
     """Base endpoint for the application."""
     experiments_endpoint: str = "{base}/experiments"
     """Base endpoint for the experiments in the application."""
+    cache: Optional[Cache] = None
+    """Cache for responses that do not change anymore: the metadata, result,
+    input and logs of finished runs, finished batch experiments, input sets
+    and acceptance tests. Input sets and acceptance tests are revalidated with
+    the server when it provides an ETag. No caching is done if not set."""
+    upload_cache: Optional[UploadCache] = None
+    """Cache of the uploads of large inputs. An input with the same content
+    as one already uploaded, e.g.: when submitting it to several instances,
+    is referenced by its upload ID instead of being uploaded again. Only
+    encoded inputs and paths are deduplicated. No deduplication is done if
+    not set."""
+    upload_url_pool_size: int = 0
+    """Number of upload URLs acquired ahead of time and refilled in the
+    background, so that uploading a large input does not wait for a new
+    upload URL. The pool is started by the first large upload. No upload URLs
+    are acquired ahead of time if set to 0."""
+    downloader: Optional[RangedDownloader] = None
+    """Downloader used by `run_input_to_file` and `run_result_to_file` to
+    fetch large inputs and outputs in parallel ranges, resuming interrupted
+    downloads. They are downloaded with a single request if not set."""
 
     def __post_init__(self):
         """Logic to run after the class is initialized."""
 
         self.endpoint = self.endpoint.format(id=self.id)
         self.experiments_endpoint = self.experiments_endpoint.format(base=self.endpoint)
+        self._upload_url_pool: Optional[UploadURLPool] = None
+        self._upload_url_pool_lock = threading.Lock()
 
     def acceptance_test(self, acceptance_test_id: str) -> AcceptanceTest:
         """
@@ -175,12 +320,13 @@ class Application:
             requests.HTTPError: If the response status code is not 2xx.
         """
 
-        response = self.client.request(
-            method="GET",
+        acceptance_test = self.__get_json(
             endpoint=f"{self.experiments_endpoint}/acceptance/{acceptance_test_id}",
+            cacheable=lambda _: True,
+            revalidate=True,
         )
 
-        return AcceptanceTest.from_dict(response.json())
+        return AcceptanceTest.from_dict(acceptance_test)
 
     def batch_experiment(self, batch_id: str) -> BatchExperiment:
         """
@@ -196,12 +342,12 @@ class Application:
             requests.HTTPError: If the response status code is not 2xx.
         """
 
-        response = self.client.request(
-            method="GET",
+        batch_experiment = self.__get_json(
             endpoint=f"{self.experiments_endpoint}/batch/{batch_id}",
+            cacheable=lambda data: data.get("status") in _FINISHED_BATCH_EXPERIMENT_STATUSES,
         )
 
-        return BatchExperiment.from_dict(response.json())
+        return BatchExperiment.from_dict(batch_experiment)
 
     def cancel_run(self, run_id: str) -> None:
         """
@@ -253,6 +399,53 @@ class Application:
             endpoint=f"{self.experiments_endpoint}/acceptance/{acceptance_test_id}",
         )
 
+    def export_runs(
+        self,
+        runs: Union[Iterable[str], InputSet],
+        destination: str,
+        format: ExportFormat = ExportFormat.directory,
+        include_input: bool = True,
+        include_output: bool = True,
+        include_logs: bool = True,
+        max_workers: int = 8,
+    ) -> ExportStats:
+        """
+        Export the inputs, outputs, metadata and logs of many runs
+        concurrently, skipping the runs already exported to the destination.
+        See `RunExporter` for the details of the formats.
+
+        Args:
+            runs: IDs of the runs to export, or an input set, whose inputs
+                are the runs it was created from.
+            destination: Directory, for the `directory` and `parquet`
+                formats, or file, for the `jsonl` format, where the runs are
+                exported.
+            format: Format of the export.
+            include_input: Whether to export the inputs.
+            include_output: Whether to export the outputs.
+            include_logs: Whether to export the logs.
+            max_workers: Number of runs fetched concurrently.
+
+        Returns:
+            Summary of the export, with the runs that could not be exported.
+
+        Raises:
+            ImportError: If the format is `parquet` and `pyarrow` is not
+                installed.
+        """
+
+        exporter = RunExporter(
+            application=self,
+            destination=destination,
+            format=format,
+            include_input=include_input,
+            include_output=include_output,
+            include_logs=include_logs,
+            max_workers=max_workers,
+        )
+
+        return exporter.export(runs)
+
     def input_set(self, input_set_id: str) -> InputSet:
         """
         Get an input set.
@@ -267,12 +460,13 @@ class Application:
             requests.HTTPError: If the response status code is not 2xx.
         """
 
-        response = self.client.request(
-            method="GET",
+        input_set = self.__get_json(
             endpoint=f"{self.experiments_endpoint}/inputsets/{input_set_id}",
+            cacheable=lambda _: True,
+            revalidate=True,
         )
 
-        return InputSet.from_dict(response.json())
+        return InputSet.from_dict(input_set)
 
     def list_acceptance_tests(self) -> List[AcceptanceTest]:
         """
@@ -328,6 +522,49 @@ class Application:
 
         return [InputSet.from_dict(input_set) for input_set in response.json()]
 
+    def list_runs(self, status: Optional[StatusV2] = None) -> List[RunInformation]:
+        """
+        List the runs of the application, without their inputs and outputs.
+        Every page of the listing is requested.
+
+        Args:
+            status: Only list the runs with this status.
+
+        Returns:
+            List of runs, from the newest.
+
+        Raises:
+            requests.HTTPError: If a response status code is not 2xx.
+        """
+
+        return [run for page in self._run_pages(status=status) for run in page]
+
+    def _run_pages(self, status: Optional[StatusV2] = None) -> Iterator[List[RunInformation]]:
+        """
+        Lists the runs of the application page by page, from the newest. A
+        page is only requested once the previous one has been consumed, so
+        callers can stop early.
+        """
+
+        query_params = {}
+        if status is not None:
+            query_params["status"] = StatusV2(status).value
+
+        while True:
+            response = self.client.request(
+                method="GET",
+                endpoint=f"{self.endpoint}/runs",
+                query_params=query_params or None,
+            )
+            data = response.json()
+            yield [RunInformation.from_dict(run) for run in data.get("runs") or []]
+
+            next_page_token = data.get("next_page_token")
+            if not next_page_token:
+                return
+
+            query_params["page_token"] = next_page_token
+
     def new_acceptance_test(
         self,
         candidate_instance_id: str,
@@ -525,7 +762,7 @@ class Application:
 
     def new_run(
         self,
-        input: Union[Dict[str, Any], BaseModel, str] = None,
+        input: Union[Dict[str, Any], BaseModel, UploadData] = None,
         instance_id: Optional[str] = None,
         name: Optional[str] = None,
         description: Optional[str] = None,
@@ -539,7 +776,10 @@ class Application:
 
         Args:
             input: Input to use for the run. This can be JSON (given as dict
-            or BaseModel) or text (given as str).
+            or BaseModel) or text (given as str). Large inputs can also be
+            given as a path (`os.PathLike`), a binary file object or an
+            iterator of byte chunks, which are always streamed to an upload
+            URL in bounded memory.
             instance_id: ID of the instance to use for the run. If not
                 provided, the default_instance_id will be used.
             name: Name of the run.
@@ -555,53 +795,78 @@ class Application:
             requests.HTTPError: If the response status code is not 2xx.
         """
 
-        input_size = 0
-        if isinstance(input, BaseModel):
-            input = input.to_dict()
-            if input is not None:
-                input_size = get_size(input)
-        elif isinstance(input, Dict):
-            input_size = get_size(input)
+        input, encoded_input = self.__serialize_run_input(input)
 
-        upload_url_required = isinstance(input, str) or input_size > _MAX_RUN_SIZE
+        return self.__submit_run(
+            input=input,
+            encoded_input=encoded_input,
+            instance_id=instance_id,
+            name=name,
+            description=description,
+            upload_id=upload_id,
+            options=options,
+            configuration=configuration,
+        )
 
-        upload_id_used = upload_id is not None
-        if not upload_id_used and upload_url_required:
-            upload_url = self.upload_url()
-            self.upload_large_input(input=input, upload_url=upload_url)
-            upload_id = upload_url.upload_id
-            upload_id_used = True
+    def new_runs(
+        self,
+        inputs: Iterable[Union[Dict[str, Any], BaseModel, UploadData]],
+        instance_id: Optional[str] = None,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        configuration: Optional[Configuration] = None,
+    ) -> List[str]:
+        """
+        Submit several inputs to start a new run of the application for each
+        of them. The next input is serialized in the background while the
+        current one is uploaded and submitted.
 
-        payload = {}
-        if upload_id_used:
-            payload["upload_id"] = upload_id
-        else:
-            payload["input"] = input
+        Args:
+            inputs: Inputs to use for the runs. See `new_run`.
+            instance_id: ID of the instance to use for the runs. If not
+                provided, the default_instance_id will be used.
+            name: Name of the runs.
+            description: Description of the runs.
+            options: Options to use for the runs.
+            configuration: Configuration to use for the runs.
 
-        if name is not None:
-            payload["name"] = name
-        if description is not None:
-            payload["description"] = description
-        if options is not None:
-            payload["options"] = options
-        if configuration is not None:
-            payload["configuration"] = configuration.to_dict()
+        Returns:
+            IDs of the submitted runs, in the order of the inputs.
 
-        query_params = {
-            "instance_id": instance_id if instance_id is not None else self.default_instance_id,
-        }
-        response = self.client.request(
-            method="POST",
-            endpoint=f"{self.endpoint}/runs",
-            payload=payload,
-            query_params=query_params,
-        )
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
 
-        return response.json()["run_id"]
+        def submit(serialized: Future) -> str:
+            input, encoded_input = serialized.result()
+            return self.__submit_run(
+                input=input,
+                encoded_input=encoded_input,
+                instance_id=instance_id,
+                name=name,
+                description=description,
+                options=options,
+                configuration=configuration,
+            )
+
+        run_ids = []
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="nextmv-serializer") as serializer:
+            pending = None
+            for input in inputs:
+                serialized = serializer.submit(self.__serialize_run_input, input)
+                if pending is not None:
+                    run_ids.append(submit(pending))
+                pending = serialized
+
+            if pending is not None:
+                run_ids.append(submit(pending))
+
+        return run_ids
 
     def new_run_with_result(
         self,
-        input: Union[Dict[str, Any], BaseModel] = None,
+        input: Union[Dict[str, Any], BaseModel, UploadData] = None,
         instance_id: Optional[str] = None,
         name: Optional[str] = None,
         description: Optional[str] = None,
@@ -609,6 +874,7 @@ class Application:
         run_options: Optional[Dict[str, Any]] = None,
         polling_options: PollingOptions = _DEFAULT_POLLING_OPTIONS,
         configuration: Optional[Configuration] = None,
+        deadline: Optional[float] = None,
     ) -> RunResult:
         """
         Submit an input to start a new run of the application and poll for the
@@ -616,6 +882,15 @@ class Application:
         run_result_with_polling methods, applying polling logic to check when
         the run succeeded.
 
+        With a `deadline`, the whole call is bounded: the upload of the input,
+        the time the run is queued and executing, and the download of its
+        result. Every request is made with a timeout capped to the time left,
+        and is only retried while time is left. Polls are never scheduled
+        past the deadline, and the polling strategy still applies within it.
+        If the deadline passes, the run is cancelled, unless it finished, so
+        that it does not keep consuming execution capacity, and a
+        `RunDeadlineExceededError` is raised.
+
          Args:
             input: Input to use for the run.
             instance_id: ID of the instance to use for the run. If not
@@ -626,27 +901,41 @@ class Application:
             run_options: Options to use for the run.
             polling_options: Options to use when polling for the run result.
             configuration: Configuration to use for the run.
+            deadline: Time, in seconds, within which the result of the run
+                must be obtained. If not provided, only the polling strategy
+                bounds the wait.
 
          Returns:
             Result of the run.
 
         Raises:
             requests.HTTPError: If the response status code is not 2xx.
+            RunDeadlineExceededError: If the deadline passes before the result
+                of the run is obtained. It carries the ID and the last known
+                metadata of the run.
             TimeoutError: If the run does not succeed after the polling
                 strategy is exhausted based on time duration.
             RuntimeError: If the run does not succeed after the polling
                 strategy is exhausted based on number of tries.
         """
 
-        run_id = self.new_run(
-            input=input,
-            instance_id=instance_id,
-            name=name,
-            description=description,
-            upload_id=upload_id,
-            options=run_options,
-            configuration=configuration,
-        )
+        run_kwargs = {
+            "input": input,
+            "instance_id": instance_id,
+            "name": name,
+            "description": description,
+            "upload_id": upload_id,
+            "options": run_options,
+            "configuration": configuration,
+        }
+        if deadline is not None:
+            return self.__new_run_before_deadline(
+                run_kwargs=run_kwargs,
+                polling_options=polling_options,
+                deadline=deadline,
+            )
+
+        run_id = self.new_run(**run_kwargs)
 
         return self.run_result_with_polling(
             run_id=run_id,
@@ -723,30 +1012,57 @@ class Application:
         Raises:
             requests.HTTPError: If the response status code is not 2xx.
         """
-        run_information = self.run_metadata(run_id=run_id)
-
-        query_params = None
-        large = False
-        if run_information.metadata.input_size > _MAX_RUN_SIZE:
-            query_params = {"format": "url"}
-            large = True
+        endpoint = f"{self.endpoint}/runs/{run_id}/input"
+        cached = self.__cache_get(endpoint)
+        if cached is not None:
+            return serialization.loads(cached.data)
 
-        response = self.client.request(
-            method="GET",
-            endpoint=f"{self.endpoint}/runs/{run_id}/input",
-            query_params=query_params,
-        )
-        if not large:
-            return response.json()
+        response, download_url = self.__request_input(run_id=run_id)
+        if response is not None:
+            self.__cache_set(endpoint, CacheEntry(data=response.content))
+            return serialization.loads(response.content)
 
-        download_url = DownloadURL.from_dict(response.json())
         download_response = self.client.request(
             method="GET",
             endpoint=download_url.url,
             headers={"Content-Type": "application/json"},
         )
+        self.__cache_set(endpoint, CacheEntry(data=download_response.content))
 
-        return download_response.json()
+        return serialization.loads(download_response.content)
+
+    def run_input_to_file(
+        self,
+        run_id: str,
+        path: Union[str, os.PathLike],
+        decompress: bool = True,
+    ) -> DownloadedFile:
+        """
+        Get the input of a run and write it to a local file. Large inputs are
+        streamed from their download URL straight to disk, with constant
+        memory usage.
+
+        Args:
+            run_id: ID of the run.
+            path: Path of the file to write the input to.
+            decompress: Whether to decode a compressed download while writing
+                it.
+
+        Returns:
+            Handle to the file holding the input, which is parsed lazily.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        response, download_url = self.__request_input(run_id=run_id)
+        if response is None:
+            self.__download(url=download_url.url, path=path, decompress=decompress)
+        else:
+            with open(path, "wb") as f:
+                f.write(response.content)
+
+        return DownloadedFile(path=os.fspath(path))
 
     def run_logs(self, run_id: str) -> RunLog:
         """
@@ -761,11 +1077,11 @@ class Application:
         Raises:
             requests.HTTPError: If the response status code is not 2xx.
         """
-        response = self.client.request(
-            method="GET",
+        run_log = self.__get_json(
             endpoint=f"{self.endpoint}/runs/{run_id}/logs",
+            cacheable=lambda _: self.__cache_get(f"{self.endpoint}/runs/{run_id}/metadata") is not None,
         )
-        return RunLog.from_dict(response.json())
+        return RunLog.from_dict(run_log)
 
     def run_metadata(self, run_id: str) -> RunInformation:
         """
@@ -781,12 +1097,12 @@ class Application:
             requests.HTTPError: If the response status code is not 2xx.
         """
 
-        response = self.client.request(
-            method="GET",
+        run_information = self.__get_json(
             endpoint=f"{self.endpoint}/runs/{run_id}/metadata",
+            cacheable=lambda data: data["metadata"]["status_v2"] in _TERMINAL_STATUSES,
         )
 
-        return RunInformation.from_dict(response.json())
+        return RunInformation.from_dict(run_information)
 
     def run_result(self, run_id: str) -> RunResult:
         """
@@ -802,9 +1118,52 @@ class Application:
             requests.HTTPError: If the response status code is not 2xx.
         """
 
-        run_information = self.run_metadata(run_id=run_id)
+        cached = self.__cache_get(f"{self.endpoint}/runs/{run_id}")
+        if cached is not None:
+            return RunResult.from_dict(serialization.loads(cached.data))
 
-        return self.__run_result(run_id=run_id, run_information=run_information)
+        return self.__run_result(run_id=run_id)
+
+    def run_result_to_file(
+        self,
+        run_id: str,
+        path: Union[str, os.PathLike],
+        decompress: bool = True,
+    ) -> RunResultFile:
+        """
+        Get the result of a run and write its output to a local file instead
+        of loading it into memory. Large outputs are streamed from their
+        download URL straight to disk, with constant memory usage.
+
+        Args:
+            run_id: ID of the run.
+            path: Path of the file to write the output to.
+            decompress: Whether to decode a compressed download while writing
+                it.
+
+        Returns:
+            Result of the run, pointing to the output file.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        result, large_output = self.__request_result(run_id=run_id)
+        output = result.pop("output", None)
+        result_file = RunResultFile.from_dict(result)
+        if output is None:
+            return result_file
+
+        if large_output:
+            download_url = DownloadURL.from_dict(output)
+            self.__download(url=download_url.url, path=path, decompress=decompress)
+        else:
+            with open(path, "wb") as f:
+                f.write(serialization.dumps(output))
+
+        result_file.output_path = os.fspath(path)
+
+        return result_file
 
     def run_result_with_polling(
         self,
@@ -825,40 +1184,30 @@ class Application:
 
         Raises:
             requests.HTTPError: If the response status code is not 2xx.
+            TimeoutError: If the run does not succeed after the polling
+                strategy is exhausted based on time duration.
+            RuntimeError: If the run does not succeed after the polling
+                strategy is exhausted based on number of tries.
         """
 
-        time.sleep(polling_options.initial_delay)
-        delay = polling_options.delay
-        polling_ok = False
-        for _ in range(polling_options.max_tries):
+        cached = self.__cache_get(f"{self.endpoint}/runs/{run_id}")
+        if cached is not None:
+            return RunResult.from_dict(serialization.loads(cached.data))
+
+        schedule = polling_options.schedule(run_id=run_id)
+        time.sleep(schedule.first_delay())
+        run_information = self.run_metadata(run_id=run_id)
+        while run_information.metadata.status_v2 not in _TERMINAL_STATUSES:
+            time.sleep(schedule.next_delay(run_information.metadata))
             run_information = self.run_metadata(run_id=run_id)
-            if run_information.metadata.status_v2 in [
-                StatusV2.succeeded,
-                StatusV2.failed,
-                StatusV2.canceled,
-            ]:
-                polling_ok = True
-                break
-
-            if delay > polling_options.max_duration:
-                raise TimeoutError(
-                    f"run {run_id} did not succeed after {delay} seconds",
-                )
-
-            sleep_duration = min(delay, polling_options.max_delay)
-            time.sleep(sleep_duration)
-            delay *= polling_options.backoff
-
-        if not polling_ok:
-            raise RuntimeError(
-                f"run {run_id} did not succeed after {polling_options.max_tries} tries",
-            )
+
+        schedule.finished(run_information.metadata)
 
         return self.__run_result(run_id=run_id, run_information=run_information)
 
     def upload_large_input(
         self,
-        input: Union[Dict[str, Any], str],
+        input: UploadData,
         upload_url: UploadURL,
     ) -> None:
         """
@@ -866,15 +1215,15 @@ class Application:
 
         Args:
             upload_url: Upload URL to use for uploading the file.
-            input: Input to use for the run.
+            input: Input to use for the run. An already encoded input is
+                uploaded without being serialized again. A path
+                (`os.PathLike`), a binary file object or an iterator of byte
+                chunks is streamed in bounded memory.
 
         Raises:
             requests.HTTPError: If the response status code is not 2xx.
         """
 
-        if isinstance(input, Dict):
-            input = json.dumps(input)
-
         _ = self.client.upload_to_presigned_url(
             url=upload_url.upload_url,
             data=input,
@@ -898,10 +1247,354 @@ class Application:
 
         return UploadURL.from_dict(response.json())
 
+    def __cache_get(self, endpoint: str) -> Optional[CacheEntry]:
+        """Get the cached response of an endpoint, if any."""
+
+        if self.cache is None:
+            return None
+
+        return self.cache.get(f"{self.client.url}/{endpoint}")
+
+    def __cache_set(self, endpoint: str, entry: CacheEntry) -> None:
+        """Cache the response of an endpoint, if a cache is set."""
+
+        if self.cache is None:
+            return
+
+        self.cache.set(f"{self.client.url}/{endpoint}", entry)
+
+    def __get_json(
+        self,
+        endpoint: str,
+        cacheable: Callable[[Any], bool],
+        revalidate: bool = False,
+    ) -> Any:
+        """
+        GET an endpoint and parse the JSON response, going through the cache.
+        A cached response is returned as it is, unless `revalidate` is set and
+        the response had an ETag, in which case the server is asked whether it
+        changed. Fresh responses are cached when `cacheable` says so.
+        """
+
+        cached = self.__cache_get(endpoint)
+        if cached is not None and not (revalidate and cached.etag is not None):
+            return serialization.loads(cached.data)
+
+        headers = None
+        if cached is not None:
+            headers = {**self.client.headers, "If-None-Match": cached.etag}
+
+        response = self.client.request(method="GET", endpoint=endpoint, headers=headers)
+        if cached is not None and response.status_code == 304:
+            return serialization.loads(cached.data)
+
+        data = serialization.loads(response.content)
+        if cacheable(data):
+            self.__cache_set(endpoint, CacheEntry(data=response.content, etag=response.headers.get("ETag")))
+
+        return data
+
+    def __serialize_run_input(
+        self,
+        input: Union[Dict[str, Any], BaseModel, UploadData, None],
+    ) -> Tuple[Any, Optional[EncodedPayload]]:
+        """
+        Serializes the input of a run exactly once. The same bytes are used to
+        decide if a large upload is required, to upload the input, or to embed
+        it in the request payload. Streamed inputs are never serialized.
+        Returns the input, converted to a dict if it was a BaseModel, and its
+        serialization.
+        """
+
+        if isinstance(input, BaseModel):
+            input = input.to_dict()
+
+        if not _is_stream(input) and isinstance(input, (Dict, str)):
+            return input, EncodedPayload.from_object(input)
+
+        return input, None
+
+    def __upload_run_input(
+        self,
+        input: Any,
+        encoded_input: Optional[EncodedPayload],
+    ) -> Tuple[Optional[str], bool]:
+        """
+        Uploads the input of a run if it is streamed, text, or too large to be
+        embedded in the request payload. Returns the upload ID that must be
+        used for the run, if any, and whether it is a previous upload reused
+        from the upload cache.
+        """
+
+        if _is_stream(input):
+            return self.__upload(input)
+
+        upload_url_required = isinstance(input, str) or (
+            encoded_input is not None and encoded_input.size > _MAX_RUN_SIZE
+        )
+        if not upload_url_required:
+            return None, False
+
+        return self.__upload(encoded_input)
+
+    def __submit_run(
+        self,
+        input: Any,
+        encoded_input: Optional[EncodedPayload],
+        instance_id: Optional[str] = None,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        upload_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        configuration: Optional[Configuration] = None,
+    ) -> str:
+        """
+        Uploads the serialized input of a run, if needed, and submits the run.
+        Returns the run_id of the submitted run.
+        """
+
+        reused_upload = False
+        if upload_id is None:
+            upload_id, reused_upload = self.__upload_run_input(input=input, encoded_input=encoded_input)
+
+        payload = {}
+        if upload_id is not None:
+            payload["upload_id"] = upload_id
+        elif encoded_input is None:
+            payload["input"] = input
+
+        optional_fields = {"name": name, "description": description, "options": options}
+        payload.update({key: value for key, value in optional_fields.items() if value is not None})
+        if configuration is not None:
+            payload["configuration"] = configuration.to_dict()
+
+        encoded_payload = EncodedPayload.from_object(payload)
+        if upload_id is None and encoded_input is not None:
+            encoded_payload = encoded_payload.embed("input", encoded_input)
+
+        query_params = {
+            "instance_id": instance_id if instance_id is not None else self.default_instance_id,
+        }
+        try:
+            response = self.client.request(
+                method="POST",
+                endpoint=f"{self.endpoint}/runs",
+                payload=encoded_payload,
+                query_params=query_params,
+            )
+        except requests.HTTPError as e:
+            if not (reused_upload and _is_stale_upload(e) and self.upload_cache.invalidate(upload_id)):
+                raise
+
+            # The reused upload is no longer valid: upload the input again.
+            return self.__submit_run(
+                input=input,
+                encoded_input=encoded_input,
+                instance_id=instance_id,
+                name=name,
+                description=description,
+                options=options,
+                configuration=configuration,
+            )
+
+        return response.json()["run_id"]
+
+    def __download(self, url: str, path: Union[str, os.PathLike], decompress: bool) -> int:
+        """Downloads the content of a download URL to a file, in parallel
+        ranges if a downloader is set."""
+
+        if self.downloader is not None:
+            return self.downloader.download(url=url, path=path, decompress=decompress)
+
+        return self.client.download_from_presigned_url(url=url, path=path, decompress=decompress)
+
+    def __next_upload_url(self) -> UploadURL:
+        """Gets an upload URL, from the pool of upload URLs acquired ahead of
+        time if it is enabled."""
+
+        if self.upload_url_pool_size <= 0:
+            return self.upload_url()
+
+        # Runs are submitted from several threads: only one of them may start
+        # the pool, or the URLs acquired by the others would be leaked.
+        with self._upload_url_pool_lock:
+            if self._upload_url_pool is None:
+                self._upload_url_pool = UploadURLPool(fetch=self.upload_url, size=self.upload_url_pool_size)
+
+        return self._upload_url_pool.get()
+
+    def __upload(self, input: UploadData) -> Tuple[str, bool]:
+        """
+        Uploads a large input, unless an upload of the same content is in the
+        upload cache. Returns the upload ID and whether it was reused.
+        """
+
+        key = None
+        if self.upload_cache is not None:
+            digest = input_digest(input)
+            if digest is not None:
+                key = f"{self.client.url}/{self.endpoint}#{digest}"
+                upload_id = self.upload_cache.get(key)
+                if upload_id is not None:
+                    return upload_id, True
+
+        upload_url = self.__next_upload_url()
+        self.upload_large_input(input=input, upload_url=upload_url)
+        if key is not None:
+            self.upload_cache.set(key, upload_url.upload_id)
+
+        return upload_url.upload_id, False
+
+    def __request_input(self, run_id: str) -> Tuple[Optional[requests.Response], Optional[DownloadURL]]:
+        """
+        GETs the input of a run optimistically, inline, in a single request.
+        If the API refuses to respond it inline because it is too large, the
+        download URL of the input is requested instead. Returns either the
+        response holding the input or the download URL.
+        """
+
+        endpoint = f"{self.endpoint}/runs/{run_id}/input"
+        try:
+            return self.client.request(method="GET", endpoint=endpoint), None
+        except requests.HTTPError as e:
+            if not self.__input_too_large(run_id=run_id, error=e):
+                raise
+
+        response = self.client.request(method="GET", endpoint=endpoint, query_params={"format": "url"})
+
+        return None, DownloadURL.from_dict(response.json())
+
+    def __input_too_large(self, run_id: str, error: requests.HTTPError) -> bool:
+        """
+        Whether the API refused to respond the input of a run inline because
+        it is too large. A 413 says so. A 400 may also mean any other error
+        with the request, so the size of the input in the metadata of the run
+        decides.
+        """
+
+        status_code = error.response.status_code if error.response is not None else None
+        if status_code == _TOO_LARGE_STATUS_CODE:
+            return True
+
+        if status_code != _AMBIGUOUS_TOO_LARGE_STATUS_CODE:
+            return False
+
+        try:
+            run_information = self.run_metadata(run_id=run_id)
+        except requests.HTTPError:
+            return False
+
+        return run_information.metadata.input_size > _MAX_RUN_SIZE
+
+    def __request_result(
+        self,
+        run_id: str,
+        run_information: Optional[RunInformation] = None,
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        GETs the result of a run. Without information about the run, the
+        result is requested optimistically, inline, and the download URL of
+        the output is only requested if the output is missing because it is
+        too large. With information, e.g.: from polling, the right request is
+        made directly. Returns the result and whether its output is a
+        download URL.
+        """
+
+        endpoint = f"{self.endpoint}/runs/{run_id}"
+        if run_information is None or run_information.metadata.output_size <= _MAX_RUN_SIZE:
+            data = serialization.loads(self.client.request(method="GET", endpoint=endpoint).content)
+            large_output = data.get("output") is None and data["metadata"]["output_size"] > _MAX_RUN_SIZE
+            if not large_output:
+                return data, False
+
+        response = self.client.request(method="GET", endpoint=endpoint, query_params={"format": "url"})
+
+        return serialization.loads(response.content), True
+
+    def _run_result(self, run_id: str, run_information: RunInformation) -> RunResult:
+        """Gets the result of a run whose information was already polled, so
+        that a large output goes straight to its download URL. Used by
+        `AsyncApplication`, which polls on its own."""
+
+        return self.__run_result(run_id=run_id, run_information=run_information)
+
+    def __new_run_before_deadline(
+        self,
+        run_kwargs: Dict[str, Any],
+        polling_options: PollingOptions,
+        deadline: float,
+    ) -> RunResult:
+        """
+        Submits a run and polls for its result until a deadline, cancelling
+        the run if the deadline passes before it finishes.
+
+        Args:
+            run_kwargs: Arguments of `new_run`.
+            polling_options: Options to use when polling for the run result.
+            deadline: Deadline of the run, in seconds.
+
+        Returns:
+            Result of the run.
+
+        Raises:
+            RunDeadlineExceededError: If the deadline passes before the result
+                of the run is obtained.
+        """
+
+        deadline_at = time.monotonic() + deadline
+        try:
+            with _request_deadline(deadline_at):
+                run_id = self.new_run(**run_kwargs)
+        except requests.Timeout as e:
+            if time.monotonic() < deadline_at:
+                raise
+            raise RunDeadlineExceededError(run_id=None, deadline=deadline) from e
+
+        schedule = polling_options.schedule(run_id=run_id)
+        delay = schedule.first_delay()
+        run_information: Optional[RunInformation] = None
+        try:
+            with _request_deadline(deadline_at):
+                while True:
+                    # Past the deadline, the next request raises a timeout.
+                    time.sleep(max(min(delay, deadline_at - time.monotonic()), 0))
+                    run_information = self.run_metadata(run_id=run_id)
+                    if run_information.metadata.status_v2 in _TERMINAL_STATUSES:
+                        break
+
+                    delay = schedule.next_delay(run_information.metadata)
+
+                schedule.finished(run_information.metadata)
+
+                return self.__run_result(run_id=run_id, run_information=run_information)
+        except requests.Timeout as e:
+            if time.monotonic() < deadline_at:
+                raise
+            metadata = run_information.metadata if run_information is not None else None
+            raise self._deadline_exceeded(run_id=run_id, deadline=deadline, metadata=metadata) from e
+
+    def _deadline_exceeded(
+        self,
+        run_id: str,
+        deadline: float,
+        metadata: Optional[Metadata],
+    ) -> RunDeadlineExceededError:
+        """Cancels a run whose deadline passed, unless it is known to have
+        finished, and returns the error to raise. A failure to cancel the run
+        is logged, as the run may have finished in the meantime."""
+
+        if metadata is None or metadata.status_v2 not in _TERMINAL_STATUSES:
+            try:
+                self.cancel_run(run_id=run_id)
+            except requests.HTTPError as e:
+                log(f"could not cancel run {run_id} after its deadline passed: {e}")
+
+        return RunDeadlineExceededError(run_id=run_id, deadline=deadline, metadata=metadata)
+
     def __run_result(
         self,
         run_id: str,
-        run_information: RunInformation,
+        run_information: Optional[RunInformation] = None,
     ) -> RunResult:
         """
         Get the result of a run. The result includes the run output. This is a
@@ -910,7 +1603,8 @@ class Application:
 
         Args:
             run_id: ID of the run.
-            run_information: Information of the run.
+            run_information: Information of the run, if already known. It
+                avoids guessing whether the output must be downloaded.
 
         Returns:
             Result of the run.
@@ -918,28 +1612,23 @@ class Application:
         Raises:
             requests.HTTPError: If the response status code is not 2xx.
         """
-        query_params = None
-        large_output = False
-        if run_information.metadata.output_size > _MAX_RUN_SIZE:
-            query_params = {"format": "url"}
-            large_output = True
 
-        response = self.client.request(
-            method="GET",
-            endpoint=f"{self.endpoint}/runs/{run_id}",
-            query_params=query_params,
-        )
-        result = RunResult.from_dict(response.json())
-        if not large_output:
-            return result
+        data, large_output = self.__request_result(run_id=run_id, run_information=run_information)
+        result = RunResult.from_dict(data)
+        if large_output:
+            download_url = DownloadURL.from_dict(data["output"])
+            download_response = self.client.request(
+                method="GET",
+                endpoint=download_url.url,
+                headers={"Content-Type": "application/json"},
+            )
+            result.output = serialization.loads(download_response.content)
 
-        download_url = DownloadURL.from_dict(response.json()["output"])
-        download_response = self.client.request(
-            method="GET",
-            endpoint=download_url.url,
-            headers={"Content-Type": "application/json"},
-        )
-        result.output = download_response.json()
+        if result.metadata.status_v2 in _TERMINAL_STATUSES:
+            self.__cache_set(
+                f"{self.endpoint}/runs/{run_id}",
+                CacheEntry(data=serialization.dumps(result.to_dict())),
+            )
 
         return result
 
@@ -984,12 +1673,24 @@ class Application:
         if verbose:
             log(f'💥️ Successfully pushed to application: "{self.id}".')
             log(
-                json.dumps(
+                serialization.dumps(
                     {
                         "app_id": self.id,
                         "endpoint": self.client.url,
                         "instance_url": f"{self.endpoint}/runs?instance_id=devint",
                     },
-                    indent=2,
-                )
+                    indent=True,
+                ).decode("utf-8")
             )
+
+
+def _is_stale_upload(error: requests.HTTPError) -> bool:
+    """Whether an HTTP error rejected a run because its upload is missing or
+    has expired, rather than because of another problem with the request
+    (e.g.: an instance that does not exist)."""
+
+    response = error.response
+    if response is None or response.status_code not in _STALE_UPLOAD_STATUS_CODES:
+        return False
+
+    return "upload" in response.text.lower()
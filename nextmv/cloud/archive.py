@@ -0,0 +1,438 @@
+"""This module contains a local, persistent archive of the runs of an
+application, synced incrementally and queried without reaching the Nextmv
+Cloud API."""
+
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple, Union
+
+import requests
+
+from nextmv import serialization
+from nextmv.cloud.application import _TERMINAL_STATUSES, RunInformation
+from nextmv.cloud.status import StatusV2
+
+if TYPE_CHECKING:
+    from nextmv.cloud.application import Application
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    application_id TEXT NOT NULL,
+    instance_id TEXT NOT NULL,
+    version_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    duration REAL NOT NULL,
+    input_size REAL NOT NULL,
+    output_size REAL NOT NULL,
+    terminal INTEGER NOT NULL,
+    information TEXT NOT NULL,
+    input_blob TEXT,
+    output_blob TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_status ON runs (status);
+CREATE INDEX IF NOT EXISTS runs_instance_id ON runs (instance_id, created_at);
+CREATE INDEX IF NOT EXISTS runs_version_id ON runs (version_id, created_at);
+CREATE INDEX IF NOT EXISTS runs_created_at ON runs (created_at);
+CREATE INDEX IF NOT EXISTS runs_input_size ON runs (input_size);
+CREATE INDEX IF NOT EXISTS runs_output_size ON runs (output_size);
+CREATE TABLE IF NOT EXISTS listings (
+    status TEXT PRIMARY KEY,
+    synced_at TEXT NOT NULL
+);
+"""
+"""Schema of the database of the archive. The information of a run is stored
+as JSON, and its most queried fields are copied into indexed columns. The
+listings table records the status filters, or an empty one for all the runs,
+whose every page was listed at a previous sync."""
+
+_COPY_CHUNK_SIZE: int = 1024 * 1024
+"""Size of the chunks in which files are copied into blobs."""
+
+
+@dataclass
+class SyncStats:
+    """Summary of a sync of a run archive."""
+
+    listed: int = 0
+    """Number of runs listed by the Nextmv Cloud API."""
+    refreshed: int = 0
+    """Number of unfinished runs older than the listed ones whose information
+    was requested one by one."""
+    updated: int = 0
+    """Number of runs that were new or had not finished at the previous
+    sync, whose information was stored."""
+    inputs: int = 0
+    """Number of inputs downloaded."""
+    outputs: int = 0
+    """Number of outputs downloaded."""
+
+
+class RunArchive:
+    """
+    Local, persistent archive of the runs of an application. The information
+    of the runs is kept in a SQLite database, indexed by status, instance,
+    version, creation date and input and output sizes. Inputs and outputs are
+    kept gzip-compressed in content-addressed blob files, so identical
+    contents are stored once.
+
+    The archive is synced incrementally. Runs are listed page by page, from
+    the newest, until a whole page holds runs that had already finished at a
+    previous sync. Only new runs and runs that had not finished are updated;
+    the unfinished runs older than the listed pages are requested one by one.
+    The inputs and outputs of finished runs, which do not change anymore, are
+    downloaded once. Queries are then answered locally.
+
+    The archive is meant to be used from a single thread. It can be used as a
+    context manager, which closes it on exit.
+
+    Parameters
+    ----------
+    application : Application
+        Application whose runs are archived.
+    directory : str
+        Directory where the archive is kept. It is created if it does not
+        exist.
+    include_inputs : bool, optional
+        Whether to archive the inputs of the runs. Default is False.
+    include_outputs : bool, optional
+        Whether to archive the outputs of the succeeded runs. Default is True.
+    max_workers : int, optional
+        Number of inputs and outputs downloaded concurrently. Default is 4.
+    """
+
+    def __init__(
+        self,
+        application: "Application",
+        directory: str,
+        include_inputs: bool = False,
+        include_outputs: bool = True,
+        max_workers: int = 4,
+    ):
+        self.application = application
+        self.directory = directory
+        self.include_inputs = include_inputs
+        self.include_outputs = include_outputs
+        self.max_workers = max_workers
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(directory, "runs.sqlite3"))
+        self._db.executescript(_SCHEMA)
+
+    def __enter__(self) -> "RunArchive":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the database of the archive."""
+
+        self._db.close()
+
+    def sync(self, status: Optional[StatusV2] = None) -> SyncStats:
+        """
+        Bring the archive up to date with the Nextmv Cloud. Runs that
+        finished at a previous sync are not updated again, and their inputs
+        and outputs are not downloaded again. Runs deleted from the Nextmv
+        Cloud are kept in the archive.
+
+        Args:
+            status: Only sync the runs with this status.
+
+        Returns:
+            Summary of the sync.
+
+        Raises:
+            requests.HTTPError: If a response status code is not 2xx. The
+                runs synced until then are kept.
+        """
+
+        stats = SyncStats()
+        known = {
+            run_id: (bool(terminal), input_blob, output_blob)
+            for run_id, terminal, input_blob, output_blob in self._db.execute(
+                "SELECT id, terminal, input_blob, output_blob FROM runs"
+            )
+        }
+        # Unfinished runs that are not listed because the listing stops early.
+        unfinished = [run_id for run_id, (terminal, _, _) in known.items() if not terminal]
+        listing = StatusV2(status).value if status is not None else ""
+        listed_before = self._db.execute("SELECT 1 FROM listings WHERE status IN ('', ?)", (listing,)).fetchone()
+
+        downloads: List[Tuple[str, str]] = []
+        seen: Set[str] = set()
+        for page in self.application._run_pages(status=status):
+            # Runs created while listing shift the pages, and may be listed twice.
+            page = [run for run in page if run.id not in seen]
+            stats.listed += len(page)
+            seen.update(run.id for run in page)
+            with self._db:
+                for run in page:
+                    self.__sync(run, known, stats, downloads)
+
+            # Runs are listed from the newest: past a page of runs that had
+            # already finished, the older runs were listed at a previous sync.
+            if listed_before and page and all(known.get(run.id, (False,))[0] for run in page):
+                break
+        else:
+            with self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO listings (status, synced_at) VALUES (?, ?)",
+                    (listing, _timestamp(datetime.now(timezone.utc))),
+                )
+            unfinished = []
+
+        for run_id in unfinished:
+            if run_id in seen:
+                continue
+
+            run = self.__run_information(run_id)
+            if run is not None:
+                stats.refreshed += 1
+                with self._db:
+                    self.__sync(run, known, stats, downloads)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nextmv-archive") as executor:
+            for (run_id, kind), digest in zip(downloads, executor.map(lambda d: self.__download(*d), downloads)):
+                if digest is None:
+                    continue
+
+                with self._db:
+                    self._db.execute(f"UPDATE runs SET {kind}_blob = ? WHERE id = ?", (digest, run_id))
+                if kind == "input":
+                    stats.inputs += 1
+                else:
+                    stats.outputs += 1
+
+        return stats
+
+    def runs(
+        self,
+        status: Optional[StatusV2] = None,
+        instance_id: Optional[str] = None,
+        version_id: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        limit: Optional[int] = None,
+    ) -> List[RunInformation]:
+        """
+        Query the archived runs, from the most recent to the oldest.
+
+        Args:
+            status: Only return the runs with this status.
+            instance_id: Only return the runs of this instance.
+            version_id: Only return the runs of this version.
+            created_after: Only return the runs created at or after this
+                date. Naive dates are taken as UTC.
+            created_before: Only return the runs created before this date.
+                Naive dates are taken as UTC.
+            limit: Maximum number of runs to return.
+
+        Returns:
+            The archived runs matching all the filters.
+        """
+
+        filters = {
+            "status = ?": StatusV2(status).value if status is not None else None,
+            "instance_id = ?": instance_id,
+            "version_id = ?": version_id,
+            "created_at >= ?": _timestamp(created_after) if created_after is not None else None,
+            "created_at < ?": _timestamp(created_before) if created_before is not None else None,
+        }
+        conditions = [condition for condition, value in filters.items() if value is not None]
+        sql = "SELECT information FROM runs"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY created_at DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        rows = self._db.execute(sql, [value for value in filters.values() if value is not None])
+
+        return [RunInformation.from_dict(serialization.loads(information)) for (information,) in rows]
+
+    def query(self, sql: str, parameters: Union[Tuple[Any, ...], Dict[str, Any]] = ()) -> List[Dict[str, Any]]:
+        """
+        Run a SQL query on the `runs` table of the archive, e.g.: to compute
+        aggregates. The columns are `id`, `application_id`, `instance_id`,
+        `version_id`, `status`, `created_at` (ISO 8601, in UTC), `duration`
+        (in milliseconds), `input_size`, `output_size` (in bytes) and
+        `information` (the run information as JSON).
+
+        Args:
+            sql: SQL query.
+            parameters: Parameters of the query.
+
+        Returns:
+            The rows returned by the query, as dicts keyed by column name.
+        """
+
+        cursor = self._db.execute(sql, parameters)
+        columns = [description[0] for description in cursor.description or []]
+
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def input(self, run_id: str) -> Optional[Any]:
+        """
+        Get the archived input of a run.
+
+        Args:
+            run_id: ID of the run.
+
+        Returns:
+            The input of the run, or None if it is not archived.
+        """
+
+        return self.__load(run_id, "input")
+
+    def output(self, run_id: str) -> Optional[Any]:
+        """
+        Get the archived output of a run.
+
+        Args:
+            run_id: ID of the run.
+
+        Returns:
+            The output of the run, or None if it is not archived.
+        """
+
+        return self.__load(run_id, "output")
+
+    def __sync(
+        self,
+        run: RunInformation,
+        known: Dict[str, Tuple[bool, Optional[str], Optional[str]]],
+        stats: SyncStats,
+        downloads: List[Tuple[str, str]],
+    ) -> None:
+        """Stores a run unless it had finished at a previous sync, and adds
+        the inputs and outputs it lacks to the downloads."""
+
+        terminal, input_blob, output_blob = known.get(run.id, (False, None, None))
+        if not terminal:
+            self.__store(run)
+            stats.updated += 1
+
+        if run.metadata.status_v2 not in _TERMINAL_STATUSES:
+            return
+        if self.include_inputs and input_blob is None:
+            downloads.append((run.id, "input"))
+        if self.include_outputs and output_blob is None and run.metadata.status_v2 == StatusV2.succeeded:
+            downloads.append((run.id, "output"))
+
+    def __run_information(self, run_id: str) -> Optional[RunInformation]:
+        """Requests the information of a run, or returns None if the run was
+        deleted from the Nextmv Cloud."""
+
+        try:
+            return self.application.run_metadata(run_id=run_id)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                return None
+            raise
+
+    def __store(self, run: RunInformation) -> None:
+        """Inserts or updates the information of a run, keeping its
+        archived input and output."""
+
+        metadata = run.metadata
+        self._db.execute(
+            """
+            INSERT INTO runs (
+                id, application_id, instance_id, version_id, status, created_at, duration,
+                input_size, output_size, terminal, information
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                status = excluded.status, duration = excluded.duration, input_size = excluded.input_size,
+                output_size = excluded.output_size, terminal = excluded.terminal, information = excluded.information
+            """,
+            (
+                run.id,
+                metadata.application_id,
+                metadata.application_instance_id,
+                metadata.application_version_id,
+                metadata.status_v2.value,
+                _timestamp(metadata.created_at),
+                metadata.duration,
+                metadata.input_size,
+                metadata.output_size,
+                int(metadata.status_v2 in _TERMINAL_STATUSES),
+                serialization.dumps(run.to_dict()).decode("utf-8"),
+            ),
+        )
+
+    def __download(self, run_id: str, kind: str) -> Optional[str]:
+        """Downloads the input or output of a run into a blob. Returns the
+        digest of the blob, or None if the run has no output."""
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        try:
+            if kind == "input":
+                self.application.run_input_to_file(run_id=run_id, path=tmp_path)
+            elif self.application.run_result_to_file(run_id=run_id, path=tmp_path).output_path is None:
+                return None
+
+            return self.__store_blob(tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def __store_blob(self, path: str) -> str:
+        """Compresses a file into the blob named after the digest of its
+        content, unless the blob already exists. Returns the digest."""
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(_COPY_CHUNK_SIZE), b""):
+                digest.update(chunk)
+
+        blob_path = self.__blob_path(digest.hexdigest())
+        if os.path.exists(blob_path):
+            return digest.hexdigest()
+
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(blob_path), suffix=".tmp")
+        try:
+            with open(path, "rb") as src, os.fdopen(fd, "wb") as raw, gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                shutil.copyfileobj(src, dst, _COPY_CHUNK_SIZE)
+            os.replace(tmp_path, blob_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        return digest.hexdigest()
+
+    def __load(self, run_id: str, kind: str) -> Optional[Any]:
+        """Loads the archived input or output of a run."""
+
+        row = self._db.execute(f"SELECT {kind}_blob FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+
+        with gzip.open(self.__blob_path(row[0]), "rb") as f:
+            return serialization.load(f)
+
+    def __blob_path(self, digest: str) -> str:
+        """Path of the blob with the given digest."""
+
+        return os.path.join(self.directory, "blobs", digest[:2], f"{digest}.gz")
+
+
+def _timestamp(value: datetime) -> str:
+    """ISO 8601 representation of a date in UTC, which sorts
+    chronologically. Naive dates are taken as UTC."""
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
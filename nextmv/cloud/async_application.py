@@ -0,0 +1,484 @@
+"""This module contains the asyncio application class."""
+
+import asyncio
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import requests
+
+from nextmv.base_model import BaseModel
+from nextmv.cloud.acceptance_test import AcceptanceTest, Metric
+from nextmv.cloud.application import (
+    _DEFAULT_POLLING_OPTIONS,
+    _TERMINAL_STATUSES,
+    Application,
+    Configuration,
+    PollingOptions,
+    RunDeadlineExceededError,
+    RunInformation,
+    RunLog,
+    RunResult,
+    RunResultFile,
+    UploadURL,
+)
+from nextmv.cloud.async_client import AsyncClient
+from nextmv.cloud.batch_experiment import BatchExperiment, BatchExperimentMetadata, BatchExperimentRun
+from nextmv.cloud.cache import Cache
+from nextmv.cloud.client import UploadData, _request_deadline
+from nextmv.cloud.download import DownloadedFile, RangedDownloader
+from nextmv.cloud.export import ExportFormat, ExportStats
+from nextmv.cloud.input_set import InputSet
+from nextmv.cloud.status import StatusV2
+from nextmv.cloud.upload import UploadCache
+
+
+@dataclass
+class AsyncApplication:
+    """
+    Asyncio counterpart of `Application`. Every method is a coroutine, so
+    many runs can be submitted and awaited concurrently from a single event
+    loop. Polling for results sleeps with `asyncio.sleep` instead of blocking
+    a thread per run.
+    """
+
+    client: AsyncClient
+    """Client to use for interacting with the Nextmv Cloud API."""
+    id: str
+    """ID of the application."""
+
+    default_instance_id: str = "devint"
+    """Default instance ID to use for submitting runs."""
+    cache: Optional[Cache] = None
+    """Cache for responses that do not change anymore. See
+    `Application.cache`."""
+    upload_cache: Optional[UploadCache] = None
+    """Cache of the uploads of large inputs. See `Application.upload_cache`."""
+    upload_url_pool_size: int = 0
+    """Number of upload URLs acquired ahead of time. See
+    `Application.upload_url_pool_size`."""
+    downloader: Optional[RangedDownloader] = None
+    """Downloader of large inputs and outputs in parallel ranges. See
+    `Application.downloader`."""
+
+    _application: Application = field(init=False, repr=False)
+    """Application that performs the HTTP calls."""
+
+    def __post_init__(self):
+        """Logic to run after the class is initialized."""
+
+        self._application = Application(
+            client=self.client.client,
+            id=self.id,
+            default_instance_id=self.default_instance_id,
+            cache=self.cache,
+            upload_cache=self.upload_cache,
+            upload_url_pool_size=self.upload_url_pool_size,
+            downloader=self.downloader,
+        )
+
+    async def acceptance_test(self, acceptance_test_id: str) -> AcceptanceTest:
+        """Async counterpart of `Application.acceptance_test`."""
+
+        return await self.client.call(self._application.acceptance_test, acceptance_test_id=acceptance_test_id)
+
+    async def batch_experiment(self, batch_id: str) -> BatchExperiment:
+        """Async counterpart of `Application.batch_experiment`."""
+
+        return await self.client.call(self._application.batch_experiment, batch_id=batch_id)
+
+    async def cancel_run(self, run_id: str) -> None:
+        """Async counterpart of `Application.cancel_run`."""
+
+        await self.client.call(self._application.cancel_run, run_id=run_id)
+
+    async def delete_batch_experiment(self, batch_id: str) -> None:
+        """Async counterpart of `Application.delete_batch_experiment`."""
+
+        await self.client.call(self._application.delete_batch_experiment, batch_id=batch_id)
+
+    async def delete_acceptance_test(self, acceptance_test_id: str) -> None:
+        """Async counterpart of `Application.delete_acceptance_test`."""
+
+        await self.client.call(self._application.delete_acceptance_test, acceptance_test_id=acceptance_test_id)
+
+    async def export_runs(
+        self,
+        runs: Union[Iterable[str], InputSet],
+        destination: str,
+        format: ExportFormat = ExportFormat.directory,
+        include_input: bool = True,
+        include_output: bool = True,
+        include_logs: bool = True,
+        max_workers: int = 8,
+    ) -> ExportStats:
+        """Async counterpart of `Application.export_runs`."""
+
+        return await self.client.call(
+            self._application.export_runs,
+            runs=runs,
+            destination=destination,
+            format=format,
+            include_input=include_input,
+            include_output=include_output,
+            include_logs=include_logs,
+            max_workers=max_workers,
+        )
+
+    async def input_set(self, input_set_id: str) -> InputSet:
+        """Async counterpart of `Application.input_set`."""
+
+        return await self.client.call(self._application.input_set, input_set_id=input_set_id)
+
+    async def list_acceptance_tests(self) -> List[AcceptanceTest]:
+        """Async counterpart of `Application.list_acceptance_tests`."""
+
+        return await self.client.call(self._application.list_acceptance_tests)
+
+    async def list_batch_experiments(self) -> List[BatchExperimentMetadata]:
+        """Async counterpart of `Application.list_batch_experiments`."""
+
+        return await self.client.call(self._application.list_batch_experiments)
+
+    async def list_input_sets(self) -> List[InputSet]:
+        """Async counterpart of `Application.list_input_sets`."""
+
+        return await self.client.call(self._application.list_input_sets)
+
+    async def list_runs(self, status: Optional[StatusV2] = None) -> List[RunInformation]:
+        """Async counterpart of `Application.list_runs`."""
+
+        return await self.client.call(self._application.list_runs, status=status)
+
+    async def new_acceptance_test(
+        self,
+        candidate_instance_id: str,
+        baseline_instance_id: str,
+        id: str,
+        metrics: List[Union[Metric, Dict[str, Any]]],
+        name: str,
+        input_set_id: Optional[str] = None,
+        description: Optional[str] = None,
+    ) -> AcceptanceTest:
+        """Async counterpart of `Application.new_acceptance_test`."""
+
+        return await self.client.call(
+            self._application.new_acceptance_test,
+            candidate_instance_id=candidate_instance_id,
+            baseline_instance_id=baseline_instance_id,
+            id=id,
+            metrics=metrics,
+            name=name,
+            input_set_id=input_set_id,
+            description=description,
+        )
+
+    async def new_batch_experiment(
+        self,
+        name: str,
+        input_set_id: str,
+        instance_ids: List[str] = None,
+        description: Optional[str] = None,
+        id: Optional[str] = None,
+        option_sets: Optional[Dict[str, Dict[str, str]]] = None,
+        runs: Optional[List[Union[BatchExperimentRun, Dict[str, Any]]]] = None,
+    ) -> str:
+        """Async counterpart of `Application.new_batch_experiment`."""
+
+        return await self.client.call(
+            self._application.new_batch_experiment,
+            name=name,
+            input_set_id=input_set_id,
+            instance_ids=instance_ids,
+            description=description,
+            id=id,
+            option_sets=option_sets,
+            runs=runs,
+        )
+
+    async def new_input_set(
+        self,
+        id: str,
+        name: str,
+        description: Optional[str] = None,
+        end_time: Optional[datetime] = None,
+        instance_id: Optional[str] = None,
+        maximum_runs: Optional[int] = None,
+        run_ids: Optional[List[str]] = None,
+        start_time: Optional[datetime] = None,
+    ) -> InputSet:
+        """Async counterpart of `Application.new_input_set`."""
+
+        return await self.client.call(
+            self._application.new_input_set,
+            id=id,
+            name=name,
+            description=description,
+            end_time=end_time,
+            instance_id=instance_id,
+            maximum_runs=maximum_runs,
+            run_ids=run_ids,
+            start_time=start_time,
+        )
+
+    async def new_run(
+        self,
+        input: Union[Dict[str, Any], BaseModel, UploadData] = None,
+        instance_id: Optional[str] = None,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        upload_id: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        configuration: Optional[Configuration] = None,
+    ) -> str:
+        """
+        Async counterpart of `Application.new_run`. Submit an input to start a
+        new run of the application. Returns the run_id of the submitted run.
+
+        Args:
+            input: Input to use for the run.
+            instance_id: ID of the instance to use for the run. If not
+                provided, the default_instance_id will be used.
+            name: Name of the run.
+            description: Description of the run.
+            upload_id: ID to use when running a large input.
+            options: Options to use for the run.
+            configuration: Configuration to use for the run.
+
+        Returns:
+            ID of the submitted run.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        return await self.client.call(
+            self._application.new_run,
+            input=input,
+            instance_id=instance_id,
+            name=name,
+            description=description,
+            upload_id=upload_id,
+            options=options,
+            configuration=configuration,
+        )
+
+    async def new_run_with_result(
+        self,
+        input: Union[Dict[str, Any], BaseModel, UploadData] = None,
+        instance_id: Optional[str] = None,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        upload_id: Optional[str] = None,
+        run_options: Optional[Dict[str, Any]] = None,
+        polling_options: PollingOptions = _DEFAULT_POLLING_OPTIONS,
+        configuration: Optional[Configuration] = None,
+        deadline: Optional[float] = None,
+    ) -> RunResult:
+        """
+        Async counterpart of `Application.new_run_with_result`. Submit an
+        input to start a new run of the application and await the result.
+        With a `deadline`, the run is cancelled if it does not finish in time.
+
+        Args:
+            input: Input to use for the run.
+            instance_id: ID of the instance to use for the run. If not
+                provided, the default_instance_id will be used.
+            name: Name of the run.
+            description: Description of the run.
+            upload_id: ID to use when running a large input.
+            run_options: Options to use for the run.
+            polling_options: Options to use when polling for the run result.
+            configuration: Configuration to use for the run.
+            deadline: Time, in seconds, within which the result of the run
+                must be obtained. If not provided, only the polling strategy
+                bounds the wait.
+
+        Returns:
+            Result of the run.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+            RunDeadlineExceededError: If the deadline passes before the result
+                of the run is obtained. It carries the ID and the last known
+                metadata of the run.
+            TimeoutError: If the run does not succeed after the polling
+                strategy is exhausted based on time duration.
+            RuntimeError: If the run does not succeed after the polling
+                strategy is exhausted based on number of tries.
+        """
+
+        run_kwargs = {
+            "input": input,
+            "instance_id": instance_id,
+            "name": name,
+            "description": description,
+            "upload_id": upload_id,
+            "options": run_options,
+            "configuration": configuration,
+        }
+        if deadline is not None:
+            return await self.__new_run_before_deadline(
+                run_kwargs=run_kwargs,
+                polling_options=polling_options,
+                deadline=deadline,
+            )
+
+        run_id = await self.new_run(**run_kwargs)
+
+        return await self.run_result_with_polling(
+            run_id=run_id,
+            polling_options=polling_options,
+        )
+
+    async def run_input(self, run_id: str) -> Dict[str, Any]:
+        """Async counterpart of `Application.run_input`."""
+
+        return await self.client.call(self._application.run_input, run_id=run_id)
+
+    async def run_input_to_file(
+        self,
+        run_id: str,
+        path: Union[str, os.PathLike],
+        decompress: bool = True,
+    ) -> DownloadedFile:
+        """Async counterpart of `Application.run_input_to_file`."""
+
+        return await self.client.call(
+            self._application.run_input_to_file,
+            run_id=run_id,
+            path=path,
+            decompress=decompress,
+        )
+
+    async def run_logs(self, run_id: str) -> RunLog:
+        """Async counterpart of `Application.run_logs`."""
+
+        return await self.client.call(self._application.run_logs, run_id=run_id)
+
+    async def run_metadata(self, run_id: str) -> RunInformation:
+        """Async counterpart of `Application.run_metadata`."""
+
+        return await self.client.call(self._application.run_metadata, run_id=run_id)
+
+    async def run_result(self, run_id: str) -> RunResult:
+        """Async counterpart of `Application.run_result`."""
+
+        return await self.client.call(self._application.run_result, run_id=run_id)
+
+    async def run_result_to_file(
+        self,
+        run_id: str,
+        path: Union[str, os.PathLike],
+        decompress: bool = True,
+    ) -> RunResultFile:
+        """Async counterpart of `Application.run_result_to_file`."""
+
+        return await self.client.call(
+            self._application.run_result_to_file,
+            run_id=run_id,
+            path=path,
+            decompress=decompress,
+        )
+
+    async def run_result_with_polling(
+        self,
+        run_id: str,
+        polling_options: PollingOptions = _DEFAULT_POLLING_OPTIONS,
+    ) -> RunResult:
+        """
+        Async counterpart of `Application.run_result_with_polling`. Get the
+        result of a run, polling until the run finishes executing or the
+        polling strategy is exhausted. Waiting between polls does not block
+        the event loop nor a thread.
+
+        Args:
+            run_id: ID of the run.
+            polling_options: Options to use when polling for the run result.
+
+        Returns:
+            Result of the run.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+            TimeoutError: If the run does not succeed after the polling
+                strategy is exhausted based on time duration.
+            RuntimeError: If the run does not succeed after the polling
+                strategy is exhausted based on number of tries.
+        """
+
+        schedule = polling_options.schedule(run_id=run_id)
+        await asyncio.sleep(schedule.first_delay())
+        run_information = await self.run_metadata(run_id=run_id)
+        while run_information.metadata.status_v2 not in _TERMINAL_STATUSES:
+            await asyncio.sleep(schedule.next_delay(run_information.metadata))
+            run_information = await self.run_metadata(run_id=run_id)
+
+        schedule.finished(run_information.metadata)
+
+        return await self.client.call(self._application._run_result, run_id=run_id, run_information=run_information)
+
+    async def upload_large_input(
+        self,
+        input: UploadData,
+        upload_url: UploadURL,
+    ) -> None:
+        """Async counterpart of `Application.upload_large_input`."""
+
+        await self.client.call(self._application.upload_large_input, input=input, upload_url=upload_url)
+
+    async def upload_url(self) -> UploadURL:
+        """Async counterpart of `Application.upload_url`."""
+
+        return await self.client.call(self._application.upload_url)
+
+    async def __new_run_before_deadline(
+        self,
+        run_kwargs: Dict[str, Any],
+        polling_options: PollingOptions,
+        deadline: float,
+    ) -> RunResult:
+        """Submits a run and awaits its result until a deadline, cancelling
+        the run if the deadline passes before it finishes. See
+        `Application.new_run_with_result`."""
+
+        deadline_at = time.monotonic() + deadline
+        try:
+            with _request_deadline(deadline_at):
+                run_id = await self.new_run(**run_kwargs)
+        except requests.Timeout as e:
+            if time.monotonic() < deadline_at:
+                raise
+            raise RunDeadlineExceededError(run_id=None, deadline=deadline) from e
+
+        schedule = polling_options.schedule(run_id=run_id)
+        delay = schedule.first_delay()
+        run_information: Optional[RunInformation] = None
+        try:
+            with _request_deadline(deadline_at):
+                while True:
+                    # Past the deadline, the next request raises a timeout.
+                    await asyncio.sleep(max(min(delay, deadline_at - time.monotonic()), 0))
+                    run_information = await self.run_metadata(run_id=run_id)
+                    if run_information.metadata.status_v2 in _TERMINAL_STATUSES:
+                        break
+
+                    delay = schedule.next_delay(run_information.metadata)
+
+                schedule.finished(run_information.metadata)
+
+                return await self.client.call(
+                    self._application._run_result, run_id=run_id, run_information=run_information
+                )
+        except requests.Timeout as e:
+            if time.monotonic() < deadline_at:
+                raise
+            metadata = run_information.metadata if run_information is not None else None
+            raise await self.client.call(
+                self._application._deadline_exceeded,
+                run_id=run_id,
+                deadline=deadline,
+                metadata=metadata,
+            ) from e
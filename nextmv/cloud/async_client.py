@@ -0,0 +1,133 @@
+"""Module with the asyncio client class."""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, TypeVar, Union
+
+import requests
+
+from nextmv.cloud.client import Client, EncodedPayload, UploadData
+
+T = TypeVar("T")
+
+
+@dataclass
+class AsyncClient:
+    """
+    Client that interacts with the Nextmv Cloud API from an asyncio event
+    loop. It shares the pooled sessions of the given `Client`: HTTP calls are
+    dispatched to a bounded set of workers, while every wait (for example,
+    between polls of a run) is a non-blocking `asyncio.sleep`. Thousands of
+    runs can be awaited concurrently while using at most `max_workers`
+    threads. Set `Client.pool_maxsize` to `max_workers` so that every worker
+    can keep its connection alive.
+    """
+
+    client: Client
+    """Client used for the HTTP calls to the Nextmv Cloud API."""
+    max_workers: int = 10
+    """Maximum number of HTTP calls in flight at the same time."""
+
+    _executor: ThreadPoolExecutor = field(init=False, repr=False)
+    """Workers that perform the HTTP calls."""
+
+    def __post_init__(self):
+        """Logic to run after the class is initialized."""
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="nextmv-async",
+        )
+
+    async def call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Run a blocking function that performs HTTP calls without blocking the
+        event loop.
+
+        Args:
+            fn: Function to run.
+            *args: Positional arguments for the function.
+            **kwargs: Keyword arguments for the function.
+
+        Returns:
+            Result of the function.
+        """
+
+        loop = asyncio.get_running_loop()
+        # The context is copied, like `asyncio.to_thread` does, so that the
+        # deadline of the requests applies in the thread.
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        data: Optional[Any] = None,
+        headers: Optional[Dict[str, str]] = None,
+        payload: Optional[Union[Dict[str, Any], EncodedPayload]] = None,
+        query_params: Optional[Dict[str, Any]] = None,
+    ) -> requests.Response:
+        """
+        Async counterpart of `Client.request`.
+
+        Args:
+            method: HTTP method to use.
+            endpoint: Endpoint to send the request to.
+            data: Data to send with the request.
+            headers: Headers to send with the request.
+            payload: Payload to send with the request.
+            query_params: Query parameters to send with the request.
+
+        Returns:
+            Response from the Nextmv Cloud API.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        return await self.call(
+            self.client.request,
+            method=method,
+            endpoint=endpoint,
+            data=data,
+            headers=headers,
+            payload=payload,
+            query_params=query_params,
+        )
+
+    async def upload_to_presigned_url(
+        self,
+        data: UploadData,
+        url: str,
+    ) -> None:
+        """
+        Async counterpart of `Client.upload_to_presigned_url`.
+
+        Args:
+            data: data to upload.
+            url: URL to upload the data to.
+        """
+
+        await self.call(self.client.upload_to_presigned_url, data=data, url=url)
+
+    async def close(self) -> None:
+        """Close the client, waiting for the HTTP calls in flight and
+        releasing the pooled connections."""
+
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.client.close()
+
+    async def __aenter__(self) -> "AsyncClient":
+        """Use the client as an async context manager that closes it on
+        exit."""
+
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        """Close the client when exiting the async context manager."""
+
+        await self.close()
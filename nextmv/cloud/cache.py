@@ -0,0 +1,294 @@
+"""This module contains caches for responses of the Nextmv Cloud API that do
+not change once they are final, such as the results of finished runs."""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+
+@dataclass
+class CacheEntry:
+    """A cached response."""
+
+    data: bytes
+    """Body of the response."""
+    etag: Optional[str] = None
+    """ETag of the response, if the server provided one. It is used to
+    revalidate the entry."""
+
+    @property
+    def size(self) -> int:
+        """Size of the entry, in bytes."""
+
+        return len(self.data)
+
+
+class Cache:
+    """Base class for caches of responses. Keys are the URLs of the cached
+    resources."""
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        """
+        Get an entry from the cache. This method should be implemented by
+        subclasses.
+
+        Args:
+            key: Key of the entry.
+
+        Returns:
+            The entry, or None if it is not cached.
+        """
+
+        raise NotImplementedError
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        """
+        Store an entry in the cache. This method should be implemented by
+        subclasses.
+
+        Args:
+            key: Key of the entry.
+            entry: Entry to store.
+        """
+
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """
+        Remove an entry from the cache, if present. This method should be
+        implemented by subclasses.
+
+        Args:
+            key: Key of the entry.
+        """
+
+        raise NotImplementedError
+
+
+class MemoryCache(Cache):
+    """
+    In-memory, thread-safe, least-recently-used cache bounded by the total
+    size of the entries, in bytes. Entries larger than the bound are not
+    stored.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Maximum total size of the entries. Default is 64 MiB.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total size of the entries, in bytes."""
+
+        return self._size
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+            return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.size
+
+            self._entries[key] = entry
+            self._size += entry.size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry.size
+
+
+class DiskCache(Cache):
+    """
+    On-disk cache bounded by the total size of the entries, in bytes. It can
+    be shared by several processes: entries are written to a temporary file
+    and atomically moved into place, and readers never observe partial
+    entries. Reading an entry refreshes its modification time, and the least
+    recently used entries are evicted first.
+
+    Parameters
+    ----------
+    directory : str
+        Directory where the entries are stored. It is created if it does not
+        exist.
+    max_bytes : int, optional
+        Maximum total size of the entries. Default is 1 GiB.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._size = self._scan_size()
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Total size of the entries, in bytes, as last seen by this
+        process."""
+
+        return self._size
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                data = f.read()
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        if header.get("key") != key:
+            return None
+
+        return CacheEntry(data=data, etag=header.get("etag"))
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        if entry.size > self.max_bytes:
+            return
+
+        header = json.dumps({"key": key, "etag": entry.etag}).encode("utf-8") + b"\n"
+        path = self._path(key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(header)
+                f.write(entry.data)
+            previous_size = _file_size(path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._size += len(header) + entry.size - previous_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def delete(self, key: str) -> None:
+        path = self._path(key)
+        size = _file_size(path)
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return
+
+        with self._lock:
+            self._size -= size
+
+    def _path(self, key: str) -> str:
+        """Path of the file holding the entry with the given key."""
+
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    def _scan_size(self) -> int:
+        """Total size of the entries currently on disk."""
+
+        return sum(size for _, size, _ in self._scan())
+
+    def _scan(self) -> List[Tuple[float, int, str]]:
+        """Modification time, size and path of the entries currently on
+        disk. Entries being written are skipped."""
+
+        files = []
+        with os.scandir(self.directory) as it:
+            for file in it:
+                if not file.is_file() or file.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = file.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, file.path))
+
+        return files
+
+    def _evict(self) -> None:
+        """Removes the least recently used entries until the total size is
+        within bounds. Other processes may be writing and evicting entries at
+        the same time, so the directory is scanned again."""
+
+        files = self._scan()
+        self._size = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+
+class TieredCache(Cache):
+    """
+    Two-tier cache: a fast in-memory tier in front of a larger on-disk tier.
+    Entries found only on disk are promoted to memory.
+
+    Parameters
+    ----------
+    memory : MemoryCache
+        In-memory tier.
+    disk : DiskCache
+        On-disk tier.
+    """
+
+    def __init__(self, memory: MemoryCache, disk: DiskCache):
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self.memory.get(key)
+        if entry is not None:
+            return entry
+
+        entry = self.disk.get(key)
+        if entry is not None:
+            self.memory.set(key, entry)
+
+        return entry
+
+    def set(self, key: str, entry: CacheEntry) -> None:
+        self.memory.set(key, entry)
+        self.disk.set(key, entry)
+
+    def delete(self, key: str) -> None:
+        self.memory.delete(key)
+        self.disk.delete(key)
+
+
+def _file_size(path: str) -> int:
+    """Size of a file, or 0 if it does not exist."""
+
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
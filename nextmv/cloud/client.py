@@ -1,18 +1,123 @@
 """Module with the client class."""
 
-import json
+import collections.abc
+import contextlib
+import contextvars
+import gzip
+import itertools
 import os
+import tempfile
+import threading
+import time
+import zlib
 from dataclasses import dataclass, field
-from typing import IO, Any, Dict, List, Optional, Union
-from urllib.parse import urljoin
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urljoin, urlparse
 
 import requests
-import yaml
 from requests.adapters import HTTPAdapter, Retry
 
+from nextmv import serialization
+from nextmv.cloud import _io
+from nextmv.cloud.metrics import RequestHook, RequestRecord, endpoint_template
+from nextmv.cloud.rate_limit import THROTTLE_STATUS_CODES, RateLimiter, classify
+
 _MAX_LAMBDA_PAYLOAD_SIZE: int = 500 * 1024 * 1024
 """Maximum size of the payload handled by the Nextmv Cloud API."""
 
+_COMPRESSION_SPOOL_SIZE: int = 8 * 1024 * 1024
+"""Size up to which streamed uploads are compressed in memory before spilling
+to a temporary file."""
+
+_DEADLINE: contextvars.ContextVar = contextvars.ContextVar("nextmv_request_deadline", default=None)
+"""Monotonic time before which the requests made in the current context must
+complete, if any. See `_request_deadline`."""
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """
+    Payload that has been serialized exactly once to UTF-8 encoded bytes. It
+    carries its own size, so it can go through size checks, the decision of
+    uploading it to a presigned URL, and the HTTP request itself, without
+    being encoded again.
+    """
+
+    data: bytes
+    """Serialized payload."""
+    content_type: str = "application/json"
+    """Content type of the serialized payload."""
+
+    @classmethod
+    def from_object(cls, obj: Union[Dict[str, Any], List[Any], str, bytes]) -> "EncodedPayload":
+        """
+        Serializes an object. Dictionaries and lists are encoded as compact
+        JSON, strings are encoded as UTF-8 text and bytes are used as they
+        are.
+
+        Args:
+            obj: Object to serialize.
+
+        Returns:
+            The encoded payload.
+
+        Raises:
+            TypeError: If the object cannot be serialized.
+        """
+
+        if isinstance(obj, EncodedPayload):
+            return obj
+
+        if isinstance(obj, (dict, list)):
+            return cls(data=serialization.dumps(obj))
+
+        if isinstance(obj, str):
+            return cls(data=obj.encode("utf-8"), content_type="text/plain")
+
+        if isinstance(obj, (bytes, bytearray)):
+            return cls(data=bytes(obj), content_type="application/octet-stream")
+
+        raise TypeError(f"unsupported payload type: {type(obj)}")
+
+    @property
+    def size(self) -> int:
+        """Size of the serialized payload, in bytes."""
+
+        return len(self.data)
+
+    def embed(self, key: str, value: "EncodedPayload") -> "EncodedPayload":
+        """
+        Returns a new JSON object payload that has the given, already encoded,
+        value under the given key, in addition to the fields of this payload.
+        The value is spliced in as it is, instead of being decoded and encoded
+        again.
+
+        Args:
+            key: Key under which the value is embedded.
+            value: Encoded JSON value to embed.
+
+        Returns:
+            The new encoded payload.
+
+        Raises:
+            ValueError: If this payload is not a JSON object.
+        """
+
+        if not self.data.startswith(b"{") or not self.data.endswith(b"}"):
+            raise ValueError("can only embed values into a JSON object payload")
+
+        rest = self.data[1:]
+        separator = b"" if rest == b"}" else b","
+        encoded_key = serialization.dumps(key)
+
+        return EncodedPayload(data=b"{" + encoded_key + b":" + value.data + separator + rest)
+
+
+UploadData = Union[Dict[str, Any], str, bytes, EncodedPayload, os.PathLike, IO[bytes], Iterator[bytes]]
+"""Data that can be uploaded to a presigned URL. Paths, binary file objects
+and iterators of byte chunks are streamed instead of being loaded into
+memory."""
+
 
 @dataclass
 class Client:
@@ -40,6 +145,16 @@ class Client:
     backoff_max: float = 60
     """Maximum backoff time to use for requests to the Nextmv Cloud API, in
     seconds."""
+    compression: bool = False
+    """Whether to gzip-compress the payloads sent to the Nextmv Cloud API and
+    the data uploaded to presigned URLs. Bodies are sent with a
+    `Content-Encoding: gzip` header."""
+    compression_level: int = 6
+    """Compression level, from 1 (fastest) to 9 (smallest), used when
+    compression is enabled."""
+    compression_threshold: int = 1024
+    """Size, in bytes, below which bodies are sent uncompressed even when
+    compression is enabled."""
     configuration_file: str = "~/.nextmv/config.yaml"
     """Path to the configuration file used by the Nextmv CLI."""
     headers: Optional[Dict[str, str]] = None
@@ -47,15 +162,45 @@ class Client:
     max_retries: int = 10
     """Maximum number of retries to use for requests to the Nextmv Cloud
     API."""
+    pool_connections: int = 10
+    """Number of hosts for which connection pools are cached, for each of the
+    sessions held by the client."""
+    pool_maxsize: int = 10
+    """Maximum number of keep-alive connections to the Nextmv Cloud API host.
+    Set this to the number of threads that share the client."""
+    rate_limiter: Optional[RateLimiter] = None
+    """Rate limiter that paces the requests made with the client. It can be
+    shared by several clients and threads. When set, throttled responses
+    (429 and 503) are retried by the client, after the pause imposed by the
+    limiter, instead of by each connection independently."""
+    request_hooks: List[RequestHook] = field(default_factory=list)
+    """Callbacks invoked with a `RequestRecord` for every HTTP request made
+    with the client, including uploads to and downloads from presigned URLs.
+    A `MetricsRegistry` can be used as a hook. Records are not built when
+    there are no hooks."""
     status_forcelist: List[int] = field(
         default_factory=lambda: [429, 500, 502, 503, 504, 507, 509],
     )
     """Status codes to retry for requests to the Nextmv Cloud API."""
+    storage_pool_maxsize: int = 10
+    """Maximum number of keep-alive connections per presigned-storage host,
+    used for uploading and downloading large inputs and outputs."""
     timeout: float = 20
     """Timeout to use for requests to the Nextmv Cloud API."""
     url: str = "https://api.cloud.nextmv.io"
     """URL of the Nextmv Cloud API."""
 
+    _session: Optional[requests.Session] = field(default=None, init=False, repr=False)
+    """Pooled session used for requests to the Nextmv Cloud API host."""
+    _storage_session: Optional[requests.Session] = field(default=None, init=False, repr=False)
+    """Pooled session used for requests to presigned-storage hosts."""
+    _single_attempt_sessions: Dict[bool, requests.Session] = field(default_factory=dict, init=False, repr=False)
+    """Pooled sessions that never retry, keyed by whether they are used for
+    the Nextmv Cloud API host. They send the bodies that cannot be sent
+    again."""
+    _session_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    """Lock guarding the lazy creation of the sessions."""
+
     def __post_init__(self):
         """Logic to run after the class is initialized."""
 
@@ -78,6 +223,8 @@ class Client:
                 "no API key set in constructor or NEXTMV_API_KEY env var, and ~/.nextmv/config.yaml does not exist"
             )
 
+        import yaml
+
         with open(config_path) as f:
             config = yaml.safe_load(f)
 
@@ -105,7 +252,7 @@ class Client:
         endpoint: str,
         data: Optional[Any] = None,
         headers: Optional[Dict[str, str]] = None,
-        payload: Optional[Dict[str, Any]] = None,
+        payload: Optional[Union[Dict[str, Any], EncodedPayload]] = None,
         query_params: Optional[Dict[str, Any]] = None,
     ) -> requests.Response:
         """
@@ -117,7 +264,8 @@ class Client:
             data: Data to send with the request.
             headers: Headers to send with the request.
             payload: Payload to send with the request. Prefer using this over
-                data.
+                data. It can be given already encoded, in which case it is
+                sent without being serialized again.
             query_params: Query parameters to send with the request.
 
         Returns:
@@ -133,100 +281,445 @@ class Client:
         if payload is not None and data is not None:
             raise ValueError("cannot use both data and payload")
 
-        if payload is not None and get_size(payload) > _MAX_LAMBDA_PAYLOAD_SIZE:
-            raise ValueError(
-                f"payload size of {get_size(payload)} bytes exceeds the maximum "
-                f"allowed size of {_MAX_LAMBDA_PAYLOAD_SIZE} bytes"
-            )
-
-        if data is not None and get_size(data) > _MAX_LAMBDA_PAYLOAD_SIZE:
-            raise ValueError(
-                f"data size of {get_size(data)} bytes exceeds the maximum "
-                f"allowed size of {_MAX_LAMBDA_PAYLOAD_SIZE} bytes"
-            )
+        if payload is not None:
+            payload = EncodedPayload.from_object(payload)
 
-        session = requests.Session()
-        retries = Retry(
-            total=self.max_retries,
-            backoff_factor=self.backoff_factor,
-            backoff_jitter=self.backoff_jitter,
-            backoff_max=self.backoff_max,
-            status_forcelist=self.status_forcelist,
-            allowed_methods=self.allowed_methods,
-        )
-        adapter = HTTPAdapter(max_retries=retries)
-        session.mount("https://", adapter)
+        _validate_size(payload=payload, data=data)
 
+        url = urljoin(self.url, endpoint)
         kwargs = {
-            "url": urljoin(self.url, endpoint),
+            "url": url,
             "timeout": self.timeout,
         }
         kwargs["headers"] = headers if headers is not None else self.headers
         if data is not None:
             kwargs["data"] = data
         if payload is not None:
-            kwargs["json"] = payload
+            kwargs["data"], kwargs["headers"] = self.__payload_body(payload=payload, headers=kwargs["headers"])
         if query_params is not None:
             kwargs["params"] = query_params
 
-        response = session.request(method=method, **kwargs)
+        response = self._send(method=method, **kwargs)
 
         try:
             response.raise_for_status()
         except requests.HTTPError as e:
             raise requests.HTTPError(
-                f"request to {endpoint} failed with status code {response.status_code} and message: {response.text}"
+                f"request to {endpoint} failed with status code {response.status_code} and message: {response.text}",
+                response=response,
             ) from e
 
         return response
 
     def upload_to_presigned_url(
         self,
-        data: Union[Dict[str, Any], str],
+        data: UploadData,
         url: str,
     ) -> None:
         """
         Method to upload data to a presigned URL of the Nextmv Cloud API.
+
+        If the connection drops or the storage responds with a status code
+        to retry, the upload is sent again from the start, without
+        serializing the data again, as long as the body can be rewound:
+        encoded data, paths, seekable file objects and compressed streams.
+        Iterators cannot be rewound, so their uploads are not retried.
+
         Args:
-            data: data to upload.
+            data: data to upload. It can be given already encoded, in which
+                case it is uploaded without being serialized again. A path
+                (`os.PathLike`), a binary file object or an iterator of byte
+                chunks is streamed in bounded memory. Iterators are sent with
+                chunked transfer encoding. When compression is enabled,
+                streamed data is compressed on the fly into a temporary
+                buffer that spills to disk.
             url: URL to upload the data to.
         """
 
-        upload_data = None
-        if isinstance(data, Dict):
-            upload_data = json.dumps(data, separators=(",", ":"))
-        elif isinstance(data, str):
-            upload_data = data
-        else:
-            raise ValueError("data must be a dictionary or a string")
+        if isinstance(data, os.PathLike):
+            with open(data, "rb") as f:
+                if self._compresses(os.path.getsize(data)):
+                    self.__put_compressed(url=url, chunks=_io.read_chunks(f))
+                else:
+                    self.__put(url=url, data=f)
+            return
 
-        session = requests.Session()
-        retries = Retry(
-            total=self.max_retries,
-            backoff_factor=self.backoff_factor,
-            backoff_jitter=self.backoff_jitter,
-            backoff_max=self.backoff_max,
-            status_forcelist=self.status_forcelist,
-            allowed_methods=self.allowed_methods,
-        )
-        adapter = HTTPAdapter(max_retries=retries)
-        session.mount("https://", adapter)
-        kwargs = {
-            "url": url,
-            "timeout": self.timeout,
-            "data": upload_data,
-        }
+        if _is_stream(data):
+            if not self.compression:
+                self.__put(url=url, data=data)
+                return
+
+            chunks = _io.read_chunks(data) if hasattr(data, "read") else data
+            self.__put_compressed(url=url, chunks=chunks)
+            return
+
+        if not isinstance(data, (dict, str, bytes, EncodedPayload)):
+            raise ValueError(
+                "data must be a dictionary, a string, bytes, an encoded payload, "
+                "a path, a binary file object or an iterator of bytes"
+            )
+
+        body = EncodedPayload.from_object(data).data
+        if self._compresses(len(body)):
+            body = gzip.compress(body, compresslevel=self.compression_level)
+            self.__put(url=url, data=body, headers={"Content-Encoding": "gzip"})
+            return
+
+        self.__put(url=url, data=body)
+
+    def download_from_presigned_url(
+        self,
+        url: str,
+        path: Union[str, os.PathLike],
+        decompress: bool = True,
+    ) -> int:
+        """
+        Method to download the content of a presigned URL of the Nextmv Cloud
+        API to a local file. The body is streamed to disk in chunks, so memory
+        usage is constant regardless of the size of the content. The file is
+        written to a temporary location next to `path` and moved into place
+        once the download is complete.
+
+        Args:
+            url: URL to download the content from.
+            path: Path of the file to write the content to.
+            decompress: Whether to decode a compressed body while writing it.
+                Bodies are decoded on the fly when indicated by the
+                Content-Encoding header, or when the stored content is itself
+                gzip-compressed.
+
+        Returns:
+            Number of bytes written to the file.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        start_time, started = time.time(), time.perf_counter()
+        with self._send(method="GET", url=url, timeout=self.timeout, stream=True) as response:
+            try:
+                response.raise_for_status()
+            except requests.HTTPError as e:
+                raise requests.HTTPError(
+                    f"download from presigned URL {url} failed with "
+                    + f"status code {response.status_code} and message: {response.text}",
+                    response=response,
+                ) from e
+
+            chunks = response.raw.stream(_io.CHUNK_SIZE, decode_content=decompress)
+            if decompress:
+                chunks = _io.gunzip_chunks(chunks)
+
+            written = _io.write_chunks(path=path, chunks=chunks)
+            if self.request_hooks:
+                self._observe(
+                    method="GET",
+                    url=url,
+                    start_time=start_time,
+                    latency=time.perf_counter() - started,
+                    response=response,
+                )
+
+            return written
+
+    def close(self) -> None:
+        """
+        Close the pooled sessions held by the client, releasing all the
+        keep-alive connections. The client can still be used after closing it,
+        in which case new sessions are created on demand.
+        """
+
+        with self._session_lock:
+            for session in (self._session, self._storage_session, *self._single_attempt_sessions.values()):
+                if session is not None:
+                    session.close()
+
+            self._session = None
+            self._storage_session = None
+            self._single_attempt_sessions.clear()
+
+    def __enter__(self) -> "Client":
+        """Use the client as a context manager that closes it on exit."""
 
-        response = session.put(**kwargs)
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Close the client when exiting the context manager."""
+
+        self.close()
+
+    def __put(
+        self,
+        url: str,
+        data: Union[bytes, IO[bytes], Iterator[bytes]],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Uploads the body to a presigned URL with a PUT request."""
+
+        response = self._send(method="PUT", url=url, data=data, headers=headers, timeout=self.timeout)
 
         try:
             response.raise_for_status()
         except requests.HTTPError as e:
             raise requests.HTTPError(
                 f"upload to presigned URL {url} failed with "
-                + f"status code {response.status_code} and message: {response.text}"
+                + f"status code {response.status_code} and message: {response.text}",
+                response=response,
             ) from e
 
+    def __payload_body(
+        self,
+        payload: EncodedPayload,
+        headers: Optional[Dict[str, str]],
+    ) -> Tuple[bytes, Dict[str, str]]:
+        """Returns the body and headers used to send an encoded payload,
+        compressing the body when applicable."""
+
+        request_headers = dict(headers or {})
+        request_headers.setdefault("Content-Type", payload.content_type)
+        body = payload.data
+        if self._compresses(len(body)):
+            body = gzip.compress(body, compresslevel=self.compression_level)
+            request_headers["Content-Encoding"] = "gzip"
+
+        return body, request_headers
+
+    def __put_compressed(self, url: str, chunks: Iterator[bytes]) -> None:
+        """Compresses the chunks on the fly and uploads them to a presigned
+        URL. The compressed body is buffered in memory up to a limit and then
+        spills to a temporary file, so its length is known when uploading."""
+
+        with tempfile.SpooledTemporaryFile(max_size=_COMPRESSION_SPOOL_SIZE) as buffer:
+            compressor = zlib.compressobj(self.compression_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            for chunk in chunks:
+                buffer.write(compressor.compress(chunk))
+            buffer.write(compressor.flush())
+            buffer.seek(0)
+
+            self.__put(url=url, data=buffer, headers={"Content-Encoding": "gzip"})
+
+    def _compresses(self, size: int) -> bool:
+        """Whether a body of the given size is compressed before sending
+        it."""
+
+        return self.compression and size >= self.compression_threshold
+
+    def _send(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Sends a request with the pooled session for the URL. When a rate
+        limiter is set, the request waits for its turn, and throttled
+        responses are retried once the pause imposed by the limiter is over,
+        as long as the body can be sent again. Bodies given as iterators are
+        consumed by the first attempt, so they are never retried: they are
+        sent with a session that does not retry either, as a retry would
+        send an empty or truncated body.
+        """
+
+        deadline_at = _DEADLINE.get()
+        if deadline_at is not None:
+            return self.__send_before_deadline(deadline_at, method=method, url=url, **kwargs)
+
+        body = kwargs.get("data")
+        position = _tell(body)
+        session = self._session_for(url, retries=_rewind(body, position))
+        if self.rate_limiter is None:
+            return self._perform(session, method=method, url=url, **kwargs)
+
+        for attempt in range(self.max_retries + 1):
+            response = self.__perform_limited(session, method=method, url=url, **kwargs)
+            if not self._retries_throttled(response, attempt) or not _rewind(body, position):
+                return response
+
+            response.close()
+
+        return response
+
+    def __send_before_deadline(self, deadline_at: float, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Sends a request that must complete before a deadline, given as a
+        monotonic time. Every attempt uses a session that does not retry and
+        a timeout capped to the time left. Dropped connections and responses
+        with a status code to retry are retried by the client, at most
+        `max_retries` times, while time is left and the body can be sent
+        again."""
+
+        session = self._session_for(url, retries=False)
+        body = kwargs.get("data")
+        position = _tell(body)
+        timeout = kwargs.pop("timeout", self.timeout)
+        for attempt in itertools.count():
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise requests.Timeout(f"deadline passed before the request to {url.split('?')[0]} completed")
+
+            retryable = method.upper() in self.allowed_methods and attempt < self.max_retries
+            try:
+                response = self.__perform_limited(
+                    session, method=method, url=url, timeout=min(timeout, remaining), **kwargs
+                )
+            except requests.ConnectionError:
+                # A dropped connection is retried as well, sending the body
+                # again from the start.
+                if not retryable or not _rewind(body, position):
+                    raise
+            else:
+                if response.status_code not in self.status_forcelist or not retryable or not _rewind(body, position):
+                    return response
+
+                response.close()
+
+            backoff = min(self.backoff_factor * 2**attempt, self.backoff_max)
+            time.sleep(max(min(backoff, deadline_at - time.monotonic()), 0))
+
+    def __perform_limited(self, session: requests.Session, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Performs a single request, waiting for its turn when a rate limiter
+        is set."""
+
+        if self.rate_limiter is None:
+            return self._perform(session, method=method, url=url, **kwargs)
+
+        endpoint_class = classify(method=method, url=url, api_url=self.url)
+        admitted_at = self.rate_limiter.acquire(endpoint_class)
+        response = None
+        try:
+            response = self._perform(session, method=method, url=url, **kwargs)
+        finally:
+            self.rate_limiter.release(endpoint_class, admitted_at, *_throttle_info(response))
+
+        return response
+
+    def _perform(self, session: requests.Session, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Performs a single request with the session and reports it to the
+        request hooks. Successful streamed responses are reported by the
+        caller, once the body has been read."""
+
+        if not self.request_hooks:
+            return session.request(method=method, url=url, **kwargs)
+
+        sent = None
+        if isinstance(kwargs.get("data"), collections.abc.Iterator):
+            sent = [0]
+            kwargs["data"] = _count_chunks(kwargs["data"], sent)
+
+        start_time, started = time.time(), time.perf_counter()
+        try:
+            response = session.request(method=method, url=url, **kwargs)
+        except Exception as e:
+            self._observe(method, url, start_time, time.perf_counter() - started, error=type(e).__name__)
+            raise
+
+        if not kwargs.get("stream") or not response.ok:
+            latency = time.perf_counter() - started
+            self._observe(method, url, start_time, latency, response=response, bytes_sent=sent and sent[0])
+
+        return response
+
+    def _observe(
+        self,
+        method: str,
+        url: str,
+        start_time: float,
+        latency: float,
+        response: Optional[requests.Response] = None,
+        error: Optional[str] = None,
+        bytes_sent: Optional[int] = None,
+    ) -> None:
+        """Builds the record of a request and invokes the request hooks with
+        it."""
+
+        record = RequestRecord(
+            method=method.upper(),
+            endpoint=endpoint_template(url=url, api_url=self.url),
+            url=url.split("?")[0],
+            start_time=start_time,
+            latency=latency,
+            error=error,
+        )
+        if response is not None:
+            record.status_code = response.status_code
+            record.bytes_sent = bytes_sent if bytes_sent is not None else _content_length(response.request)
+            record.bytes_received = _bytes_received(response)
+            retries = getattr(response.raw, "retries", None)
+            record.retries = len(retries.history) if retries is not None else 0
+
+        for hook in self.request_hooks:
+            hook(record)
+
+    def _retries_throttled(self, response: requests.Response, attempt: int) -> bool:
+        """Whether a response is retried by the client when a rate limiter is
+        set."""
+
+        return (
+            response.status_code in THROTTLE_STATUS_CODES
+            and response.status_code in self.status_forcelist
+            and attempt < self.max_retries
+        )
+
+    def _session_for(self, url: str, retries: bool = True) -> requests.Session:
+        """
+        Returns the long-lived session to use for the given URL. Requests to
+        the Nextmv Cloud API host share one connection pool and requests to
+        any other host (presigned-storage URLs) share a separate one. Sessions
+        are created lazily and reused across calls, so keep-alive connections
+        avoid a new TCP and TLS handshake per request. Without `retries`, a
+        session that sends every request exactly once is returned.
+        """
+
+        is_api_host = urlparse(url).netloc == urlparse(self.url).netloc
+        if not retries:
+            with self._session_lock:
+                session = self._single_attempt_sessions.get(is_api_host)
+                if session is None:
+                    pool_maxsize = self.pool_maxsize if is_api_host else self.storage_pool_maxsize
+                    session = self._new_session(pool_maxsize, retries=False)
+                    self._single_attempt_sessions[is_api_host] = session
+                return session
+
+        session = self._session if is_api_host else self._storage_session
+        if session is not None:
+            return session
+
+        with self._session_lock:
+            if is_api_host:
+                if self._session is None:
+                    self._session = self._new_session(self.pool_maxsize)
+                return self._session
+
+            if self._storage_session is None:
+                self._storage_session = self._new_session(self.storage_pool_maxsize)
+            return self._storage_session
+
+    def _new_session(self, pool_maxsize: int, retries: bool = True) -> requests.Session:
+        """Creates a session with a pooled adapter that applies the retry
+        strategy of the client, or that never retries, like the default
+        adapter of `requests`."""
+
+        status_forcelist = self.status_forcelist
+        if self.rate_limiter is not None:
+            # Throttled responses are retried by the client, under the limiter.
+            status_forcelist = [s for s in status_forcelist if s not in THROTTLE_STATUS_CODES]
+
+        retry = Retry(0, read=False)
+        if retries:
+            retry = Retry(
+                total=self.max_retries,
+                backoff_factor=self.backoff_factor,
+                backoff_jitter=self.backoff_jitter,
+                backoff_max=self.backoff_max,
+                status_forcelist=status_forcelist,
+                allowed_methods=self.allowed_methods,
+                respect_retry_after_header=self.rate_limiter is None,
+            )
+        adapter = HTTPAdapter(
+            max_retries=retry,
+            pool_connections=self.pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        return session
+
     def _set_headers_api_key(self, api_key: str) -> None:
         """Sets the API key to use for requests to the Nextmv Cloud API."""
 
@@ -236,12 +729,17 @@ class Client:
         }
 
 
-def get_size(obj: Union[Dict[str, Any], IO[bytes]]) -> int:
+def get_size(obj: Union[Dict[str, Any], IO[bytes], str, bytes, EncodedPayload]) -> int:
     """Finds the size of an object in bytes."""
 
-    if isinstance(obj, dict):
-        obj_str = json.dumps(obj, separators=(",", ":"))
-        return len(obj_str.encode("utf-8"))
+    if isinstance(obj, EncodedPayload):
+        return obj.size
+
+    elif isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+
+    elif isinstance(obj, dict):
+        return len(serialization.dumps(obj))
 
     elif hasattr(obj, "read"):
         obj.seek(0, 2)  # Move the cursor to the end of the file
@@ -253,4 +751,110 @@ def get_size(obj: Union[Dict[str, Any], IO[bytes]]) -> int:
         return len(obj.encode("utf-8"))
 
     else:
-        raise TypeError("Unsupported type. Only dictionaries and file objects are supported.")
+        raise TypeError("Unsupported type. Only dictionaries, strings, bytes and file objects are supported.")
+
+
+def _validate_size(payload: Optional[EncodedPayload], data: Optional[Any]) -> None:
+    """Validates that the payload or data do not exceed the maximum size
+    handled by the Nextmv Cloud API."""
+
+    if payload is not None and payload.size > _MAX_LAMBDA_PAYLOAD_SIZE:
+        raise ValueError(
+            f"payload size of {payload.size} bytes exceeds the maximum allowed size of {_MAX_LAMBDA_PAYLOAD_SIZE} bytes"
+        )
+
+    if data is None:
+        return
+
+    data_size = get_size(data)
+    if data_size > _MAX_LAMBDA_PAYLOAD_SIZE:
+        raise ValueError(
+            f"data size of {data_size} bytes exceeds the maximum allowed size of {_MAX_LAMBDA_PAYLOAD_SIZE} bytes"
+        )
+
+
+def _is_stream(obj: Any) -> bool:
+    """Whether the object is streamed when uploaded: a path, a binary file
+    object or an iterator of byte chunks."""
+
+    return isinstance(obj, os.PathLike) or hasattr(obj, "read") or isinstance(obj, collections.abc.Iterator)
+
+
+@contextlib.contextmanager
+def _request_deadline(deadline_at: float) -> Iterator[None]:
+    """
+    Bound the requests made by any client in the context, including those
+    made from the threads of an `AsyncClient`, to a deadline given as a
+    monotonic time. A request that cannot complete before the deadline
+    raises a `requests.Timeout`.
+    """
+
+    token = _DEADLINE.set(deadline_at)
+    try:
+        yield
+    finally:
+        _DEADLINE.reset(token)
+
+
+def _throttle_info(response: Optional[requests.Response]) -> Tuple[Optional[int], Optional[str]]:
+    """Status code and Retry-After header of a response, if there is one."""
+
+    if response is None:
+        return None, None
+
+    return response.status_code, response.headers.get("Retry-After")
+
+
+def _count_chunks(chunks: Iterator[bytes], sent: List[int]) -> Iterator[bytes]:
+    """Yields the chunks, adding up their size in `sent[0]`."""
+
+    for chunk in chunks:
+        sent[0] += len(chunk)
+        yield chunk
+
+
+def _content_length(request: requests.PreparedRequest) -> int:
+    """Size of the body of a sent request, in bytes."""
+
+    try:
+        return int(request.headers.get("Content-Length", 0))
+    except ValueError:
+        return 0
+
+
+def _bytes_received(response: requests.Response) -> int:
+    """Size of the body of a response as received over the wire, in
+    bytes."""
+
+    tell = getattr(response.raw, "tell", None)
+    if tell is not None:
+        return tell()
+
+    return len(response.content)
+
+
+def _tell(body: Any) -> Optional[int]:
+    """Position of a file-like body, so it can be rewound before sending it
+    again."""
+
+    if not hasattr(body, "seek"):
+        return None
+
+    try:
+        return body.tell()
+    except (OSError, ValueError):
+        return None
+
+
+def _rewind(body: Any, position: Optional[int]) -> bool:
+    """Prepares a body to be sent again. Returns False if it cannot be sent
+    again."""
+
+    if body is None or isinstance(body, (bytes, bytearray, str, dict)):
+        return True
+
+    if position is None:
+        return False
+
+    body.seek(position)
+    return True
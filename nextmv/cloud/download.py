@@ -0,0 +1,325 @@
+"""This module contains definitions for downloading run inputs and outputs to
+local files, including a downloader that fetches large content in parallel
+ranges."""
+
+import hashlib
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, TYPE_CHECKING, Any, Dict, Optional, Union
+
+import requests
+
+from nextmv import serialization
+from nextmv.cloud import _io
+
+if TYPE_CHECKING:
+    from nextmv.cloud.client import Client
+
+_MD5_PATTERN = re.compile(r"[0-9a-fA-F]{32}")
+"""Pattern of an ETag that is the MD5 of the content."""
+
+
+class ChecksumError(Exception):
+    """The content that was downloaded does not match the size or the
+    checksum of the content that was expected."""
+
+
+@dataclass
+class DownloadedFile:
+    """
+    Handle to a run input or output that was downloaded to a local file. The
+    content is not loaded into memory until it is requested, and it is parsed
+    at most once.
+    """
+
+    path: str
+    """Path of the local file."""
+
+    _data: Any = field(default=None, init=False, repr=False)
+    """Parsed content, once it has been loaded."""
+    _loaded: bool = field(default=False, init=False, repr=False)
+    """Whether the content has been parsed."""
+
+    @property
+    def size(self) -> int:
+        """Size of the file, in bytes."""
+
+        return os.path.getsize(self.path)
+
+    def json(self) -> Any:
+        """
+        Parse the file as JSON. The file is parsed on the first call and the
+        result is reused afterwards.
+
+        Returns:
+            The parsed content.
+        """
+
+        if not self._loaded:
+            with open(self.path, "rb") as f:
+                self._data = serialization.load(f)
+            self._loaded = True
+
+        return self._data
+
+    def text(self) -> str:
+        """
+        Read the file as UTF-8 encoded text.
+
+        Returns:
+            The content of the file.
+        """
+
+        with open(self.path, encoding="utf-8") as f:
+            return f.read()
+
+    def open(self) -> IO[bytes]:
+        """
+        Open the file for streaming its content.
+
+        Returns:
+            The file object, opened in binary mode.
+        """
+
+        return open(self.path, "rb")
+
+
+class RangedDownloader:
+    """
+    Downloads the content of a presigned URL with HTTP Range requests,
+    fetching chunks of `chunk_size` bytes over `max_workers` connections and
+    writing them straight to disk. The chunks are written to a `.download`
+    file next to the destination, and the completed chunks are recorded in a
+    `.download.json` sidecar: an interrupted download of the same content,
+    identified by its size and ETag, resumes from the missing chunks. The
+    size of every chunk and of the whole content is verified and, when the
+    ETag is the MD5 of the content, so is the checksum.
+
+    Content smaller than `min_size` is downloaded with a single request, the
+    one that probes the size of the content, and so is the content of
+    servers that do not support ranges.
+
+    Parameters
+    ----------
+    client : Client
+        Client used to send the requests, with its connection pooling,
+        retries and instrumentation.
+    chunk_size : int, optional
+        Size of the chunks, in bytes. Default is 8 MiB.
+    max_workers : int, optional
+        Number of chunks downloaded concurrently. Default is 4.
+    max_retries : int, optional
+        Number of times a failed chunk is retried. Default is 3.
+    backoff : float, optional
+        Delay before the first retry of a chunk, in seconds, doubled on every
+        retry. Default is 0.5.
+    min_size : int, optional
+        Minimum size of the content, in bytes, to download it in chunks.
+        Default is 16 MiB.
+    verify_checksum : bool, optional
+        Whether to compare the MD5 of the content with the ETag, when the
+        ETag looks like an MD5. Disable it for storages whose ETags are not
+        the MD5 of the content, e.g.: S3 objects encrypted with KMS. Default
+        is True.
+    """
+
+    def __init__(
+        self,
+        client: "Client",
+        chunk_size: int = 8 * 1024 * 1024,
+        max_workers: int = 4,
+        max_retries: int = 3,
+        backoff: float = 0.5,
+        min_size: int = 16 * 1024 * 1024,
+        verify_checksum: bool = True,
+    ):
+        self.client = client
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.min_size = min_size
+        self.verify_checksum = verify_checksum
+
+    def download(self, url: str, path: Union[str, os.PathLike], decompress: bool = True) -> int:
+        """
+        Download the content of a URL to a local file.
+
+        Args:
+            url: URL to download the content from.
+            path: Path of the file to write the content to.
+            decompress: Whether to decode gzip-compressed content while
+                writing it.
+
+        Returns:
+            Number of bytes written to the file.
+
+        Raises:
+            requests.HTTPError: If a chunk could not be downloaded after all
+                the retries. The progress is kept to resume the download.
+            ChecksumError: If the content does not match its size or MD5.
+                The partial download is discarded.
+        """
+
+        # The probe asks for the first `min_size` bytes: smaller content is
+        # received whole, in this single request.
+        start_time, started = time.time(), time.perf_counter()
+        with self.__get_range(url, 0, max(self.min_size, 1) - 1) as response:
+            probe = _content_info(response)
+            if response.status_code == 200 or (probe is not None and probe["size"] < self.min_size):
+                # Either the content is small, or the server ignored the range
+                # and is sending the whole content.
+                chunks = response.raw.stream(_io.CHUNK_SIZE, decode_content=False)
+                written = _io.write_chunks(path=path, chunks=_io.gunzip_chunks(chunks) if decompress else chunks)
+                self.__observe(url, response, start_time, started)
+                return written
+
+            self.__observe(url, response, start_time, started)
+
+        if probe is None:
+            return self.client.download_from_presigned_url(url=url, path=path, decompress=decompress)
+
+        part_path = f"{os.fspath(path)}.download"
+        state_path = f"{part_path}.json"
+        state = _io.read_state(state_path)
+        if state is None or state.get("content") != probe or not os.path.exists(part_path):
+            state = {"content": probe, "chunk_size": self.chunk_size, "done": []}
+            with open(part_path, "wb") as f:
+                f.truncate(probe["size"])
+            _io.write_state(state_path, state)
+
+        self.__download_chunks(url, part_path, state_path, state)
+        try:
+            self.__verify(part_path, probe)
+        except ChecksumError:
+            for leftover in [part_path, state_path]:
+                os.remove(leftover)
+            raise
+
+        os.remove(state_path)
+        if not decompress:
+            os.replace(part_path, path)
+            return probe["size"]
+
+        with open(part_path, "rb") as f:
+            written = _io.write_chunks(path=path, chunks=_io.gunzip_chunks(_io.read_chunks(f)))
+        os.remove(part_path)
+
+        return written
+
+    def __download_chunks(self, url: str, part_path: str, state_path: str, state: Dict[str, Any]) -> None:
+        """Downloads the chunks that are not done yet, recording each of them
+        in the sidecar as soon as it is written."""
+
+        size, chunk_size = state["content"]["size"], state["chunk_size"]
+        done = set(state["done"])
+        pending = [index for index in range((size + chunk_size - 1) // chunk_size) if index not in done]
+        lock = threading.Lock()
+
+        def download_chunk(index: int) -> None:
+            start = index * chunk_size
+            end = min(start + chunk_size, size) - 1
+            self.__download_range(url, part_path, start, end)
+            with lock:
+                state["done"].append(index)
+                _io.write_state(state_path, state)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nextmv-download") as executor:
+            futures = [executor.submit(download_chunk, index) for index in pending]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def __download_range(self, url: str, part_path: str, start: int, end: int) -> None:
+        """Downloads a range into its place in the partial file, retrying it
+        with exponential backoff."""
+
+        attempt = 0
+        while True:
+            try:
+                start_time, started = time.time(), time.perf_counter()
+                with self.__get_range(url, start, end) as response:
+                    response.raise_for_status()
+                    with open(part_path, "r+b") as f:
+                        f.seek(start)
+                        written = 0
+                        for chunk in response.raw.stream(_io.CHUNK_SIZE, decode_content=False):
+                            f.write(chunk)
+                            written += len(chunk)
+                    self.__observe(url, response, start_time, started)
+
+                if response.status_code != 206 or written != end - start + 1:
+                    raise ChecksumError(f"range {start}-{end} of {url} was received with {written} bytes")
+                return
+            except (requests.RequestException, ChecksumError):
+                if attempt >= self.max_retries:
+                    raise
+
+            time.sleep(self.backoff * 2**attempt)
+            attempt += 1
+
+    def __get_range(self, url: str, start: int, end: int) -> requests.Response:
+        """Sends a GET request for a range of the content, without decoding
+        it: ranges refer to the stored bytes."""
+
+        return self.client._send(
+            method="GET",
+            url=url,
+            headers={"Range": f"bytes={start}-{end}", "Accept-Encoding": "identity"},
+            timeout=self.client.timeout,
+            stream=True,
+        )
+
+    def __observe(self, url: str, response: requests.Response, start_time: float, started: float) -> None:
+        """Reports a successful range request to the request hooks of the
+        client, once its body has been read. The client does not report
+        successful streamed responses itself."""
+
+        if response.ok and self.client.request_hooks:
+            self.client._observe(
+                method="GET",
+                url=url,
+                start_time=start_time,
+                latency=time.perf_counter() - started,
+                response=response,
+            )
+
+    def __verify(self, part_path: str, probe: Dict[str, Any]) -> None:
+        """Verifies the size of the downloaded content and, if the ETag is an
+        MD5, its checksum."""
+
+        size = os.path.getsize(part_path)
+        if size != probe["size"]:
+            raise ChecksumError(f"downloaded {size} bytes instead of {probe['size']}")
+
+        etag = (probe["etag"] or "").strip('"')
+        if not (self.verify_checksum and _MD5_PATTERN.fullmatch(etag)):
+            return
+
+        md5 = hashlib.md5()
+        with open(part_path, "rb") as f:
+            for chunk in _io.read_chunks(f):
+                md5.update(chunk)
+
+        if md5.hexdigest() != etag.lower():
+            raise ChecksumError(f"downloaded content has MD5 {md5.hexdigest()} instead of {etag}")
+
+
+def _content_info(response: requests.Response) -> Optional[Dict[str, Any]]:
+    """Size and ETag of the content of a partial response, or None if the
+    response does not tell its size."""
+
+    content_range = response.headers.get("Content-Range", "")
+    total = content_range.rsplit("/", 1)[-1]
+    if response.status_code != 206 or not total.isdigit():
+        return None
+
+    return {"size": int(total), "etag": response.headers.get("ETag")}
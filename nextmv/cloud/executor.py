@@ -0,0 +1,344 @@
+"""This module contains an executor that runs inputs on a Nextmv Cloud
+application, representing every run with a future."""
+
+import concurrent.futures
+import contextlib
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set
+
+import requests
+
+from nextmv.cloud._futures import complete, notify_cancel
+from nextmv.cloud.account import Account
+from nextmv.cloud.application import _DEFAULT_POLLING_OPTIONS, Application, PollingOptions, RunResult
+from nextmv.cloud.waiter import RunWaiter
+
+
+class RunFuture(Future):
+    """
+    Future of a run submitted with a `RunExecutor` or a `SubmissionScheduler`.
+    Its result is the `RunResult` of the run. The future stays pending while
+    the run is being submitted and executed, so it can be cancelled until the
+    result is available: cancelling it also cancels the run in the Nextmv
+    Cloud.
+    """
+
+    def __init__(self, application: Application):
+        super().__init__()
+        self._application = application
+        self._run_id: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def run_id(self) -> Optional[str]:
+        """ID of the run, once it has been submitted."""
+
+        return self._run_id
+
+    def cancel(self) -> bool:
+        """
+        Cancel the future and, if it was already submitted, the run.
+
+        Returns:
+            Whether the future was cancelled. A future cannot be cancelled
+            once its result is available.
+
+        Raises:
+            requests.HTTPError: If the run could not be cancelled in the
+                Nextmv Cloud. The future is cancelled nevertheless.
+        """
+
+        with self._lock:
+            if not super().cancel():
+                return False
+            run_id = self._run_id
+
+        # Nothing else notifies the waiters of a future that is never run by
+        # an executor.
+        notify_cancel(self)
+        if run_id is not None:
+            self._application.cancel_run(run_id=run_id)
+
+        return True
+
+    def _set_run_id(self, run_id: str) -> bool:
+        """Records the ID of the submitted run. If the future was cancelled
+        while the run was being submitted, the run is cancelled. Returns
+        whether the future is still pending."""
+
+        with self._lock:
+            self._run_id = run_id
+            cancelled = self.cancelled()
+
+        if cancelled:
+            self._application.cancel_run(run_id=run_id)
+
+        return not cancelled
+
+    def _execute(
+        self,
+        run_kwargs: Dict[str, Any],
+        waiter: RunWaiter,
+        workers: Executor,
+        on_finished: Optional[Callable[[], None]] = None,
+    ) -> None:
+        """Submits the run of the future and waits for it with the waiter.
+        Once the run finishes, `on_finished` is called and the result is
+        fetched with the workers. Meant to be called by one of the workers."""
+
+        if self.cancelled():
+            notify_cancel(self)
+            return
+
+        try:
+            run_id = self._application.new_run(**run_kwargs)
+            if not self._set_run_id(run_id):
+                notify_cancel(self)
+                return
+            waiting = waiter.add(run_id)
+        except Exception as e:
+            complete(self, exception=e)
+            return
+
+        self.add_done_callback(lambda _: waiting.cancel())
+        waiting.add_done_callback(lambda w: self.__finish(w, workers, on_finished))
+
+    def __finish(self, waiting: Future, workers: Executor, on_finished: Optional[Callable[[], None]]) -> None:
+        """Completes the future once the waiter reports that the run
+        finished, fetching its result."""
+
+        if on_finished is not None:
+            on_finished()
+
+        if waiting.cancelled():
+            complete(self, exception=RuntimeError(f"stopped waiting for run {self.run_id}"))
+            return
+
+        exception = waiting.exception()
+        if exception is not None:
+            complete(self, exception=exception)
+            return
+
+        try:
+            workers.submit(self.__fetch_result, waiting.result().id)
+        except RuntimeError as e:
+            complete(self, exception=e)
+
+    def __fetch_result(self, run_id: str) -> None:
+        """Fetches the result of the finished run."""
+
+        if self.cancelled():
+            notify_cancel(self)
+            return
+
+        try:
+            result = self._application.run_result(run_id=run_id)
+        except Exception as e:
+            complete(self, exception=e)
+            return
+
+        complete(self, result=result)
+
+
+class RunExecutor(Executor):
+    """
+    Executor that runs inputs on a Nextmv Cloud application. Every submitted
+    input becomes a run, represented by a `RunFuture` that supports
+    callbacks, timeouts and cancellation. At most `max_in_flight` runs are in
+    flight: submitting more blocks until one finishes, so producers are
+    slowed down instead of piling up runs.
+
+    The runs are waited on with a `RunWaiter`, which polls all of them from a
+    single scheduler thread with the strategy of `polling_options`, and a
+    small pool of workers submits the runs and fetches their results, so no
+    thread sleeps in a poll loop of its own.
+
+    Parameters
+    ----------
+    application : Application
+        Application to run the inputs on.
+    max_in_flight : int, optional
+        Maximum number of runs in flight. Default is 10.
+    max_workers : int, optional
+        Number of workers performing the HTTP calls. Default is 4.
+    polling_options : PollingOptions, optional
+        Options to use when polling for the results of the runs.
+    account : Account, optional
+        Account whose queue is used to check many runs with a single call.
+        Ignored if `waiter` is given.
+    waiter : RunWaiter, optional
+        Waiter used to wait for the runs, which can be shared with other
+        executors. If not given, the executor creates its own and closes it
+        on shutdown.
+
+    Examples
+    --------
+    >>> with RunExecutor(application=app, max_in_flight=20) as executor:
+    ...     for result in executor.map(inputs, options={"duration": "5s"}):
+    ...         print(result.id)
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        max_in_flight: int = 10,
+        max_workers: int = 4,
+        polling_options: PollingOptions = _DEFAULT_POLLING_OPTIONS,
+        account: Optional[Account] = None,
+        waiter: Optional[RunWaiter] = None,
+    ):
+        self.application = application
+        self.max_in_flight = max_in_flight
+        self.polling_options = polling_options
+        self._owns_waiter = waiter is None
+        if waiter is None:
+            waiter = RunWaiter(application=application, account=account, polling_options=polling_options)
+        self.waiter = waiter
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nextmv-runs")
+        self._condition = threading.Condition()
+        self._futures: Set[RunFuture] = set()
+        self._shutdown = False
+
+    def submit(
+        self,
+        input: Any = None,
+        instance_id: Optional[str] = None,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        options: Optional[Dict[str, Any]] = None,
+        **kwargs: Any,
+    ) -> RunFuture:
+        """
+        Submit an input to start a new run. Blocks while `max_in_flight` runs
+        are in flight.
+
+        Args:
+            input: Input to use for the run.
+            instance_id: ID of the instance to use for the run.
+            name: Name of the run.
+            description: Description of the run.
+            options: Options to use for the run.
+            **kwargs: Other arguments of `Application.new_run`.
+
+        Returns:
+            Future of the run.
+
+        Raises:
+            RuntimeError: If the executor was shut down.
+        """
+
+        if self._shutdown:
+            raise RuntimeError("cannot submit new runs after shutdown")
+
+        self._slots.acquire()
+        future = RunFuture(application=self.application)
+        with self._condition:
+            if self._shutdown:
+                self._slots.release()
+                raise RuntimeError("cannot submit new runs after shutdown")
+            self._futures.add(future)
+
+        future.add_done_callback(self.__release)
+        run_kwargs = {
+            "input": input,
+            "instance_id": instance_id,
+            "name": name,
+            "description": description,
+            "options": options,
+            **kwargs,
+        }
+        self._workers.submit(future._execute, run_kwargs, self.waiter, self._workers)
+
+        return future
+
+    def map(self, inputs: Iterable[Any], timeout: Optional[float] = None, **kwargs: Any) -> Iterator[RunResult]:
+        """
+        Run every input and yield the results in the order in which the runs
+        finish. Inputs are consumed lazily, keeping at most `max_in_flight`
+        runs in flight. If the iterator is closed before it is exhausted, the
+        runs in flight are cancelled.
+
+        Args:
+            inputs: Inputs to run.
+            timeout: Maximum time, in seconds, to wait for all the results.
+            **kwargs: Arguments of `submit` applied to every run.
+
+        Returns:
+            Iterator over the results of the runs.
+
+        Raises:
+            concurrent.futures.TimeoutError: If the results are not available
+                before the timeout.
+            Exception: The exception raised by a run, if any.
+        """
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending: Set[RunFuture] = set()
+
+        def drain(limit: int) -> Iterator[RunResult]:
+            nonlocal pending
+            while len(pending) > limit:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                done, pending = concurrent.futures.wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                if not done:
+                    raise concurrent.futures.TimeoutError(f"runs did not finish after {timeout} seconds")
+                for future in done:
+                    yield future.result()
+
+        try:
+            for input in inputs:
+                yield from drain(self.max_in_flight - 1)
+                pending.add(self.submit(input=input, **kwargs))
+
+            yield from drain(0)
+        finally:
+            for future in pending:
+                with contextlib.suppress(requests.HTTPError):
+                    future.cancel()
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """
+        Stop accepting new runs and release the workers once the runs in
+        flight finish.
+
+        Args:
+            wait: Whether to wait for the runs in flight to finish.
+            cancel_futures: Whether to cancel the runs in flight.
+        """
+
+        with self._condition:
+            self._shutdown = True
+            futures = list(self._futures)
+            self._condition.notify_all()
+
+        if cancel_futures:
+            for future in futures:
+                with contextlib.suppress(requests.HTTPError):
+                    future.cancel()
+
+        if wait:
+            concurrent.futures.wait(futures)
+            self.__close()
+        else:
+            threading.Thread(target=self.__close, args=(futures,), daemon=True).start()
+
+    def __release(self, future: RunFuture) -> None:
+        """Frees the slot of a finished run."""
+
+        with self._condition:
+            self._futures.discard(future)
+            self._condition.notify_all()
+
+        self._slots.release()
+
+    def __close(self, futures: Iterable[RunFuture] = ()) -> None:
+        """Releases the workers, and the waiter if it is owned, once the given
+        runs finish."""
+
+        concurrent.futures.wait(list(futures))
+        if self._owns_waiter:
+            self.waiter.close()
+        self._workers.shutdown()
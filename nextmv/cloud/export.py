@@ -0,0 +1,376 @@
+"""This module contains the bulk export of the inputs, outputs, metadata and
+logs of runs to a local directory or dataset."""
+
+import glob
+import os
+import shutil
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Union
+
+from nextmv import serialization
+from nextmv.cloud.input_set import InputSet
+from nextmv.cloud.status import _TERMINAL_STATUSES
+
+if TYPE_CHECKING:
+    from nextmv.cloud.application import Application
+
+
+class ExportFormat(str, Enum):
+    """Format of an export of runs."""
+
+    directory = "directory"
+    """A directory per run, named after its ID, holding `metadata.json`,
+    `input.json`, `output.json` and `logs.txt`."""
+    jsonl = "jsonl"
+    """A JSON Lines file with a line per run."""
+    parquet = "parquet"
+    """A directory of Parquet files with a row per run. Requires `pyarrow`."""
+
+
+@dataclass
+class ExportStats:
+    """Summary of an export of runs."""
+
+    exported: int = 0
+    """Number of runs exported."""
+    skipped: int = 0
+    """Number of runs skipped because they were already exported."""
+    unfinished: List[str] = field(default_factory=list)
+    """IDs of the runs not exported because they have not finished yet."""
+    failed: Dict[str, str] = field(default_factory=dict)
+    """Errors of the runs that could not be exported, keyed by run ID."""
+
+
+@dataclass
+class _FetchedRun:
+    """A run whose data was downloaded to a staging directory."""
+
+    id: str
+    """ID of the run."""
+    directory: str
+    """Staging directory holding the files of the run."""
+    information: Dict[str, Any]
+    """Information of the run, with its metadata."""
+
+
+class RunExporter:
+    """
+    Exports the inputs, outputs, metadata and logs of many runs. Runs are
+    fetched by `max_workers` threads, with at most two requests per run for
+    the result and the input, and one for the logs, and without requesting
+    the metadata separately. Large inputs and outputs are streamed to disk.
+
+    Runs that were already exported to the destination are skipped, so an
+    interrupted export can be started again. Runs that have not finished are
+    not exported, and are reported as such.
+
+    Parameters
+    ----------
+    application : Application
+        Application the runs belong to.
+    destination : str
+        Directory, for the `directory` and `parquet` formats, or file, for the
+        `jsonl` format, where the runs are exported.
+    format : ExportFormat, optional
+        Format of the export. Default is `directory`.
+    include_input : bool, optional
+        Whether to export the inputs. Default is True.
+    include_output : bool, optional
+        Whether to export the outputs. Default is True.
+    include_logs : bool, optional
+        Whether to export the logs. Default is True.
+    max_workers : int, optional
+        Number of runs fetched concurrently. Default is 8.
+    batch_size : int, optional
+        Number of runs per Parquet file. Default is 1000.
+    """
+
+    def __init__(
+        self,
+        application: "Application",
+        destination: str,
+        format: ExportFormat = ExportFormat.directory,
+        include_input: bool = True,
+        include_output: bool = True,
+        include_logs: bool = True,
+        max_workers: int = 8,
+        batch_size: int = 1000,
+    ):
+        self.application = application
+        self.destination = destination
+        self.format = ExportFormat(format)
+        self.include_input = include_input
+        self.include_output = include_output
+        self.include_logs = include_logs
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    def export(self, runs: Union[Iterable[str], InputSet]) -> ExportStats:
+        """
+        Export runs, skipping those already exported.
+
+        Args:
+            runs: IDs of the runs to export, or an input set, whose inputs
+                are the runs it was created from.
+
+        Returns:
+            Summary of the export. Runs that failed to be exported do not stop
+            the export, and are reported in the summary.
+
+        Raises:
+            ImportError: If the format is `parquet` and `pyarrow` is not
+                installed.
+        """
+
+        writer = _WRITERS[self.format](self.destination, self.batch_size)
+        run_ids = runs.input_ids if isinstance(runs, InputSet) else runs
+        exported = writer.exported_ids()
+        stats = ExportStats()
+        staging = tempfile.mkdtemp(prefix=".staging-", dir=writer.staging_parent())
+        in_flight: Dict[Future, str] = {}
+        try:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="nextmv-export") as executor:
+                for run_id in run_ids:
+                    if run_id in exported:
+                        stats.skipped += 1
+                        continue
+                    exported.add(run_id)
+
+                    # The runs in flight are bounded, so that the run IDs can be
+                    # a lazy iterable and the fetched runs do not pile up.
+                    if len(in_flight) >= 2 * self.max_workers:
+                        self.__collect(in_flight, writer, staging, stats, return_when=FIRST_COMPLETED)
+                    in_flight[executor.submit(self.__fetch, run_id, staging)] = run_id
+
+                self.__collect(in_flight, writer, staging, stats)
+        finally:
+            writer.close()
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return stats
+
+    def __collect(
+        self,
+        in_flight: Dict[Future, str],
+        writer: "_Writer",
+        staging: str,
+        stats: ExportStats,
+        return_when: str = "ALL_COMPLETED",
+    ) -> None:
+        """Waits for fetched runs and writes them, cleaning up their staging
+        directories."""
+
+        done, _ = wait(list(in_flight), return_when=return_when)
+        for future in done:
+            run_id = in_flight.pop(future)
+            try:
+                fetched = future.result()
+                if fetched is None:
+                    stats.unfinished.append(run_id)
+                    continue
+
+                writer.write(fetched)
+                stats.exported += 1
+            except Exception as e:
+                stats.failed[run_id] = str(e)
+            finally:
+                shutil.rmtree(os.path.join(staging, run_id), ignore_errors=True)
+
+    def __fetch(self, run_id: str, staging: str) -> Optional[_FetchedRun]:
+        """Downloads the data of a run to its own staging directory. Returns
+        None if the run has not finished."""
+
+        directory = os.path.join(staging, run_id)
+        os.makedirs(directory)
+        output_path = os.path.join(directory, "output.json")
+        if self.include_output:
+            result = self.application.run_result_to_file(run_id=run_id, path=output_path)
+        else:
+            result = self.application.run_metadata(run_id=run_id)
+        if result.metadata.status_v2 not in _TERMINAL_STATUSES:
+            return None
+
+        information = result.to_dict()
+        information.pop("output_path", None)
+        if self.include_input:
+            self.application.run_input_to_file(run_id=run_id, path=os.path.join(directory, "input.json"))
+        if self.include_logs:
+            with open(os.path.join(directory, "logs.txt"), "w", encoding="utf-8") as f:
+                f.write(self.application.run_logs(run_id=run_id).log)
+
+        return _FetchedRun(id=run_id, directory=directory, information=information)
+
+
+class _Writer:
+    """Base class for the writers of the formats of an export."""
+
+    def __init__(self, destination: str, batch_size: int):
+        self.destination = destination
+        self.batch_size = batch_size
+
+    def staging_parent(self) -> str:
+        """Directory where the runs are staged, on the same file system as
+        the destination."""
+
+        os.makedirs(self.destination, exist_ok=True)
+
+        return self.destination
+
+    def exported_ids(self) -> Set[str]:
+        """IDs of the runs already exported."""
+
+        raise NotImplementedError
+
+    def write(self, run: _FetchedRun) -> None:
+        """Writes a fetched run."""
+
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Flushes the pending runs."""
+
+
+class _DirectoryWriter(_Writer):
+    """Writes a directory per run. A run directory is moved into place once
+    complete, so its existence marks the run as exported."""
+
+    def exported_ids(self) -> Set[str]:
+        return {name for name in os.listdir(self.staging_parent()) if not name.startswith(".")}
+
+    def write(self, run: _FetchedRun) -> None:
+        with open(os.path.join(run.directory, "metadata.json"), "wb") as f:
+            f.write(serialization.dumps(run.information, indent=True))
+
+        os.replace(run.directory, os.path.join(self.destination, run.id))
+
+
+class _JSONLWriter(_Writer):
+    """Appends a line per run to a JSON Lines file, with its information and
+    its input, output and logs, if exported."""
+
+    def staging_parent(self) -> str:
+        parent = os.path.dirname(os.path.abspath(self.destination))
+        os.makedirs(parent, exist_ok=True)
+
+        return parent
+
+    def exported_ids(self) -> Set[str]:
+        if not os.path.exists(self.destination):
+            return set()
+
+        ids = set()
+        complete = 0
+        with open(self.destination, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                complete += len(line)
+                ids.add(serialization.loads(line)["id"])
+
+        # A line cut short by an interrupted export is dropped, so that the
+        # next line starts where it should.
+        with open(self.destination, "r+b") as f:
+            f.truncate(complete)
+
+        return ids
+
+    def write(self, run: _FetchedRun) -> None:
+        with open(self.destination, "ab") as f:
+            f.write(serialization.dumps(_record(run)) + b"\n")
+
+
+class _ParquetWriter(_Writer):
+    """Writes Parquet files of `batch_size` runs each, with the inputs,
+    outputs and information of the runs as JSON strings."""
+
+    def __init__(self, destination: str, batch_size: int):
+        super().__init__(destination, batch_size)
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "exporting runs to Parquet requires pyarrow, install it with `pip install nextmv[parquet]`"
+            ) from e
+
+        self._pyarrow = pyarrow
+        self._parquet = pyarrow.parquet
+        self._rows: List[Dict[str, Any]] = []
+
+    def exported_ids(self) -> Set[str]:
+        ids: Set[str] = set()
+        for path in glob.glob(os.path.join(self.staging_parent(), "*.parquet")):
+            ids.update(self._parquet.read_table(path, columns=["id"]).column("id").to_pylist())
+
+        return ids
+
+    def write(self, run: _FetchedRun) -> None:
+        record = _record(run)
+        metadata = record["information"]["metadata"]
+        self._rows.append(
+            {
+                "id": run.id,
+                "instance_id": metadata["application_instance_id"],
+                "version_id": metadata["application_version_id"],
+                "status": metadata["status_v2"],
+                "created_at": metadata["created_at"],
+                "duration": metadata["duration"],
+                "input_size": metadata["input_size"],
+                "output_size": metadata["output_size"],
+                "information": serialization.dumps(record["information"]).decode("utf-8"),
+                "input": _json_string(record.get("input")),
+                "output": _json_string(record.get("output")),
+                "logs": record.get("logs"),
+            }
+        )
+        if len(self._rows) >= self.batch_size:
+            self.close()
+
+    def close(self) -> None:
+        if not self._rows:
+            return
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.destination, suffix=".tmp")
+        os.close(fd)
+        self._parquet.write_table(self._pyarrow.Table.from_pylist(self._rows), tmp_path)
+        os.replace(tmp_path, os.path.join(self.destination, f"{os.path.basename(tmp_path)[:-4]}.parquet"))
+        self._rows = []
+
+
+_WRITERS = {
+    ExportFormat.directory: _DirectoryWriter,
+    ExportFormat.jsonl: _JSONLWriter,
+    ExportFormat.parquet: _ParquetWriter,
+}
+"""Writers of the formats of an export."""
+
+
+def _record(run: _FetchedRun) -> Dict[str, Any]:
+    """Record of a fetched run, with its input, output and logs loaded from
+    the staging directory, if they were exported."""
+
+    record: Dict[str, Any] = {"id": run.id, "information": run.information}
+    for key, name in [("input", "input.json"), ("output", "output.json")]:
+        path = os.path.join(run.directory, name)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                record[key] = serialization.load(f)
+
+    logs_path = os.path.join(run.directory, "logs.txt")
+    if os.path.exists(logs_path):
+        with open(logs_path, encoding="utf-8") as f:
+            record["logs"] = f.read()
+
+    return record
+
+
+def _json_string(value: Any) -> Optional[str]:
+    """JSON representation of a value, or None if there is no value."""
+
+    if value is None:
+        return None
+
+    return serialization.dumps(value).decode("utf-8")
@@ -0,0 +1,227 @@
+"""This module contains the incremental tailing of the logs of runs that are
+in progress."""
+
+import concurrent.futures
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional
+
+from nextmv import serialization
+from nextmv.cloud.application import Application, PollingOptions
+from nextmv.cloud.waiter import RunWaiter
+
+_CONTINUITY_SIZE: int = 64
+"""Number of characters, before the offset of a tail, that are kept to check
+that the log was only appended to since the previous poll."""
+
+
+@dataclass
+class LogChunk:
+    """New content of the log of a run."""
+
+    run_id: str
+    """ID of the run."""
+    text: str
+    """Content appended to the log since the previous chunk. If the log was
+    rewritten instead, the whole log."""
+    offset: int
+    """Length of the log, in characters, after this chunk."""
+    finished: bool = False
+    """Whether the run finished and this is the last chunk of its log."""
+    reset: bool = False
+    """Whether the log was rewritten, so that `text` is the whole log instead
+    of the continuation of the previous chunks."""
+
+
+class LogTail:
+    """
+    Tail of the log of a run. Every poll downloads the log and returns only
+    the content appended since the previous poll, keeping just the offset and
+    a few characters before it. When the API provides an ETag for the log, it
+    is sent back so that an unchanged log is not downloaded again.
+
+    Parameters
+    ----------
+    application : Application
+        Application the run belongs to.
+    run_id : str
+        ID of the run.
+    offset : int, optional
+        Length of the log already seen, in characters, e.g.: to resume
+        tailing from a previous chunk. Default is 0.
+    """
+
+    def __init__(self, application: Application, run_id: str, offset: int = 0):
+        self.application = application
+        self.run_id = run_id
+        self.offset = offset
+        self._continuity: Optional[str] = None
+        self._etag: Optional[str] = None
+
+    def poll(self) -> LogChunk:
+        """
+        Fetch the content appended to the log since the previous poll.
+
+        Returns:
+            The new content, which is empty if the log did not change.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        client = self.application.client
+        headers = None
+        if self._etag is not None:
+            headers = {**client.headers, "If-None-Match": self._etag}
+
+        response = client.request(
+            method="GET", endpoint=f"{self.application.endpoint}/runs/{self.run_id}/logs", headers=headers
+        )
+        if response.status_code == 304:
+            return LogChunk(run_id=self.run_id, text="", offset=self.offset)
+
+        self._etag = response.headers.get("ETag")
+        log = serialization.loads(response.content).get("log") or ""
+        start = self.offset - len(self._continuity) if self._continuity is not None else self.offset
+        reset = len(log) < self.offset or (
+            self._continuity is not None and log[start : self.offset] != self._continuity
+        )
+        text = log if reset else log[self.offset :]
+        self.offset = len(log)
+        self._continuity = log[-_CONTINUITY_SIZE:]
+
+        return LogChunk(run_id=self.run_id, text=text, offset=self.offset, reset=reset)
+
+
+class LogFollower:
+    """
+    Follows the logs of many runs at once, yielding only their new content.
+    The logs of the runs are polled every `interval` seconds by `max_workers`
+    threads, and the completion of the runs is tracked by a `RunWaiter`: once
+    a run finishes, its log is polled a last time and it stops being
+    followed.
+
+    The follower can be used as a context manager, which closes it on exit.
+
+    Parameters
+    ----------
+    application : Application
+        Application the runs belong to.
+    interval : float, optional
+        Delay between polls of the logs, in seconds. Default is 2.
+    max_workers : int, optional
+        Number of logs polled concurrently. Default is 4.
+    waiter : RunWaiter, optional
+        Waiter tracking the completion of the runs, e.g.: to share the one of
+        a `RunExecutor`. If not given, the follower creates its own, checking
+        the runs every `interval` seconds, and closes it when closed.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        interval: float = 2,
+        max_workers: int = 4,
+        waiter: Optional[RunWaiter] = None,
+    ):
+        self.application = application
+        self.interval = interval
+        self._owns_waiter = waiter is None
+        if waiter is None:
+            options = PollingOptions(
+                initial_delay=interval,
+                delay=interval,
+                backoff=1,
+                max_duration=float("inf"),
+                max_tries=sys.maxsize,
+            )
+            waiter = RunWaiter(application=application, polling_options=options)
+        self.waiter = waiter
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nextmv-logs")
+        self._closed = threading.Event()
+
+    def follow(
+        self,
+        run_ids: Iterable[str],
+        offsets: Optional[Dict[str, int]] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[LogChunk]:
+        """
+        Follow the logs of runs until they finish.
+
+        Args:
+            run_ids: IDs of the runs.
+            offsets: Length of the log already seen for some of the runs, in
+                characters, e.g.: the offset of their last chunk, to resume
+                following them.
+            timeout: Maximum time, in seconds, to follow the runs.
+
+        Returns:
+            Iterator over the new content of the logs, as it appears. Empty
+            chunks are only yielded as the last chunk of a run, to tell that
+            it finished.
+
+        Raises:
+            TimeoutError: If the runs do not finish before the timeout.
+            requests.HTTPError: If a log could not be fetched.
+            Exception: The exception raised while waiting for a run, if any.
+        """
+
+        offsets = offsets or {}
+        tails = {run_id: LogTail(self.application, run_id, offsets.get(run_id, 0)) for run_id in run_ids}
+        completions: Dict[str, Future] = {run_id: self.waiter.add(run_id) for run_id in tails}
+        deadline = time.monotonic() + timeout if timeout is not None else float("inf")
+        try:
+            while tails and not self._closed.is_set():
+                started = time.monotonic()
+                # Runs that finished before the poll are followed for the last time.
+                finished = {run_id for run_id in tails if completions[run_id].done()}
+                for run_id in finished:
+                    completions[run_id].result()
+
+                chunks = self._workers.map(LogTail.poll, list(tails.values()))
+                for chunk in chunks:
+                    chunk.finished = chunk.run_id in finished
+                    if chunk.text or chunk.finished:
+                        yield chunk
+
+                for run_id in finished:
+                    del tails[run_id]
+                if not tails:
+                    return
+
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"runs {sorted(tails)} did not finish within {timeout} seconds")
+
+                # A run finishing cuts the wait short, so its end is reported
+                # right away.
+                delay = min(started + self.interval, deadline) - time.monotonic()
+                pending = [completions[run_id] for run_id in tails]
+                concurrent.futures.wait(pending, timeout=max(delay, 0), return_when="FIRST_COMPLETED")
+        finally:
+            # A shared waiter may be waiting for the runs on behalf of others.
+            if self._owns_waiter:
+                for run_id in tails:
+                    completions[run_id].cancel()
+
+    def close(self) -> None:
+        """Stop following the logs and release the threads, including the
+        ones of the waiter if the follower created it."""
+
+        self._closed.set()
+        self._workers.shutdown()
+        if self._owns_waiter:
+            self.waiter.close()
+
+    def __enter__(self) -> "LogFollower":
+        """Use the follower as a context manager that closes it on exit."""
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Close the follower when exiting the context manager."""
+
+        self.close()
@@ -4,7 +4,6 @@ import os
 from enum import Enum
 from typing import Any, Dict, List, Optional
 
-import yaml
 from pydantic import Field
 
 from nextmv.base_model import BaseModel
@@ -151,6 +150,8 @@ class Manifest(BaseModel):
 
         """
 
+        import yaml
+
         with open(os.path.join(dirpath, FILE_NAME)) as file:
             raw_manifest = yaml.safe_load(file)
 
@@ -167,5 +168,7 @@ class Manifest(BaseModel):
 
         """
 
+        import yaml
+
         with open(os.path.join(dirpath, FILE_NAME), "w") as file:
             yaml.dump(self.to_dict(), file)
@@ -0,0 +1,398 @@
+"""This module contains the instrumentation of the requests made with a
+`Client`: a record per request, and an in-process registry that aggregates
+them into histograms and exposes them in the Prometheus text format."""
+
+import bisect
+import threading
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse
+
+PRESIGNED_ENDPOINT = "{presigned_url}"
+"""Endpoint template of the requests to presigned URLs."""
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+"""Default upper bounds, in seconds, of the latency histogram buckets."""
+
+_ID_SEGMENTS: Dict[str, str] = {
+    "acceptance": "acceptance_test_id",
+    "applications": "application_id",
+    "batch": "batch_id",
+    "inputsets": "input_set_id",
+    "instances": "instance_id",
+    "runs": "run_id",
+    "versions": "version_id",
+}
+"""Path segments that are followed by the ID of a resource, and the name of
+the placeholder that replaces the ID in endpoint templates."""
+
+_ACTION_SEGMENTS = {"uploadurl"}
+"""Path segments that follow a collection but are not IDs."""
+
+
+@dataclass
+class RequestRecord:
+    """Record of a single HTTP request made with a `Client`."""
+
+    method: str
+    """HTTP method of the request."""
+    endpoint: str
+    """Endpoint template of the request, with the IDs replaced by
+    placeholders, e.g.: `v1/applications/{application_id}/runs/{run_id}/metadata`."""
+    url: str
+    """URL of the request, without the query string."""
+    start_time: float
+    """Time at which the request started, in seconds since the epoch."""
+    latency: float
+    """Time until the response was received, or the request failed, in
+    seconds. For streamed downloads, it includes reading the whole body."""
+    status_code: Optional[int] = None
+    """Status code of the response, if one was received."""
+    bytes_sent: int = 0
+    """Size of the request body, in bytes."""
+    bytes_received: int = 0
+    """Size of the response body as received over the wire, in bytes."""
+    retries: int = 0
+    """Number of retries performed by the connection before getting the
+    response."""
+    error: Optional[str] = None
+    """Name of the exception raised, if the request failed without a
+    response."""
+
+    @property
+    def end_time(self) -> float:
+        """Time at which the request finished, in seconds since the epoch."""
+
+        return self.start_time + self.latency
+
+    def span_name(self) -> str:
+        """
+        Name of the span that represents the request, following the
+        OpenTelemetry conventions for HTTP clients.
+
+        Returns:
+            The name of the span.
+        """
+
+        return f"{self.method} {self.endpoint}"
+
+    def span_attributes(self) -> Dict[str, Any]:
+        """
+        Attributes of the span that represents the request, following the
+        OpenTelemetry semantic conventions for HTTP clients.
+
+        Returns:
+            The attributes.
+        """
+
+        attributes: Dict[str, Any] = {
+            "http.request.method": self.method,
+            "url.full": self.url,
+            "url.template": self.endpoint,
+            "http.request.body.size": self.bytes_sent,
+            "http.response.body.size": self.bytes_received,
+            "http.request.resend_count": self.retries,
+        }
+        if self.status_code is not None:
+            attributes["http.response.status_code"] = self.status_code
+        if self.error is not None:
+            attributes["error.type"] = self.error
+
+        return attributes
+
+
+RequestHook = Callable[[RequestRecord], None]
+"""Callback invoked with the record of every request made with a `Client`."""
+
+
+def endpoint_template(url: str, api_url: str) -> str:
+    """
+    Obtain the endpoint template of a URL, replacing the IDs of resources by
+    placeholders, so that requests to the same endpoint can be aggregated.
+
+    Args:
+        url: URL of the request.
+        api_url: URL of the Nextmv Cloud API. Requests to any other host are
+            requests to presigned URLs.
+
+    Returns:
+        The endpoint template.
+    """
+
+    parsed = urlparse(url)
+    if parsed.netloc != urlparse(api_url).netloc:
+        return PRESIGNED_ENDPOINT
+
+    segments = [segment for segment in parsed.path.split("/") if segment != ""]
+    template = []
+    for i, segment in enumerate(segments):
+        previous = segments[i - 1] if i > 0 else None
+        if previous in _ID_SEGMENTS and segment not in _ACTION_SEGMENTS:
+            segment = "{" + _ID_SEGMENTS[previous] + "}"
+        template.append(segment)
+
+    return "/".join(template)
+
+
+class Histogram:
+    """
+    Histogram of observed values. It keeps cumulative bucket counts, for the
+    Prometheus exposition, and a window with the most recent observations,
+    for computing percentiles.
+
+    Parameters
+    ----------
+    buckets : Tuple[float, ...], optional
+        Upper bounds of the buckets. Default is `DEFAULT_BUCKETS`.
+    window : int, optional
+        Number of recent observations kept for computing percentiles.
+        Default is 1024.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value.
+        """
+
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self._recent.append(value)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Compute a percentile of the recent observations.
+
+        Args:
+            q: Percentile to compute, between 0 and 100.
+
+        Returns:
+            The percentile, or None if there are no observations.
+        """
+
+        return _percentile(sorted(self._recent), q)
+
+    def recent(self) -> List[float]:
+        """
+        Most recent observations, oldest first.
+
+        Returns:
+            The observations kept in the window.
+        """
+
+        return list(self._recent)
+
+    def cumulative_counts(self) -> List[int]:
+        """
+        Number of observations less than or equal to the upper bound of each
+        bucket.
+
+        Returns:
+            The cumulative counts, one per bucket.
+        """
+
+        cumulative, total = [], 0
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+
+        return cumulative
+
+
+class MetricsRegistry:
+    """
+    In-process registry of request metrics. It is a request hook: pass it in
+    `Client.request_hooks` to aggregate the requests made with the client.
+    Latencies are kept in a histogram per method and endpoint template, and
+    requests, retries and bytes transferred are counted per method, endpoint
+    template and status code.
+
+    Parameters
+    ----------
+    buckets : Tuple[float, ...], optional
+        Upper bounds, in seconds, of the latency histogram buckets. Default
+        is `DEFAULT_BUCKETS`.
+    window : int, optional
+        Number of recent latencies kept per endpoint for computing
+        percentiles. Default is 1024.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, window: int = 1024):
+        self.buckets = buckets
+        self.window = window
+        self._latencies: Dict[Tuple[str, str], Histogram] = {}
+        self._counters: Dict[Tuple[str, str, str], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record: RequestRecord) -> None:
+        """Record a request. This makes the registry usable as a request
+        hook."""
+
+        self.record(record)
+
+    def record(self, record: RequestRecord) -> None:
+        """
+        Record a request.
+
+        Args:
+            record: Record of the request.
+        """
+
+        status = str(record.status_code) if record.status_code is not None else "error"
+        with self._lock:
+            histogram = self._latencies.get((record.method, record.endpoint))
+            if histogram is None:
+                histogram = Histogram(buckets=self.buckets, window=self.window)
+                self._latencies[(record.method, record.endpoint)] = histogram
+            histogram.observe(record.latency)
+
+            counters = self._counters.setdefault((record.method, record.endpoint, status), [0, 0, 0, 0])
+            counters[0] += 1
+            counters[1] += record.retries
+            counters[2] += record.bytes_sent
+            counters[3] += record.bytes_received
+
+    def percentile(self, q: float, method: Optional[str] = None, endpoint: Optional[str] = None) -> Optional[float]:
+        """
+        Compute a percentile of the recent latencies, in seconds.
+
+        Args:
+            q: Percentile to compute, between 0 and 100.
+            method: Only consider requests with this HTTP method.
+            endpoint: Only consider requests to this endpoint template.
+
+        Returns:
+            The percentile, or None if there are no matching requests.
+        """
+
+        with self._lock:
+            values = [
+                value
+                for (m, e), histogram in self._latencies.items()
+                if (method is None or m == method) and (endpoint is None or e == endpoint)
+                for value in histogram.recent()
+            ]
+
+        return _percentile(sorted(values), q)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Summarize the metrics per method and endpoint template.
+
+        Returns:
+            One dictionary per method and endpoint template, with the number
+            of requests, errors, retries, bytes transferred and latency
+            percentiles.
+        """
+
+        with self._lock:
+            latencies = dict(self._latencies)
+            counters = dict(self._counters)
+
+        summary = []
+        for (method, endpoint), histogram in sorted(latencies.items()):
+            matching = [(s, c) for (m, e, s), c in counters.items() if m == method and e == endpoint]
+            summary.append(
+                {
+                    "method": method,
+                    "endpoint": endpoint,
+                    "requests": histogram.count,
+                    "errors": sum(c[0] for s, c in matching if s == "error" or int(s) >= 400),
+                    "retries": sum(c[1] for _, c in matching),
+                    "bytes_sent": sum(c[2] for _, c in matching),
+                    "bytes_received": sum(c[3] for _, c in matching),
+                    "latency_p50": histogram.percentile(50),
+                    "latency_p95": histogram.percentile(95),
+                    "latency_p99": histogram.percentile(99),
+                }
+            )
+
+        return summary
+
+    def to_prometheus(self, prefix: str = "nextmv_client") -> str:
+        """
+        Expose the metrics in the Prometheus text format.
+
+        Args:
+            prefix: Prefix of the metric names.
+
+        Returns:
+            The metrics, in the Prometheus text exposition format.
+        """
+
+        with self._lock:
+            latencies = sorted(self._latencies.items())
+            counters = sorted(self._counters.items())
+
+        lines = [
+            f"# HELP {prefix}_request_duration_seconds Latency of the requests.",
+            f"# TYPE {prefix}_request_duration_seconds histogram",
+        ]
+        for (method, endpoint), histogram in latencies:
+            labels = _labels(method=method, endpoint=endpoint)
+            name = f"{prefix}_request_duration_seconds"
+            for bound, count in zip(histogram.buckets, histogram.cumulative_counts()):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        counter_metrics = [
+            ("requests_total", "Number of requests."),
+            ("request_retries_total", "Number of retries performed by the connections."),
+            ("request_sent_bytes_total", "Bytes sent in request bodies."),
+            ("request_received_bytes_total", "Bytes received in response bodies."),
+        ]
+        for index, (suffix, description) in enumerate(counter_metrics):
+            lines.extend(_counter_lines(f"{prefix}_{suffix}", description, counters, index))
+
+        return "\n".join(lines) + "\n"
+
+
+def _counter_lines(
+    name: str,
+    description: str,
+    counters: Iterable[Tuple[Tuple[str, str, str], List[int]]],
+    index: int,
+) -> List[str]:
+    """Lines of the Prometheus exposition of a counter."""
+
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} counter"]
+    for (method, endpoint, status), values in counters:
+        lines.append(f"{name}{{{_labels(method=method, endpoint=endpoint, status=status)}}} {values[index]}")
+
+    return lines
+
+
+def _labels(**labels: str) -> str:
+    """Formats Prometheus labels, escaping their values."""
+
+    escaped = {key: value.replace("\\", "\\\\").replace('"', '\\"') for key, value in labels.items()}
+    return ",".join(f'{key}="{value}"' for key, value in escaped.items())
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    """Percentile of sorted values, interpolating linearly between the
+    closest ranks."""
+
+    if not values:
+        return None
+
+    rank = (len(values) - 1) * q / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(values) - 1)
+
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
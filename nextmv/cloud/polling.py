@@ -0,0 +1,294 @@
+"""This module contains the schedules that decide when a run is polled, and
+the model of run durations used by the adaptive schedule."""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Deque, Dict, Optional, Tuple
+
+from nextmv.cloud.metrics import _percentile
+from nextmv.cloud.status import StatusV2
+
+if TYPE_CHECKING:
+    from nextmv.cloud.application import AdaptivePollingOptions, Metadata, PollingOptions
+
+
+class PollingSchedule:
+    """
+    Schedule of the polls of a run, following the static strategy of
+    `PollingOptions`: a first poll after `initial_delay`, then polls every
+    `delay` seconds, multiplied by `backoff` after each poll and capped at
+    `max_delay`. The same schedule drives the synchronous, asyncio and
+    multi-run polling loops.
+
+    Parameters
+    ----------
+    run_id : str
+        ID of the run.
+    options : PollingOptions
+        Options of the polling strategy.
+    """
+
+    def __init__(self, run_id: str, options: "PollingOptions"):
+        self.run_id = run_id
+        self.options = options
+        self.tries = 0
+        self.delay = options.delay
+
+    def first_delay(self) -> float:
+        """Delay, in seconds, before the first poll."""
+
+        return self.options.initial_delay
+
+    def next_delay(self, metadata: Optional["Metadata"] = None) -> float:
+        """
+        Delay, in seconds, before the next poll of a run that did not finish.
+
+        Parameters
+        ----------
+        metadata : Metadata, optional
+            Metadata of the run returned by the last poll, if it was polled
+            individually.
+
+        Returns
+        -------
+        float
+            Delay before the next poll.
+
+        Raises
+        ------
+        TimeoutError
+            If the polling strategy is exhausted based on time duration.
+        RuntimeError
+            If the polling strategy is exhausted based on number of tries.
+        """
+
+        if self.delay > self.options.max_duration:
+            raise TimeoutError(f"run {self.run_id} did not succeed after {self.delay} seconds")
+
+        self._count_try()
+
+        return self._static_delay()
+
+    def finished(self, metadata: "Metadata") -> None:
+        """
+        Record that the run finished.
+
+        Parameters
+        ----------
+        metadata : Metadata
+            Metadata of the finished run.
+        """
+
+    def _count_try(self) -> None:
+        """Counts a poll, failing once the tries are exhausted."""
+
+        self.tries += 1
+        if self.tries >= self.options.max_tries:
+            raise RuntimeError(f"run {self.run_id} did not succeed after {self.options.max_tries} tries")
+
+    def _static_delay(self) -> float:
+        """Next delay of the static strategy: capped, then increased by the
+        backoff factor."""
+
+        delay = min(self.delay, self.options.max_delay)
+        self.delay *= self.options.backoff
+
+        return delay
+
+
+class DurationModel:
+    """
+    Model of the duration of runs, learned from the runs that finished. The
+    duration is modeled per instance as a linear function of the input size,
+    fitted by least squares over the last `window` runs, and the spread of
+    the residuals gives the interval in which a run is expected to finish.
+
+    The model is thread-safe, so it can be shared by every polling loop.
+
+    Parameters
+    ----------
+    window : int, optional
+        Number of runs, per instance, that the model learns from. Default is
+        100.
+    min_observations : int, optional
+        Number of runs of an instance needed before predicting the duration
+        of its runs. Default is 3.
+    low_quantile : float, optional
+        Quantile of the residuals giving the earliest expected finish.
+        Default is 0.1.
+    high_quantile : float, optional
+        Quantile of the residuals giving the latest expected finish. Default
+        is 0.9.
+    """
+
+    def __init__(
+        self,
+        window: int = 100,
+        min_observations: int = 3,
+        low_quantile: float = 0.1,
+        high_quantile: float = 0.9,
+    ):
+        self.window = window
+        self.min_observations = min_observations
+        self.low_quantile = low_quantile
+        self.high_quantile = high_quantile
+        self._observations: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, instance_id: str, input_size: float, duration: float) -> None:
+        """
+        Learn from a run that finished.
+
+        Parameters
+        ----------
+        instance_id : str
+            ID of the instance the run was executed on.
+        input_size : float
+            Size of the input of the run, in bytes.
+        duration : float
+            Duration of the run, in seconds.
+        """
+
+        with self._lock:
+            observations = self._observations.setdefault(instance_id, deque(maxlen=self.window))
+            observations.append((input_size, duration))
+
+    def predict(self, instance_id: str, input_size: float) -> Optional[Tuple[float, float]]:
+        """
+        Predict the interval in which a run is expected to finish.
+
+        Parameters
+        ----------
+        instance_id : str
+            ID of the instance the run is executed on.
+        input_size : float
+            Size of the input of the run, in bytes.
+
+        Returns
+        -------
+        Optional[Tuple[float, float]]
+            Earliest and latest expected durations, in seconds, or None if
+            there are not enough runs of the instance to learn from.
+        """
+
+        with self._lock:
+            observations = list(self._observations.get(instance_id, ()))
+
+        if len(observations) < max(self.min_observations, 1):
+            return None
+
+        n = len(observations)
+        mean_size = sum(size for size, _ in observations) / n
+        mean_duration = sum(duration for _, duration in observations) / n
+        variance = sum((size - mean_size) ** 2 for size, _ in observations)
+        slope = 0.0
+        if variance > 0:
+            slope = sum((size - mean_size) * (duration - mean_duration) for size, duration in observations) / variance
+
+        residuals = sorted(duration - mean_duration - slope * (size - mean_size) for size, duration in observations)
+        expected = mean_duration + slope * (input_size - mean_size)
+        low = expected + _percentile(residuals, self.low_quantile * 100)
+        high = expected + _percentile(residuals, self.high_quantile * 100)
+
+        return max(low, 0.0), max(high, 0.0)
+
+
+class AdaptivePollingSchedule(PollingSchedule):
+    """
+    Schedule of the polls of a run that uses a `DurationModel` to poll near
+    the predicted completion of the run: a single sparse wait until the
+    earliest expected finish, `finish_polls` polls spread over the interval
+    in which the run is expected to finish, and the static strategy after
+    that. Runs that are not running yet, or whose instance has no
+    prediction, follow the static strategy. The time budget is measured from
+    the creation of the schedule.
+
+    The predicted durations only cover the execution of the runs, so the
+    time a run has been executing is measured from the last poll that saw it
+    waiting to start, or from its creation if it was running when first
+    polled.
+
+    Parameters
+    ----------
+    run_id : str
+        ID of the run.
+    options : AdaptivePollingOptions
+        Options of the polling strategy, including the duration model.
+    """
+
+    def __init__(self, run_id: str, options: "AdaptivePollingOptions"):
+        super().__init__(run_id=run_id, options=options)
+        self.started_at = time.monotonic()
+        self.metadata: Optional[Metadata] = None
+        self.waiting_at: Optional[float] = None
+        self.running_since: Optional[float] = None
+
+    def next_delay(self, metadata: Optional["Metadata"] = None) -> float:
+        elapsed = time.monotonic() - self.started_at
+        if elapsed > self.options.max_duration:
+            raise TimeoutError(f"run {self.run_id} did not succeed after {elapsed} seconds")
+
+        self._count_try()
+        if metadata is not None:
+            self.__observe(metadata)
+
+        delay = self._predicted_delay()
+        if delay is None:
+            return self._static_delay()
+
+        return min(delay, self.options.max_delay, self.options.max_duration - elapsed)
+
+    def finished(self, metadata: "Metadata") -> None:
+        if metadata.status_v2 == StatusV2.succeeded:
+            self.options.duration_model.observe(
+                instance_id=metadata.application_instance_id,
+                input_size=metadata.input_size,
+                duration=metadata.duration / 1000,
+            )
+
+    def __observe(self, metadata: "Metadata") -> None:
+        """Records the metadata returned by a poll, and the time from which
+        the run is executing."""
+
+        self.metadata = metadata
+        now = time.monotonic()
+        if metadata.status_v2 != StatusV2.running:
+            self.waiting_at = now
+        elif self.running_since is None:
+            self.running_since = self.waiting_at if self.waiting_at is not None else now - _age(metadata.created_at)
+
+    def _predicted_delay(self) -> Optional[float]:
+        """Delay before the next poll based on the predicted completion of
+        the run, or None once the prediction does not apply."""
+
+        metadata = self.metadata
+        if metadata is None or metadata.status_v2 != StatusV2.running:
+            return None
+
+        prediction = self.options.duration_model.predict(
+            instance_id=metadata.application_instance_id,
+            input_size=metadata.input_size,
+        )
+        if prediction is None:
+            return None
+
+        low, high = prediction
+        cadence = max((high - low) / max(self.options.finish_polls, 1), self.options.min_delay)
+        executing = time.monotonic() - self.running_since
+        if executing < low:
+            return low - executing
+        if executing < high + cadence:
+            return cadence
+
+        return None
+
+
+def _age(created_at: datetime) -> float:
+    """Seconds elapsed since the given time. Naive times are taken as UTC."""
+
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+
+    return max((datetime.now(timezone.utc) - created_at).total_seconds(), 0.0)
@@ -0,0 +1,275 @@
+"""This module contains the client-side rate limiter shared by all the
+requests made with a `Client`."""
+
+import email.utils
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from enum import Enum
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+THROTTLE_STATUS_CODES = (429, 503)
+"""Status codes with which the server signals that requests must slow
+down."""
+
+
+class EndpointClass(str, Enum):
+    """Class of an endpoint, used to apply separate limits to different kinds
+    of requests."""
+
+    submission = "submission"
+    """Submitting runs and uploading their inputs."""
+    polling = "polling"
+    """Checking on runs: metadata, logs and the account queue."""
+    download = "download"
+    """Retrieving run results and inputs, and downloading from presigned
+    URLs."""
+    default = "default"
+    """Any other request."""
+
+
+@dataclass
+class EndpointLimit:
+    """Limits that apply to a class of endpoints."""
+
+    rate: float
+    """Maximum sustained number of requests per second."""
+    burst: int
+    """Maximum number of requests that can be sent at once after a period of
+    inactivity."""
+    max_concurrency: int
+    """Upper bound for the number of requests in flight. The actual bound
+    adapts between `min_concurrency` and this value."""
+    min_concurrency: int = 1
+    """Lower bound for the number of requests in flight."""
+
+
+DEFAULT_LIMITS: Dict[EndpointClass, EndpointLimit] = {
+    EndpointClass.submission: EndpointLimit(rate=20, burst=20, max_concurrency=16),
+    EndpointClass.polling: EndpointLimit(rate=50, burst=50, max_concurrency=32),
+    EndpointClass.download: EndpointLimit(rate=20, burst=20, max_concurrency=16),
+    EndpointClass.default: EndpointLimit(rate=20, burst=20, max_concurrency=16),
+}
+"""Default limits for each class of endpoints."""
+
+
+def classify(method: str, url: str, api_url: str) -> EndpointClass:
+    """
+    Classify a request into an endpoint class.
+
+    Args:
+        method: HTTP method of the request.
+        url: URL of the request.
+        api_url: URL of the Nextmv Cloud API. Requests to any other host are
+            transfers to presigned URLs.
+
+    Returns:
+        The class of the endpoint.
+    """
+
+    parsed = urlparse(url)
+    method = method.upper()
+    if parsed.netloc != urlparse(api_url).netloc:
+        return EndpointClass.submission if method == "PUT" else EndpointClass.download
+
+    segments = [segment for segment in parsed.path.split("/") if segment != ""]
+    if method == "POST" and segments[-1:] == ["runs"] or segments[-2:] == ["runs", "uploadurl"]:
+        return EndpointClass.submission
+
+    if method != "GET":
+        return EndpointClass.default
+
+    if segments[-1:] in (["metadata"], ["logs"], ["queue"]):
+        return EndpointClass.polling
+
+    if segments[-2:-1] == ["runs"] or segments[-3:-2] == ["runs"] and segments[-1] == "input":
+        return EndpointClass.download
+
+    return EndpointClass.default
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse the value of a Retry-After header, given either in seconds or as an
+    HTTP date.
+
+    Args:
+        value: Value of the header.
+
+    Returns:
+        Number of seconds to wait, or None if the value is missing or
+        invalid.
+    """
+
+    if value is None or value.strip() == "":
+        return None
+
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class _EndpointState:
+    """Token bucket and adaptive concurrency of a class of endpoints."""
+
+    def __init__(self, limit: EndpointLimit):
+        self.limit = limit
+        self.tokens = float(limit.burst)
+        self.refilled_at = time.monotonic()
+        self.concurrency = float(limit.max_concurrency)
+        self.in_flight = 0
+        self.decreased_at = 0.0
+
+    def refill(self, now: float) -> None:
+        """Adds the tokens accrued since the last refill."""
+
+        self.tokens = min(self.limit.burst, self.tokens + (now - self.refilled_at) * self.limit.rate)
+        self.refilled_at = now
+
+
+class RateLimiter:
+    """
+    Client-side rate limiter shared by all the threads that use a `Client`.
+    Each class of endpoints has a token bucket that bounds the request rate,
+    and a bound on the requests in flight that adapts with AIMD (additive
+    increase, multiplicative decrease): every successful request increases
+    the bound slightly, and a throttled response (429 or 503) halves it.
+    Throttled responses also pause every caller until the time indicated by
+    the `Retry-After` header, or a backoff when it is missing, so concurrent
+    callers back off together instead of retrying independently.
+
+    Parameters
+    ----------
+    limits : Dict[EndpointClass, EndpointLimit], optional
+        Limits for each class of endpoints. Classes not given use
+        `DEFAULT_LIMITS`.
+    decrease_factor : float, optional
+        Factor by which the concurrency bound is multiplied when a request is
+        throttled. Default is 0.5.
+    backoff : float, optional
+        Pause, in seconds, applied when a throttled response does not have a
+        `Retry-After` header. Default is 1.
+    max_pause : float, optional
+        Maximum pause, in seconds, applied after a throttled response.
+        Default is 60.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[EndpointClass, EndpointLimit]] = None,
+        decrease_factor: float = 0.5,
+        backoff: float = 1,
+        max_pause: float = 60,
+    ):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.decrease_factor = decrease_factor
+        self.backoff = backoff
+        self.max_pause = max_pause
+        self._states = {endpoint_class: _EndpointState(limit) for endpoint_class, limit in self.limits.items()}
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def concurrency(self, endpoint_class: EndpointClass) -> int:
+        """
+        Current bound for the requests in flight of a class of endpoints.
+
+        Args:
+            endpoint_class: Class of endpoints.
+
+        Returns:
+            The bound.
+        """
+
+        with self._condition:
+            return int(self._states[endpoint_class].concurrency)
+
+    def acquire(self, endpoint_class: EndpointClass) -> float:
+        """
+        Block until a request of the given class can be sent: no pause is in
+        effect, a token is available and the number of requests in flight is
+        below the adaptive bound. Every call must be followed by a call to
+        `release`.
+
+        Args:
+            endpoint_class: Class of the request.
+
+        Returns:
+            Time at which the request was admitted, to be given to `release`.
+        """
+
+        state = self._states[endpoint_class]
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                state.refill(now)
+                wait = self._paused_until - now
+                if wait <= 0 and state.in_flight >= int(state.concurrency):
+                    wait = None
+                elif wait <= 0 and state.tokens < 1:
+                    wait = (1 - state.tokens) / state.limit.rate
+                elif wait <= 0:
+                    state.tokens -= 1
+                    state.in_flight += 1
+                    return now
+
+                self._condition.wait(timeout=wait)
+
+    def release(
+        self,
+        endpoint_class: EndpointClass,
+        admitted_at: float,
+        status_code: Optional[int] = None,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """
+        Record the outcome of a request admitted with `acquire`.
+
+        Args:
+            endpoint_class: Class of the request.
+            admitted_at: Value returned by `acquire`.
+            status_code: Status code of the response, or None if the request
+                failed without a response.
+            retry_after: Value of the `Retry-After` header of the response,
+                if any.
+        """
+
+        state = self._states[endpoint_class]
+        with self._condition:
+            state.in_flight -= 1
+            if status_code in THROTTLE_STATUS_CODES:
+                self._throttle(state, admitted_at, parse_retry_after(retry_after))
+            elif status_code is not None and status_code < 500:
+                state.concurrency = min(
+                    float(state.limit.max_concurrency),
+                    state.concurrency + 1 / max(state.concurrency, 1),
+                )
+
+            self._condition.notify_all()
+
+    def _throttle(self, state: _EndpointState, admitted_at: float, retry_after: Optional[float]) -> None:
+        """Reacts to a throttled response. Requests that were admitted before
+        the last decrease belong to the same congestion event and do not
+        decrease the bound again."""
+
+        now = time.monotonic()
+        pause = min(retry_after if retry_after is not None else self.backoff, self.max_pause)
+        self._paused_until = max(self._paused_until, now + pause)
+
+        if admitted_at < state.decreased_at:
+            return
+
+        state.concurrency = max(float(state.limit.min_concurrency), state.concurrency * self.decrease_factor)
+        state.decreased_at = now
@@ -0,0 +1,249 @@
+"""This module contains a router that spreads the runs of an application over
+several equivalent instances according to the state of the account queue."""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from nextmv.cloud.account import Account, QueuedRun
+from nextmv.cloud.application import Application
+from nextmv.cloud.status import StatusV2
+from nextmv.logger import log
+
+
+@dataclass
+class _InstanceLoad:
+    """Load of an instance, according to the last snapshot of the queue."""
+
+    queued: int = 0
+    """Number of runs of the instance waiting to start."""
+    running: int = 0
+    """Number of runs of the instance executing."""
+    wait_per_run: Optional[float] = None
+    """Exponentially weighted moving average of the time, in seconds, that a
+    run waited in the queue for each run ahead of it, including itself. None
+    until a run of the instance was seen leaving the queue."""
+    submitted: List[float] = field(default_factory=list)
+    """Times at which runs were routed to the instance and are not in the
+    snapshot of the queue yet."""
+
+
+class InstanceRouter:
+    """
+    Routes the runs of an application to the instance, among several
+    equivalent ones, where they are expected to start the soonest.
+
+    The queue of the account is fetched every `refresh_interval` seconds in a
+    background thread. For every instance, the router keeps the number of
+    queued runs and a moving average of the time a run waits for each run
+    ahead of it, learned from the runs seen leaving the queue. A run is routed
+    to the instance with the lowest expected wait, that is, the number of runs
+    ahead of it, plus one, times that average. Instances whose wait was not
+    observed yet use `default_wait_per_run`. Runs routed since the last
+    snapshot are counted right away, so that a burst of submissions is spread
+    over the instances instead of all going to the one that was idle.
+
+    The router can be used as a context manager, which stops the background
+    thread on exit.
+
+    Parameters
+    ----------
+    application : Application
+        Application the runs are submitted to.
+    account : Account
+        Account whose queue is observed.
+    instance_ids : List[str]
+        IDs of the equivalent instances to route the runs to.
+    refresh_interval : float, optional
+        Time between fetches of the queue, in seconds. Default is 2.
+    smoothing : float, optional
+        Weight of the latest observation in the moving average of the wait
+        times, between 0 and 1. Default is 0.2.
+    default_wait_per_run : float, optional
+        Wait per run ahead, in seconds, assumed for instances whose wait was
+        not observed yet. Default is 1.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        account: Account,
+        instance_ids: List[str],
+        refresh_interval: float = 2,
+        smoothing: float = 0.2,
+        default_wait_per_run: float = 1,
+    ):
+        if not instance_ids:
+            raise ValueError("at least one instance ID is required to route runs")
+
+        self.application = application
+        self.account = account
+        self.instance_ids = list(instance_ids)
+        self.refresh_interval = refresh_interval
+        self.smoothing = smoothing
+        self.default_wait_per_run = default_wait_per_run
+        self._loads = {instance_id: _InstanceLoad() for instance_id in self.instance_ids}
+        self._queued: Dict[str, QueuedRun] = {}
+        self._ahead: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._refresher = threading.Thread(target=self.__refresh_periodically, name="nextmv-router", daemon=True)
+        self._refresher.start()
+
+    def route(self) -> str:
+        """
+        Choose the instance for a new run, and count the run as queued on it
+        until it appears in the queue.
+
+        Returns:
+            ID of the instance where the run is expected to start the
+            soonest. Ties go to the instance with the fewest running runs,
+            then to the first one in `instance_ids`.
+        """
+
+        with self._lock:
+            instance_id = min(self.instance_ids, key=self.__cost)
+            self._loads[instance_id].submitted.append(time.monotonic())
+
+        return instance_id
+
+    def expected_wait(self, instance_id: str) -> float:
+        """
+        Expected time, in seconds, before a new run starts on an instance.
+
+        Args:
+            instance_id: ID of the instance.
+
+        Returns:
+            The expected wait.
+        """
+
+        with self._lock:
+            return self.__cost(instance_id)[0]
+
+    def new_run(self, **kwargs: Any) -> str:
+        """
+        Submit a run to the instance chosen by `route`.
+
+        Args:
+            **kwargs: Arguments of `Application.new_run`, except for
+                `instance_id`.
+
+        Returns:
+            ID of the run.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        return self.application.new_run(instance_id=self.route(), **kwargs)
+
+    def refresh(self) -> None:
+        """
+        Fetch the queue of the account and update the load of the instances.
+
+        Raises:
+            requests.HTTPError: If the response status code is not 2xx.
+        """
+
+        fetched_at = time.monotonic()
+        queue = self.account.queue()
+        now = datetime.now(timezone.utc)
+        runs = {
+            run.id: run
+            for run in queue.runs
+            if run.application_id == self.application.id and run.application_instance_id in self._loads
+        }
+
+        with self._lock:
+            for run_id, run in self._queued.items():
+                if run_id in runs and runs[run_id].status_v2 == StatusV2.queued:
+                    continue
+                # The run left the queue: it waited for the runs ahead of it.
+                waited = max((now - _utc(run.created_at)).total_seconds(), 0)
+                self.__observe(run.application_instance_id, waited / (self._ahead[run_id] + 1))
+
+            loads = {instance_id: _InstanceLoad() for instance_id in self.instance_ids}
+            queued = sorted(
+                (run for run in runs.values() if run.status_v2 == StatusV2.queued),
+                key=lambda run: _utc(run.created_at),
+            )
+            # The runs ahead of a run are counted when it is first seen.
+            ahead = {}
+            for run in queued:
+                load = loads[run.application_instance_id]
+                ahead[run.id] = self._ahead.get(run.id, load.queued)
+                load.queued += 1
+            for run in runs.values():
+                if run.status_v2 == StatusV2.running:
+                    loads[run.application_instance_id].running += 1
+
+            for instance_id, load in loads.items():
+                previous = self._loads[instance_id]
+                load.wait_per_run = previous.wait_per_run
+                # Runs routed while the queue was being fetched may not be in it.
+                load.submitted = [t for t in previous.submitted if t >= fetched_at]
+
+            self._loads = loads
+            self._queued = {run.id: run for run in queued}
+            self._ahead = ahead
+
+    def close(self) -> None:
+        """Stop refreshing the queue in the background."""
+
+        self._stopped.set()
+        self._refresher.join()
+
+    def __enter__(self) -> "InstanceRouter":
+        """Use the router as a context manager that closes it on exit."""
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Close the router when exiting the context manager."""
+
+        self.close()
+
+    def __cost(self, instance_id: str) -> Tuple[float, int]:
+        """Sort key of an instance for routing: the expected wait of a new
+        run, then the number of running runs. Must be called while holding
+        the lock."""
+
+        load = self._loads[instance_id]
+        wait_per_run = load.wait_per_run if load.wait_per_run is not None else self.default_wait_per_run
+        ahead = load.queued + len(load.submitted)
+
+        return ((ahead + 1) * wait_per_run, load.running)
+
+    def __observe(self, instance_id: str, wait_per_run: float) -> None:
+        """Updates the moving average of the wait per run of an instance.
+        Must be called while holding the lock."""
+
+        load = self._loads[instance_id]
+        if load.wait_per_run is None:
+            load.wait_per_run = wait_per_run
+        else:
+            load.wait_per_run += self.smoothing * (wait_per_run - load.wait_per_run)
+
+    def __refresh_periodically(self) -> None:
+        """Loop of the background thread. Failures are logged and the
+        previous snapshot is kept until the next refresh."""
+
+        while not self._stopped.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                log(f"could not refresh the queue to route runs: {e}")
+
+            self._stopped.wait(self.refresh_interval)
+
+
+def _utc(value: datetime) -> datetime:
+    """Date in UTC. Naive dates are taken as UTC."""
+
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+
+    return value
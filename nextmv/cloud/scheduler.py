@@ -0,0 +1,339 @@
+"""This module contains a scheduler that admits the submissions of runs by
+priority and deadline, within limits of runs in flight per instance and
+execution class."""
+
+import concurrent.futures
+import contextlib
+import functools
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+
+from nextmv.cloud._futures import complete
+from nextmv.cloud.account import Account
+from nextmv.cloud.application import _DEFAULT_POLLING_OPTIONS, Application, Configuration, PollingOptions
+from nextmv.cloud.executor import RunFuture
+from nextmv.cloud.waiter import RunWaiter
+
+SlotKey = Tuple[str, Optional[str]]
+"""Key of the slots of runs in flight: the ID of the instance and the
+execution class, if the run sets one."""
+
+
+@dataclass
+class _Submission:
+    """A submission waiting for a slot, or whose run is in flight."""
+
+    future: RunFuture
+    """Future of the run."""
+    key: SlotKey
+    """Key of the slot the run takes."""
+    run_kwargs: Dict[str, Any]
+    """Arguments of `Application.new_run`."""
+    order: Tuple[float, float, int]
+    """Order of the submission among the pending ones: priority, deadline
+    and sequence number."""
+    deadline_at: float
+    """Monotonic time after which the submission is not submitted anymore."""
+    dispatched: bool = False
+    """Whether the submission took a slot."""
+    released: bool = False
+    """Whether the slot of the submission was released."""
+
+
+class SubmissionScheduler:
+    """
+    Schedules the submissions of runs so that at most a given number of runs
+    are in flight per instance and execution class. Submissions wait in a
+    queue, without blocking the caller, and take a slot by priority, then by
+    deadline, then in the order in which they were made. A slot is released
+    as soon as its run finishes, or fails to be submitted.
+
+    This keeps batch workloads from flooding the queue of the account: with a
+    limit on the instance used by batch jobs, runs submitted with a higher
+    priority, e.g.: real-time requests, go ahead of the pending batch runs.
+
+    Every submission is represented by a `RunFuture`, whose result is the
+    `RunResult` of the run. The runs are waited on with a `RunWaiter`.
+
+    Parameters
+    ----------
+    application : Application
+        Application to submit the runs to.
+    max_in_flight : int, optional
+        Maximum number of runs in flight per instance and execution class,
+        unless set in `limits`. Default is 10.
+    limits : Dict[SlotKey, int], optional
+        Maximum number of runs in flight for some instances and execution
+        classes, keyed by instance ID and execution class. Use None as the
+        execution class for the runs that do not set one.
+    max_workers : int, optional
+        Number of workers performing the HTTP calls. Default is 4.
+    polling_options : PollingOptions, optional
+        Options to use when polling for the results of the runs.
+    account : Account, optional
+        Account whose queue is used to check many runs with a single call.
+        Ignored if `waiter` is given.
+    waiter : RunWaiter, optional
+        Waiter used to wait for the runs, which can be shared. If not given,
+        the scheduler creates its own and closes it on shutdown.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        max_in_flight: int = 10,
+        limits: Optional[Dict[SlotKey, int]] = None,
+        max_workers: int = 4,
+        polling_options: PollingOptions = _DEFAULT_POLLING_OPTIONS,
+        account: Optional[Account] = None,
+        waiter: Optional[RunWaiter] = None,
+    ):
+        self.application = application
+        self.max_in_flight = max_in_flight
+        self.limits = dict(limits or {})
+        self._owns_waiter = waiter is None
+        if waiter is None:
+            waiter = RunWaiter(application=application, account=account, polling_options=polling_options)
+        self.waiter = waiter
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nextmv-scheduler")
+        self._condition = threading.Condition()
+        self._pending: Dict[SlotKey, List[Tuple[Tuple[float, float, int], _Submission]]] = {}
+        self._deadlines: List[Tuple[float, int, _Submission]] = []
+        self._in_flight: Dict[SlotKey, int] = {}
+        self._futures: Dict[RunFuture, _Submission] = {}
+        self._counter = itertools.count()
+        self._shutdown = False
+        self._dispatcher = threading.Thread(target=self.__dispatch, name="nextmv-scheduler", daemon=True)
+        self._dispatcher.start()
+
+    def submit(
+        self,
+        input: Any = None,
+        instance_id: Optional[str] = None,
+        priority: float = 0,
+        deadline: Optional[float] = None,
+        configuration: Optional[Configuration] = None,
+        **kwargs: Any,
+    ) -> RunFuture:
+        """
+        Queue the submission of a run. It does not block: the run is
+        submitted once a slot of its instance and execution class is free.
+
+        Args:
+            input: Input to use for the run.
+            instance_id: ID of the instance to use for the run. If not
+                provided, the default instance of the application is used.
+            priority: Priority of the submission. Submissions with higher
+                priorities take free slots first.
+            deadline: Time, in seconds, within which the run must be
+                submitted. Among submissions with the same priority, the
+                ones with the earliest deadlines take free slots first. If the
+                deadline passes before a slot is free, the run is not
+                submitted and the future fails with a `TimeoutError`.
+            configuration: Configuration to use for the run. Its execution
+                class is part of the key of the slots.
+            **kwargs: Other arguments of `Application.new_run`.
+
+        Returns:
+            Future of the run.
+
+        Raises:
+            RuntimeError: If the scheduler was shut down.
+        """
+
+        instance_id = instance_id or self.application.default_instance_id
+        key = (instance_id, configuration.execution_class if configuration is not None else None)
+        deadline_at = time.monotonic() + deadline if deadline is not None else float("inf")
+        future = RunFuture(application=self.application)
+        submission = _Submission(
+            future=future,
+            key=key,
+            run_kwargs={"input": input, "instance_id": instance_id, "configuration": configuration, **kwargs},
+            order=(-priority, deadline_at, next(self._counter)),
+            deadline_at=deadline_at,
+        )
+
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot submit new runs after shutdown")
+
+            self._futures[future] = submission
+            heapq.heappush(self._pending.setdefault(key, []), (submission.order, submission))
+            if deadline is not None:
+                heapq.heappush(self._deadlines, (deadline_at, submission.order[2], submission))
+            self._condition.notify_all()
+
+        future.add_done_callback(lambda _: self.__done(submission))
+
+        return future
+
+    def in_flight(self, instance_id: str, execution_class: Optional[str] = None) -> int:
+        """
+        Number of runs in flight for an instance and execution class.
+
+        Args:
+            instance_id: ID of the instance.
+            execution_class: Execution class, or None for the runs that do
+                not set one.
+
+        Returns:
+            The number of runs that took a slot and did not finish yet.
+        """
+
+        with self._condition:
+            return self._in_flight.get((instance_id, execution_class), 0)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        """
+        Stop accepting new submissions. The pending submissions are still
+        submitted, unless cancelled.
+
+        Args:
+            wait: Whether to wait for all the runs to finish.
+            cancel_futures: Whether to cancel the pending submissions and the
+                runs in flight.
+        """
+
+        with self._condition:
+            self._shutdown = True
+            futures = list(self._futures)
+            self._condition.notify_all()
+
+        if cancel_futures:
+            for future in futures:
+                with contextlib.suppress(requests.HTTPError):
+                    future.cancel()
+
+        if wait:
+            concurrent.futures.wait(futures)
+            self.__close()
+        else:
+            threading.Thread(target=self.__close, daemon=True).start()
+
+    def __enter__(self) -> "SubmissionScheduler":
+        """Use the scheduler as a context manager that shuts it down on
+        exit, waiting for the runs."""
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Shut down the scheduler when exiting the context manager."""
+
+        self.shutdown(wait=True)
+
+    def __close(self) -> None:
+        """Releases the threads, and the waiter if it is owned, once the
+        dispatcher has submitted every pending run."""
+
+        self._dispatcher.join()
+        with self._condition:
+            futures = list(self._futures)
+        concurrent.futures.wait(futures)
+        if self._owns_waiter:
+            self.waiter.close()
+        self._workers.shutdown()
+
+    def __dispatch(self) -> None:
+        """Loop of the dispatcher thread: gives free slots to the pending
+        submissions, by priority and deadline."""
+
+        while True:
+            with self._condition:
+                submission = self.__next_submission()
+                while submission is None:
+                    if self._shutdown and not self._pending:
+                        return
+                    self._condition.wait(timeout=self.__next_deadline())
+                    submission = self.__next_submission()
+
+                submission.dispatched = True
+                self._in_flight[submission.key] = self._in_flight.get(submission.key, 0) + 1
+
+            on_finished = functools.partial(self.__release, submission)
+            self._workers.submit(
+                submission.future._execute, submission.run_kwargs, self.waiter, self._workers, on_finished
+            )
+
+    def __next_submission(self) -> Optional[_Submission]:
+        """Pops the best pending submission that has a free slot, failing
+        the expired ones. Must be called while holding the condition."""
+
+        self.__expire()
+        best: Optional[_Submission] = None
+        for key in list(self._pending):
+            heap = self._pending[key]
+            # Expired and cancelled submissions are removed once they reach the top.
+            while heap and heap[0][1].future.done():
+                heapq.heappop(heap)
+            if not heap:
+                del self._pending[key]
+                continue
+
+            has_slot = self._in_flight.get(key, 0) < self.limits.get(key, self.max_in_flight)
+            if has_slot and (best is None or heap[0][0] < best.order):
+                best = heap[0][1]
+
+        if best is not None:
+            heapq.heappop(self._pending[best.key])
+            if not self._pending[best.key]:
+                del self._pending[best.key]
+
+        return best
+
+    def __expire(self) -> None:
+        """Fails the pending submissions whose deadline passed, whatever
+        their priority, and discards the deadlines of the submissions that
+        are not pending anymore. Must be called while holding the
+        condition."""
+
+        now = time.monotonic()
+        while self._deadlines:
+            deadline_at, _, submission = self._deadlines[0]
+            pending = not (submission.dispatched or submission.future.done())
+            if pending and deadline_at > now:
+                return
+
+            heapq.heappop(self._deadlines)
+            if pending:
+                deadline_error = TimeoutError(
+                    f"no slot was free for {submission.key} before the deadline of the submission"
+                )
+                complete(submission.future, exception=deadline_error)
+
+    def __next_deadline(self) -> Optional[float]:
+        """Time until the earliest deadline of the pending submissions, or
+        None if they have none. Must be called while holding the
+        condition."""
+
+        self.__expire()
+        if not self._deadlines:
+            return None
+
+        return max(self._deadlines[0][0] - time.monotonic(), 0)
+
+    def __done(self, submission: _Submission) -> None:
+        """Forgets a submission whose future is done, freeing its slot if it
+        still holds it."""
+
+        self.__release(submission)
+        with self._condition:
+            self._futures.pop(submission.future, None)
+            self._condition.notify_all()
+
+    def __release(self, submission: _Submission) -> None:
+        """Frees the slot of a submission, once."""
+
+        with self._condition:
+            if not submission.dispatched or submission.released:
+                return
+
+            submission.released = True
+            self._in_flight[submission.key] -= 1
+            self._condition.notify_all()
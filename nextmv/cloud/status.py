@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import List
 
 
 class Status(str, Enum):
@@ -27,3 +28,12 @@ class StatusV2(str, Enum):
     """Run is running."""
     succeeded = "succeeded"
     """Run succeeded."""
+
+
+_TERMINAL_STATUSES: List[StatusV2] = [
+    StatusV2.succeeded,
+    StatusV2.failed,
+    StatusV2.canceled,
+]
+"""Statuses of a run that has finished executing. The information of such a
+run does not change anymore."""
@@ -0,0 +1,275 @@
+"""This module contains helpers for uploading large run inputs: the
+deduplication of uploads, so that identical inputs are uploaded once and
+referenced afterwards, and a pool of upload URLs acquired ahead of time."""
+
+import calendar
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Deque, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from nextmv.cloud.client import EncodedPayload
+from nextmv.logger import log
+
+if TYPE_CHECKING:
+    from nextmv.cloud.application import UploadURL
+
+_DIGEST_CHUNK_SIZE: int = 1024 * 1024
+"""Size of the chunks in which files are read to compute their digest."""
+
+
+@dataclass
+class _UploadEntry:
+    """An upload of an input."""
+
+    upload_id: str
+    """ID of the upload."""
+    expires_at: float
+    """Monotonic time after which the upload is not reused."""
+
+
+class UploadCache:
+    """
+    In-memory, thread-safe cache of the uploads of run inputs, keyed by the
+    digest of their content. An input that was already uploaded is referenced
+    by its upload ID instead of being uploaded again, until the entry expires.
+    The least recently used entries are evicted first.
+
+    The time to live must be shorter than the time the Nextmv Cloud keeps
+    uploaded inputs. Runs submitted with an upload that is no longer valid
+    are submitted again with a new upload.
+
+    Parameters
+    ----------
+    ttl : float, optional
+        Time, in seconds, during which an upload is reused. Default is 10
+        minutes.
+    max_entries : int, optional
+        Maximum number of uploads remembered. Default is 1024.
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, _UploadEntry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get the upload ID of an input.
+
+        Args:
+            key: Key of the input, derived from its digest.
+
+        Returns:
+            The upload ID, or None if the input was not uploaded or its
+            upload expired.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            if entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+
+            return entry.upload_id
+
+    def set(self, key: str, upload_id: str) -> None:
+        """
+        Remember the upload of an input.
+
+        Args:
+            key: Key of the input, derived from its digest.
+            upload_id: ID of the upload.
+        """
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = _UploadEntry(upload_id=upload_id, expires_at=time.monotonic() + self.ttl)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, upload_id: str) -> bool:
+        """
+        Forget an upload, e.g.: because the Nextmv Cloud rejected it.
+
+        Args:
+            upload_id: ID of the upload.
+
+        Returns:
+            Whether the upload was remembered.
+        """
+
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.upload_id == upload_id]
+            for key in keys:
+                del self._entries[key]
+
+            return bool(keys)
+
+
+class UploadURLPool:
+    """
+    Pool of upload URLs acquired ahead of time, so that uploading a large
+    input starts right away instead of waiting for a new upload URL. Taking
+    a URL from the pool refills it in a background thread, which ends once
+    the pool is full again.
+
+    URLs are discarded when they are about to expire. The expiration is read
+    from the query parameters of presigned URLs (`X-Amz-Expires` or
+    `Expires`), and URLs are never kept longer than `max_age` seconds.
+
+    Parameters
+    ----------
+    fetch : Callable[[], UploadURL]
+        Function acquiring a new upload URL, e.g.: `Application.upload_url`.
+    size : int, optional
+        Number of upload URLs kept in the pool. Default is 2.
+    max_age : float, optional
+        Maximum time, in seconds, during which an upload URL is kept. Default
+        is 10 minutes.
+    margin : float, optional
+        Upload URLs that expire in less than this time, in seconds, are
+        discarded. Default is 30.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[], "UploadURL"],
+        size: int = 2,
+        max_age: float = 600,
+        margin: float = 30,
+    ):
+        self.fetch = fetch
+        self.size = size
+        self.max_age = max_age
+        self.margin = margin
+        self._urls: Deque[Tuple[float, UploadURL]] = deque()
+        self._refilling = False
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.__discard_expired()
+            return len(self._urls)
+
+    def get(self) -> "UploadURL":
+        """
+        Take an upload URL from the pool, or acquire a new one if the pool is
+        empty, and refill the pool in the background.
+
+        Returns:
+            An upload URL that is used only once.
+
+        Raises:
+            requests.HTTPError: If a new upload URL could not be acquired.
+        """
+
+        upload_url = None
+        with self._lock:
+            self.__discard_expired()
+            if self._urls:
+                _, upload_url = self._urls.popleft()
+
+        if upload_url is None:
+            upload_url = self.fetch()
+        self.refill()
+
+        return upload_url
+
+    def refill(self) -> None:
+        """Start filling the pool in the background, unless it is full or
+        already being filled."""
+
+        with self._lock:
+            if self._refilling or len(self._urls) >= self.size:
+                return
+            self._refilling = True
+
+        threading.Thread(target=self.__fill, name="nextmv-upload-urls", daemon=True).start()
+
+    def __fill(self) -> None:
+        """Acquires upload URLs until the pool is full. Failures stop the
+        refill: the URLs are then acquired when they are needed."""
+
+        try:
+            while True:
+                with self._lock:
+                    if len(self._urls) >= self.size:
+                        return
+
+                upload_url = self.fetch()
+                expires_at = time.monotonic() + min(self.max_age, _expires_in(upload_url.upload_url, self.max_age))
+                with self._lock:
+                    self._urls.append((expires_at, upload_url))
+        except Exception as e:
+            log(f"could not acquire an upload URL ahead of time: {e}")
+        finally:
+            with self._lock:
+                self._refilling = False
+
+    def __discard_expired(self) -> None:
+        """Discards the URLs that are about to expire. Must be called while
+        holding the lock."""
+
+        deadline = time.monotonic() + self.margin
+        while self._urls and self._urls[0][0] <= deadline:
+            self._urls.popleft()
+
+
+def input_digest(input: Any) -> Optional[str]:
+    """
+    Compute the SHA-256 digest of the content of an input to upload.
+
+    Args:
+        input: Input to upload. The digest of an encoded payload or of the
+            file at a path (`os.PathLike`) can be computed. The digest of a
+            file object or of an iterator cannot, as reading them would
+            consume them.
+
+    Returns:
+        The hexadecimal digest, or None if it cannot be computed.
+    """
+
+    if isinstance(input, EncodedPayload):
+        return hashlib.sha256(input.data).hexdigest()
+
+    if isinstance(input, os.PathLike):
+        digest = hashlib.sha256()
+        with open(input, "rb") as f:
+            for chunk in iter(lambda: f.read(_DIGEST_CHUNK_SIZE), b""):
+                digest.update(chunk)
+
+        return digest.hexdigest()
+
+    return None
+
+
+def _expires_in(url: str, default: float) -> float:
+    """Seconds until a presigned URL expires, according to its query
+    parameters, or the default if they do not tell."""
+
+    query = parse_qs(urlparse(url).query)
+    try:
+        if "X-Amz-Expires" in query and "X-Amz-Date" in query:
+            signed_at = calendar.timegm(time.strptime(query["X-Amz-Date"][0], "%Y%m%dT%H%M%SZ"))
+            return signed_at + float(query["X-Amz-Expires"][0]) - time.time()
+        if "Expires" in query:
+            return float(query["Expires"][0]) - time.time()
+    except ValueError:
+        pass
+
+    return default
@@ -0,0 +1,289 @@
+"""This module contains a waiter that tracks the completion of many runs with
+a single polling loop."""
+
+import concurrent.futures
+import heapq
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from nextmv.cloud._futures import complete, notify_cancel
+from nextmv.cloud.account import Account
+from nextmv.cloud.application import (
+    _DEFAULT_POLLING_OPTIONS,
+    _TERMINAL_STATUSES,
+    Application,
+    Metadata,
+    PollingOptions,
+    RunInformation,
+)
+from nextmv.cloud.polling import PollingSchedule
+
+
+@dataclass
+class _WaitState:
+    """Polling state of a run being waited on."""
+
+    run_id: str
+    """ID of the run."""
+    future: Future
+    """Future completed with the information of the run once it finishes."""
+    schedule: PollingSchedule
+    """Schedule of the checks of the run."""
+    added_at: float = field(default_factory=time.monotonic)
+    """Time at which the run started being waited on."""
+
+
+class RunWaiter:
+    """
+    Waits for many runs at once with a single scheduler thread. Every run is
+    checked following the strategy of `polling_options`, with some jitter so
+    that the checks of runs submitted together are spread over time.
+
+    When an `Account` is given, the checks that are due at the same time are
+    answered with a single call to `Account.queue()`: runs that are still in
+    the queue are not polled, and only the runs that left it have their
+    metadata fetched. The queue is fetched at most once every
+    `queue_interval` seconds.
+
+    Parameters
+    ----------
+    application : Application
+        Application the runs belong to.
+    account : Account, optional
+        Account used to check the queue of runs. If not given, every check
+        fetches the metadata of the run.
+    polling_options : PollingOptions, optional
+        Options to use when checking the runs.
+    jitter : float, optional
+        Relative jitter applied to the delay between checks, e.g.: 0.1 means
+        that the delay varies by up to 10 %. Default is 0.1.
+    queue_interval : float, optional
+        Minimum time, in seconds, between calls to `Account.queue()`. Default
+        is 1.
+    max_workers : int, optional
+        Number of workers fetching the metadata of runs. Default is 4.
+    """
+
+    def __init__(
+        self,
+        application: Application,
+        account: Optional[Account] = None,
+        polling_options: PollingOptions = _DEFAULT_POLLING_OPTIONS,
+        jitter: float = 0.1,
+        queue_interval: float = 1,
+        max_workers: int = 4,
+    ):
+        self.application = application
+        self.account = account
+        self.polling_options = polling_options
+        self.jitter = jitter
+        self.queue_interval = queue_interval
+        self._workers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nextmv-waiter")
+        self._condition = threading.Condition()
+        self._checks: List[Tuple[float, int, _WaitState]] = []
+        self._counter = itertools.count()
+        self._states: Dict[str, _WaitState] = {}
+        self._queue: Optional[Set[str]] = None
+        self._queue_fetched_at = float("-inf")
+        self._closed = False
+        self._scheduler = threading.Thread(target=self.__schedule_checks, name="nextmv-waiter", daemon=True)
+        self._scheduler.start()
+
+    def add(self, run_id: str) -> Future:
+        """
+        Start waiting for a run. Waiting for a run that is already being
+        waited on returns the same future.
+
+        Args:
+            run_id: ID of the run.
+
+        Returns:
+            Future completed with the information of the run once it
+            finishes. It fails with a `TimeoutError` or a `RuntimeError` if
+            the polling strategy is exhausted. Cancelling the future stops
+            waiting for the run.
+
+        Raises:
+            RuntimeError: If the waiter was closed.
+        """
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("cannot wait for new runs after closing the waiter")
+
+            state = self._states.get(run_id)
+            if state is not None:
+                return state.future
+
+            schedule = self.polling_options.schedule(run_id=run_id)
+            state = _WaitState(run_id=run_id, future=Future(), schedule=schedule)
+            self._states[run_id] = state
+            self.__push(state, schedule.first_delay())
+
+        state.future.add_done_callback(lambda _: self.__forget(state))
+
+        return state.future
+
+    def as_completed(self, run_ids: Iterable[str], timeout: Optional[float] = None) -> Iterator[RunInformation]:
+        """
+        Wait for runs and yield their information as they finish.
+
+        Args:
+            run_ids: IDs of the runs.
+            timeout: Maximum time, in seconds, to wait for all the runs.
+
+        Returns:
+            Iterator over the information of the runs, in the order in which
+            they finish.
+
+        Raises:
+            concurrent.futures.TimeoutError: If the runs do not finish
+                before the timeout.
+            Exception: The exception raised while waiting for a run, if any.
+        """
+
+        futures = [self.add(run_id) for run_id in run_ids]
+        for future in concurrent.futures.as_completed(futures, timeout=timeout):
+            yield future.result()
+
+    def close(self) -> None:
+        """Stop waiting for the runs and release the threads. The futures of
+        the runs that did not finish are cancelled."""
+
+        with self._condition:
+            self._closed = True
+            states = list(self._states.values())
+            self._condition.notify_all()
+
+        for state in states:
+            state.future.cancel()
+            notify_cancel(state.future)
+
+        self._scheduler.join()
+        self._workers.shutdown()
+
+    def __enter__(self) -> "RunWaiter":
+        """Use the waiter as a context manager that closes it on exit."""
+
+        return self
+
+    def __exit__(self, *_) -> None:
+        """Close the waiter when exiting the context manager."""
+
+        self.close()
+
+    def __push(self, state: _WaitState, delay: float) -> None:
+        """Schedules the next check of a run, applying jitter. Must be called
+        while holding the condition."""
+
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        heapq.heappush(self._checks, (time.monotonic() + delay, next(self._counter), state))
+        self._condition.notify_all()
+
+    def __forget(self, state: _WaitState) -> None:
+        """Stops tracking a run whose future is done, notifying its waiters
+        if it was cancelled by the caller."""
+
+        notify_cancel(state.future)
+        with self._condition:
+            if self._states.get(state.run_id) is state:
+                del self._states[state.run_id]
+
+    def __schedule_checks(self) -> None:
+        """Loop of the scheduler thread: collects the checks that are due and
+        performs them."""
+
+        while True:
+            with self._condition:
+                while not self._closed:
+                    wait = self._checks[0][0] - time.monotonic() if self._checks else None
+                    if wait is not None and wait <= 0:
+                        break
+                    self._condition.wait(timeout=wait)
+
+                if self._closed:
+                    return
+
+                due = []
+                now = time.monotonic()
+                while self._checks and self._checks[0][0] <= now:
+                    _, _, state = heapq.heappop(self._checks)
+                    if not state.future.done():
+                        due.append(state)
+
+            self.__check(due)
+
+    def __check(self, due: List[_WaitState]) -> None:
+        """Checks the runs that are due. Runs that are still in the queue are
+        rescheduled, and the metadata of the others is fetched."""
+
+        queued = self.__queued_run_ids(len(due))
+        for state in due:
+            if queued is not None and state.run_id in queued:
+                self.__next_check(state)
+            else:
+                self._workers.submit(self.__poll, state)
+
+    def __queued_run_ids(self, due: int) -> Optional[Set[str]]:
+        """IDs of the runs in the queue of the account, or None if the queue
+        is not used. The queue is fetched again when the last snapshot is
+        stale and more than one run is due, as a single run is checked just
+        as cheaply with its metadata. If the queue cannot be fetched, the
+        runs are polled individually."""
+
+        if self.account is None:
+            return None
+
+        if time.monotonic() - self._queue_fetched_at > self.queue_interval:
+            if due < 2:
+                return None
+
+            try:
+                queue = self.account.queue()
+            except Exception:
+                # The metadata of every run is still a reliable fallback.
+                return None
+
+            self._queue = {run.id for run in queue.runs}
+            self._queue_fetched_at = time.monotonic()
+
+        return self._queue
+
+    def __poll(self, state: _WaitState) -> None:
+        """Fetches the metadata of a run, completing its future if the run
+        finished."""
+
+        if state.future.done():
+            return
+
+        try:
+            run_information = self.application.run_metadata(run_id=state.run_id)
+        except Exception as e:
+            complete(state.future, exception=e)
+            return
+
+        if run_information.metadata.status_v2 in _TERMINAL_STATUSES:
+            state.schedule.finished(run_information.metadata)
+            complete(state.future, result=run_information)
+            return
+
+        self.__next_check(state, run_information.metadata)
+
+    def __next_check(self, state: _WaitState, metadata: Optional[Metadata] = None) -> None:
+        """Schedules the next check of a run that did not finish, failing it
+        if the polling strategy is exhausted."""
+
+        try:
+            delay = state.schedule.next_delay(metadata)
+        except (TimeoutError, RuntimeError) as e:
+            complete(state.future, exception=e)
+            return
+
+        with self._condition:
+            if not self._closed:
+                self.__push(state, delay)
@@ -2,13 +2,13 @@
 
 import copy
 import csv
-import json
 import os
 import sys
 from dataclasses import dataclass
 from enum import Enum
 from typing import Any, Dict, List, Optional, Union
 
+from nextmv import serialization
 from nextmv.options import Options
 
 
@@ -60,7 +60,7 @@ class Input:
 
         if self.input_format == InputFormat.JSON:
             try:
-                _ = json.dumps(self.data)
+                _ = serialization.dumps(self.data)
             except (TypeError, OverflowError) as e:
                 raise ValueError(
                     f"Input has input_format InputFormat.JSON and "
@@ -147,12 +147,12 @@ class LocalInputLoader(InputLoader):
             return list(csv.DictReader(f, **csv_configurations))
 
     def _read_json(path: str, _) -> Union[Dict[str, Any], Any]:
-        with open(path, encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return serialization.load(f)
 
     # All of these readers are callback functions.
     STDIN_READERS = {
-        InputFormat.JSON: lambda _: json.load(sys.stdin),
+        InputFormat.JSON: lambda _: serialization.load(getattr(sys.stdin, "buffer", sys.stdin)),
         InputFormat.TEXT: lambda _: sys.stdin.read().rstrip("\n"),
         InputFormat.CSV: lambda csv_configurations: list(csv.DictReader(sys.stdin, **csv_configurations)),
     }
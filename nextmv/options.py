@@ -5,8 +5,6 @@ import os
 from dataclasses import dataclass
 from typing import Any, Dict, Optional
 
-from nextmv.base_model import BaseModel
-
 
 @dataclass
 class Parameter:
@@ -185,6 +183,9 @@ class Options:
             The options as a dict.
         """
 
+        # Imported here so that pydantic is only loaded when needed.
+        from nextmv.base_model import BaseModel
+
         class model(BaseModel):
             config: Dict[str, Any]
 
@@ -3,7 +3,6 @@
 import copy
 import csv
 import datetime
-import json
 import os
 import sys
 from dataclasses import dataclass
@@ -12,6 +11,7 @@ from typing import Any, Dict, List, Optional, Union
 
 from pydantic import Field
 
+from nextmv import serialization
 from nextmv.base_model import BaseModel
 from nextmv.logger import reset_stdout
 from nextmv.options import Options
@@ -236,7 +236,7 @@ class Output:
 
         if self.output_format == OutputFormat.JSON:
             try:
-                _ = json.dumps(self.solution, default=_custom_serial)
+                _ = serialization.dumps(self.solution, default=_custom_serial)
             except (TypeError, OverflowError) as e:
                 raise ValueError(
                     f"Output has output_format OutputFormat.JSON and "
@@ -282,22 +282,22 @@ class LocalOutputWriter(OutputWriter):
         if sol is not None:
             solution = sol
 
-        serialized = json.dumps(
+        serialized = serialization.dumps(
             {
                 "options": options,
                 "solution": solution,
                 "statistics": statistics,
             },
-            indent=2,
+            indent=True,
             default=_custom_serial,
         )
 
         if path is None or path == "":
-            print(serialized, file=sys.stdout)
+            print(serialized.decode("utf-8"), file=sys.stdout)
             return
 
-        with open(path, "w", encoding="utf-8") as file:
-            file.write(serialized + "\n")
+        with open(path, "wb") as file:
+            file.write(serialized + b"\n")
 
     def _write_archive(
         output: Output,
@@ -315,14 +315,14 @@ class LocalOutputWriter(OutputWriter):
         if not os.path.exists(dir_path):
             os.makedirs(dir_path)
 
-        serialized = json.dumps(
+        serialized = serialization.dumps(
             {
                 "options": options,
                 "statistics": statistics,
             },
-            indent=2,
+            indent=True,
         )
-        print(serialized, file=sys.stdout)
+        print(serialized.decode("utf-8"), file=sys.stdout)
 
         if output.solution is None:
             return
@@ -502,7 +502,7 @@ def write_local(
 def _custom_serial(obj: Any):
     """JSON serializer for objects not serializable by default one."""
 
-    if isinstance(obj, (datetime.datetime | datetime.date)):
+    if isinstance(obj, (datetime.datetime, datetime.date)):
         return obj.isoformat()
 
     raise TypeError(f"Type {type(obj)} not serializable")
@@ -0,0 +1,314 @@
+"""Module with the JSON codec used across the SDK. It encodes to and decodes
+from UTF-8 bytes, using the fastest JSON library installed (`orjson`,
+`msgspec` or `ujson`) and falling back to the standard library `json`
+module."""
+
+import json
+import math
+import os
+from typing import IO, Any, Callable, Optional, Union
+
+Default = Callable[[Any], Any]
+"""Function that returns a serializable version of an object that is not
+natively serializable, or raises a `TypeError`."""
+
+
+class JSONCodec:
+    """
+    Base class for JSON codecs. This implementation uses the standard library
+    `json` module, and it is the one every other codec falls back to when it
+    cannot handle an object or a document, so that errors and edge cases
+    (e.g.: integers larger than 64 bits, non-string keys) behave the same
+    regardless of the library installed.
+
+    Documents decode to the same objects whichever codec wrote them, but
+    they are not identical byte for byte: this codec escapes non-ASCII
+    characters, while `orjson` and `msgspec` write them as UTF-8. JSON has
+    no representation for NaN and infinities, so every codec writes
+    non-finite floats as `null`.
+    """
+
+    name: str = "json"
+    """Name of the codec."""
+
+    def dumps(self, obj: Any, default: Optional[Default] = None, indent: bool = False) -> bytes:
+        """
+        Encode an object as JSON.
+
+        Parameters
+        ----------
+        obj : Any
+            Object to encode.
+        default : Default, optional
+            Function called for objects that are not natively serializable.
+        indent : bool, optional
+            Whether to indent the document with two spaces. Otherwise, the
+            document is compact. Default is False.
+
+        Returns
+        -------
+        bytes
+            The UTF-8 encoded document.
+
+        Raises
+        ------
+        TypeError
+            If the object is not serializable.
+        """
+
+        try:
+            return _json_dumps(obj, default, indent)
+        except ValueError as e:
+            if not str(e).startswith("Out of range float values"):
+                raise
+
+        # Non-finite floats are rare, so the object is only copied with them
+        # replaced by None when encoding it failed because of one.
+        finite_default = None if default is None else lambda o: _finite(default(o))
+        return _json_dumps(_finite(obj), finite_default, indent)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        """
+        Decode a JSON document.
+
+        Parameters
+        ----------
+        data : Union[bytes, str]
+            The document, as UTF-8 encoded bytes or as a string.
+
+        Returns
+        -------
+        Any
+            The decoded object.
+
+        Raises
+        ------
+        ValueError
+            If the document is not valid JSON.
+        """
+
+        return json.loads(data)
+
+
+class _FallbackCodec(JSONCodec):
+    """Codec backed by a third-party library that falls back to the standard
+    library when the library fails."""
+
+    def dumps(self, obj: Any, default: Optional[Default] = None, indent: bool = False) -> bytes:
+        try:
+            return self._dumps(obj, default, indent)
+        except (TypeError, ValueError, OverflowError):
+            return super().dumps(obj, default=default, indent=indent)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        try:
+            return self._loads(data)
+        except ValueError:
+            return super().loads(data)
+
+    def _dumps(self, obj: Any, default: Optional[Default], indent: bool) -> bytes:
+        raise NotImplementedError
+
+    def _loads(self, data: Union[bytes, str]) -> Any:
+        raise NotImplementedError
+
+
+class OrjsonCodec(_FallbackCodec):
+    """Codec backed by `orjson`. Datetimes and dataclasses are given to the
+    `default` function, as with the standard library."""
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+        self._options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+    def _dumps(self, obj: Any, default: Optional[Default], indent: bool) -> bytes:
+        options = self._options | self._orjson.OPT_INDENT_2 if indent else self._options
+        return self._orjson.dumps(obj, default=default, option=options)
+
+    def _loads(self, data: Union[bytes, str]) -> Any:
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec(_FallbackCodec):
+    """Codec backed by `msgspec`. Unlike the other codecs, it encodes
+    datetimes, dates and times natively, as RFC 3339 strings, without giving
+    them to the `default` function. They match `isoformat()`, except for UTC
+    datetimes, which end in `Z` instead of `+00:00`."""
+
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._msgspec = msgspec
+        self._decoder = msgspec.json.Decoder()
+
+    def _dumps(self, obj: Any, default: Optional[Default], indent: bool) -> bytes:
+        data = self._msgspec.json.encode(obj, enc_hook=default)
+        return self._msgspec.json.format(data, indent=2) if indent else data
+
+    def _loads(self, data: Union[bytes, str]) -> Any:
+        return self._decoder.decode(data)
+
+
+class UjsonCodec(_FallbackCodec):
+    """Codec backed by `ujson`."""
+
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._ujson = ujson
+
+    def _dumps(self, obj: Any, default: Optional[Default], indent: bool) -> bytes:
+        data = self._ujson.dumps(
+            obj,
+            default=default,
+            ensure_ascii=True,
+            escape_forward_slashes=False,
+            allow_nan=False,
+            indent=2 if indent else 0,
+        )
+        return data.encode("utf-8")
+
+    def _loads(self, data: Union[bytes, str]) -> Any:
+        return self._ujson.loads(data)
+
+
+def _json_dumps(obj: Any, default: Optional[Default], indent: bool) -> bytes:
+    """Encodes an object with the standard library, rejecting non-finite
+    floats with a `ValueError`."""
+
+    if indent:
+        return json.dumps(obj, default=default, indent=2, allow_nan=False).encode("utf-8")
+
+    return json.dumps(obj, default=default, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def _finite(obj: Any) -> Any:
+    """Copies the dictionaries, lists and tuples of an object, replacing the
+    floats that are NaN or infinite with None."""
+
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+
+    if isinstance(obj, (list, tuple)):
+        return [_finite(item) for item in obj]
+
+    return obj
+
+
+_CODECS = {
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+    "ujson": UjsonCodec,
+    "json": JSONCodec,
+}
+"""Available codecs, in order of preference."""
+
+_codec: Optional[JSONCodec] = None
+"""Codec in use. It is selected on first use."""
+
+
+def _select_codec() -> JSONCodec:
+    """Selects the codec set in the NEXTMV_JSON_CODEC environment variable,
+    or the first one whose library is installed."""
+
+    name = os.getenv("NEXTMV_JSON_CODEC")
+    if name is not None:
+        if name not in _CODECS:
+            raise ValueError(f"unknown JSON codec {name} set via NEXTMV_JSON_CODEC, valid codecs are: {list(_CODECS)}")
+        return _CODECS[name]()
+
+    for codec in _CODECS.values():
+        try:
+            return codec()
+        except ImportError:
+            continue
+
+
+def get_codec() -> JSONCodec:
+    """
+    Get the JSON codec in use.
+
+    Returns
+    -------
+    JSONCodec
+        The codec.
+    """
+
+    global _codec
+    if _codec is None:
+        _codec = _select_codec()
+
+    return _codec
+
+
+def set_codec(codec: Union[str, JSONCodec]) -> None:
+    """
+    Set the JSON codec used across the SDK.
+
+    Parameters
+    ----------
+    codec : Union[str, JSONCodec]
+        The codec, or the name of one of the built-in codecs: `orjson`,
+        `msgspec`, `ujson` or `json`.
+
+    Raises
+    ------
+    ValueError
+        If the name is not one of a built-in codec.
+    ImportError
+        If the library of the codec is not installed.
+    """
+
+    global _codec
+    if isinstance(codec, str):
+        if codec not in _CODECS:
+            raise ValueError(f"unknown JSON codec {codec}, valid codecs are: {list(_CODECS)}")
+        codec = _CODECS[codec]()
+
+    _codec = codec
+
+
+def dumps(obj: Any, default: Optional[Default] = None, indent: bool = False) -> bytes:
+    """
+    Encode an object as JSON with the codec in use. See `JSONCodec.dumps`.
+    """
+
+    return get_codec().dumps(obj, default=default, indent=indent)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document with the codec in use. See `JSONCodec.loads`.
+    """
+
+    return get_codec().loads(data)
+
+
+def load(f: IO) -> Any:
+    """
+    Decode the JSON document read from a file object, in binary or text
+    mode, with the codec in use.
+
+    Parameters
+    ----------
+    f : IO
+        The file object.
+
+    Returns
+    -------
+    Any
+        The decoded object.
+    """
+
+    return get_codec().loads(f.read())
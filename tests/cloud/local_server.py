@@ -0,0 +1,158 @@
+"""Local stand-in HTTP server used to test the cloud functionality without
+reaching the Nextmv Cloud API."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Route = Callable[["Request"], Tuple[int, Dict[str, str], bytes]]
+
+
+class Request:
+    """A request received by the local server."""
+
+    def __init__(self, method: str, path: str, headers: Dict[str, str], body: bytes, client: Tuple[str, int]):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.client = client
+
+
+class LocalServer:
+    """
+    HTTP/1.1 server that runs in a background thread. Routes are registered
+    per method and path (query string excluded) and return a tuple of status
+    code, headers and body. Every request received is recorded.
+    """
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Route] = {}
+        self.requests: List[Request] = []
+        self.connections = set()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *_):
+                pass
+
+            def _handle(self):
+                body = b""
+                if "Transfer-Encoding" in self.headers and self.headers["Transfer-Encoding"] == "chunked":
+                    chunks = []
+                    while True:
+                        size = int(self.rfile.readline().strip(), 16)
+                        if size == 0:
+                            self.rfile.readline()
+                            break
+                        chunks.append(self.rfile.read(size))
+                        self.rfile.readline()
+                    body = b"".join(chunks)
+                elif "Content-Length" in self.headers:
+                    body = self.rfile.read(int(self.headers["Content-Length"]))
+
+                request = Request(
+                    method=self.command,
+                    path=self.path,
+                    headers=dict(self.headers.items()),
+                    body=body,
+                    client=self.client_address,
+                )
+                with server._lock:
+                    server.requests.append(request)
+                    server.connections.add(self.client_address)
+
+                route = server.routes.get((self.command, self.path.split("?")[0]))
+                if route is None:
+                    status, headers, response_body = 404, {}, b'{"error": "not found"}'
+                else:
+                    status, headers, response_body = route(request)
+
+                try:
+                    _respond(self, status, headers, response_body)
+                except ConnectionError:
+                    # The client gave up on the request, e.g.: after a timeout.
+                    self.close_connection = True
+
+            do_GET = _handle
+            do_POST = _handle
+            do_PUT = _handle
+            do_PATCH = _handle
+            do_DELETE = _handle
+            do_HEAD = _handle
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def route(self, method: str, path: str, handler: Route) -> None:
+        """Register a handler for the given method and path."""
+
+        self.routes[(method, path)] = handler
+
+    def json(self, method: str, path: str, body: bytes, status: int = 200) -> None:
+        """Register a handler that always responds with the given JSON body."""
+
+        self.route(method, path, lambda _: (status, {"Content-Type": "application/json"}, body))
+
+    def __enter__(self) -> "LocalServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def run_information(
+    run_id: str,
+    status: str = "succeeded",
+    instance_id: str = "devint",
+    input_size: float = 0,
+    output_size: float = 0,
+    duration: float = 0,
+) -> Dict[str, Any]:
+    """Returns the JSON representation of the information of a run, as
+    responded by the runs endpoints of the Nextmv Cloud API."""
+
+    return {
+        "id": run_id,
+        "name": "",
+        "description": "",
+        "user_email": "user@nextmv.io",
+        "metadata": {
+            "application_id": "app",
+            "application_instance_id": instance_id,
+            "application_version_id": "",
+            "created_at": "2024-01-01T00:00:00Z",
+            "duration": duration,
+            "error": "",
+            "input_size": input_size,
+            "output_size": output_size,
+            "status": "failed" if status == "canceled" else "running" if status in ["queued", "none"] else status,
+            "status_v2": status,
+        },
+    }
+
+
+def _respond(handler: BaseHTTPRequestHandler, status: int, headers: Dict[str, str], body: bytes) -> None:
+    """Writes a response with the handler."""
+
+    handler.send_response(status)
+    for key, value in headers.items():
+        handler.send_header(key, value)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    if handler.command != "HEAD":
+        handler.wfile.write(body)
@@ -0,0 +1,286 @@
+import gzip
+import json
+import os
+import pathlib
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from nextmv import serialization
+from nextmv.cloud import Application, Client, MemoryCache, PollingOptions, RunDeadlineExceededError, StatusV2
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestApplication(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def test_new_run_inline_input_encoded_once(self):
+        self.server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+
+        input = {"foo": "bar"}
+        with patch("nextmv.serialization.dumps", wraps=serialization.dumps) as dumps:
+            run_id = self.app.new_run(input=input, name="name", options={"duration": "1s"})
+
+        self.assertEqual(run_id, "run-1")
+        self.assertEqual(len([c for c in dumps.call_args_list if c.args[0] is input]), 1)
+        body = json.loads(self.server.requests[0].body)
+        self.assertEqual(body, {"input": {"foo": "bar"}, "name": "name", "options": {"duration": "1s"}})
+        self.assertEqual(self.server.requests[0].headers["Content-Type"], "application/json")
+
+    def test_new_run_large_input_uploaded(self):
+        upload_url = json.dumps({"upload_id": "upload-1", "upload_url": f"{self.server.url}/upload"}).encode()
+        self.server.json("POST", "/v1/applications/app/runs/uploadurl", upload_url)
+        self.server.json("PUT", "/upload", b"")
+        self.server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            run_id = self.app.new_run(input={"foo": "a large input"})
+
+        self.assertEqual(run_id, "run-1")
+        upload, submission = self.server.requests[1], self.server.requests[2]
+        self.assertEqual(json.loads(upload.body), {"foo": "a large input"})
+        self.assertEqual(json.loads(submission.body), {"upload_id": "upload-1"})
+
+    def test_new_run_streamed_inputs(self):
+        uploads = []
+        self.server.route("PUT", "/upload", lambda request: uploads.append(request) or (200, {}, b""))
+        upload_url = json.dumps({"upload_id": "upload-1", "upload_url": f"{self.server.url}/upload"}).encode()
+        self.server.json("POST", "/v1/applications/app/runs/uploadurl", upload_url)
+        self.server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / "input.json"
+            path.write_bytes(b'{"foo": "from a file"}')
+            self.app.new_run(input=path)
+            with open(path, "rb") as f:
+                self.app.new_run(input=f)
+
+        self.app.new_run(input=(chunk for chunk in [b'{"foo": ', b'"from a generator"}']))
+
+        self.assertEqual(len(uploads), 3)
+        self.assertEqual(json.loads(uploads[0].body), {"foo": "from a file"})
+        self.assertEqual(json.loads(uploads[1].body), {"foo": "from a file"})
+        self.assertEqual(uploads[2].headers["Transfer-Encoding"], "chunked")
+        self.assertEqual(json.loads(uploads[2].body), {"foo": "from a generator"})
+
+        submissions = [r for r in self.server.requests if r.path.startswith("/v1/applications/app/runs?")]
+        self.assertTrue(all(json.loads(r.body) == {"upload_id": "upload-1"} for r in submissions))
+
+    def large_result(self, output):
+        """Serves a run whose output is only available through a download
+        URL, as the API does for large outputs."""
+
+        download = json.dumps(output).encode()
+
+        def route(request):
+            result = run_information("run-1", output_size=len(download))
+            if request.path.endswith("?format=url"):
+                result["output"] = {"url": f"{self.server.url}/download"}
+            return 200, {}, json.dumps(result).encode()
+
+        self.server.route("GET", "/v1/applications/app/runs/run-1", route)
+        self.server.route(
+            "GET",
+            "/download",
+            lambda _: (200, {"Content-Encoding": "gzip"}, gzip.compress(download)),
+        )
+
+    def test_run_result_to_file(self):
+        output = {"solution": list(range(100))}
+        self.large_result(output)
+
+        with tempfile.TemporaryDirectory() as tmpdir, patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            path = os.path.join(tmpdir, "output.json")
+            result_file = self.app.run_result_to_file(run_id="run-1", path=path)
+
+            self.assertEqual(result_file.id, "run-1")
+            self.assertEqual(result_file.output_path, path)
+            self.assertEqual(result_file.output_file().json(), output)
+            self.assertFalse(os.path.exists(f"{path}.part"))
+            self.assertTrue(self.server.requests[1].path.endswith("?format=url"))
+
+    def test_run_result_single_request(self):
+        result = run_information("run-1")
+        result["output"] = {"foo": "bar"}
+        self.server.json("GET", "/v1/applications/app/runs/run-1", json.dumps(result).encode())
+
+        self.assertEqual(self.app.run_result(run_id="run-1").output, {"foo": "bar"})
+        self.assertEqual([r.path for r in self.server.requests], ["/v1/applications/app/runs/run-1"])
+
+    def test_run_result_large_output(self):
+        output = {"solution": list(range(100))}
+        self.large_result(output)
+
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            self.assertEqual(self.app.run_result(run_id="run-1").output, output)
+
+        paths = [r.path for r in self.server.requests]
+        self.assertEqual(
+            paths, ["/v1/applications/app/runs/run-1", "/v1/applications/app/runs/run-1?format=url", "/download"]
+        )
+
+    def test_run_input_too_large_falls_back_to_url(self):
+        def route(request):
+            if request.path.endswith("?format=url"):
+                return 200, {}, json.dumps({"url": f"{self.server.url}/download"}).encode()
+            return 413, {}, b'{"error": "input too large"}'
+
+        self.server.route("GET", "/v1/applications/app/runs/run-1/input", route)
+        self.server.json("GET", "/download", b'{"foo": "bar"}')
+
+        self.assertEqual(self.app.run_input(run_id="run-1"), {"foo": "bar"})
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_run_input_bad_request_not_retried_as_too_large(self):
+        def route(request):
+            if request.path.endswith("?format=url"):
+                return 200, {}, json.dumps({"url": f"{self.server.url}/download"}).encode()
+            return 400, {}, b'{"error": "bad request"}'
+
+        metadata = run_information("run-1", input_size=100)
+        self.server.route("GET", "/v1/applications/app/runs/run-1/input", route)
+        self.server.route(
+            "GET", "/v1/applications/app/runs/run-1/metadata", lambda _: (200, {}, json.dumps(metadata).encode())
+        )
+        self.server.json("GET", "/download", b'{"foo": "bar"}')
+
+        with self.assertRaises(requests.HTTPError) as cm:
+            self.app.run_input(run_id="run-1")
+        self.assertEqual(cm.exception.response.status_code, 400)
+        self.assertNotIn("?format=url", [r.path[-11:] for r in self.server.requests])
+
+        # A 400 for an input that is too large to be responded inline.
+        metadata["metadata"]["input_size"] = 10 * 1024 * 1024
+        self.assertEqual(self.app.run_input(run_id="run-1"), {"foo": "bar"})
+
+    def test_run_input_to_file_small(self):
+        self.server.json("GET", "/v1/applications/app/runs/run-1/input", b'{"foo": "bar"}')
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            downloaded = self.app.run_input_to_file(run_id="run-1", path=os.path.join(tmpdir, "input.json"))
+            self.assertEqual(downloaded.json(), {"foo": "bar"})
+            self.assertEqual(downloaded.size, 14)
+
+    def test_cache_terminal_run(self):
+        self.app.cache = MemoryCache()
+        result = run_information("run-1")
+        result["output"] = {"foo": "bar"}
+        self.server.json(
+            "GET", "/v1/applications/app/runs/run-1/metadata", json.dumps(run_information("run-1")).encode()
+        )
+        self.server.json("GET", "/v1/applications/app/runs/run-1", json.dumps(result).encode())
+        self.server.json("GET", "/v1/applications/app/runs/run-1/logs", b'{"log": "done"}')
+
+        for _ in range(3):
+            self.assertEqual(self.app.run_result(run_id="run-1").output, {"foo": "bar"})
+            self.assertEqual(self.app.run_metadata(run_id="run-1").id, "run-1")
+            self.assertEqual(self.app.run_logs(run_id="run-1").log, "done")
+
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_cache_skips_running_run(self):
+        self.app.cache = MemoryCache()
+        running = json.dumps(run_information("run-1", status="running")).encode()
+        self.server.json("GET", "/v1/applications/app/runs/run-1/metadata", running)
+        self.server.json("GET", "/v1/applications/app/runs/run-1/logs", b'{"log": "partial"}')
+
+        for _ in range(2):
+            self.app.run_metadata(run_id="run-1")
+            self.app.run_logs(run_id="run-1")
+
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_cache_revalidates_with_etag(self):
+        self.app.cache = MemoryCache()
+        input_set = {
+            "app_id": "app",
+            "created_at": "2024-01-01T00:00:00Z",
+            "description": "",
+            "id": "set-1",
+            "input_ids": ["input-1"],
+            "name": "set",
+            "updated_at": "2024-01-01T00:00:00Z",
+        }
+
+        def route(request):
+            if request.headers.get("If-None-Match") == '"v1"':
+                return 304, {"ETag": '"v1"'}, b""
+            return 200, {"ETag": '"v1"'}, json.dumps(input_set).encode()
+
+        self.server.route("GET", "/v1/applications/app/experiments/inputsets/set-1", route)
+        first = self.app.input_set(input_set_id="set-1")
+        second = self.app.input_set(input_set_id="set-1")
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.server.requests[1].headers["If-None-Match"], '"v1"')
+
+    def test_new_run_with_result_deadline_cancels_run(self):
+        running = json.dumps(run_information("run-1", status="running")).encode()
+        self.server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+        self.server.json("GET", "/v1/applications/app/runs/run-1/metadata", running)
+        self.server.json("PATCH", "/v1/applications/app/runs/run-1/cancel", b"{}")
+        polling_options = PollingOptions(initial_delay=0, delay=0.05, max_tries=1000)
+
+        with self.assertRaises(RunDeadlineExceededError) as context:
+            self.app.new_run_with_result(input={"foo": "bar"}, polling_options=polling_options, deadline=0.2)
+
+        self.assertIsInstance(context.exception, TimeoutError)
+        self.assertEqual(context.exception.run_id, "run-1")
+        self.assertEqual(context.exception.metadata.status_v2, StatusV2.running)
+        self.assertEqual(self.server.requests[-1].method, "PATCH")
+        self.assertEqual(len([r for r in self.server.requests if r.method == "PATCH"]), 1)
+
+    def test_new_run_with_result_within_deadline(self):
+        result = run_information("run-1")
+        result["output"] = {"foo": "bar"}
+        self.server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+        self.server.json("GET", "/v1/applications/app/runs/run-1/metadata", json.dumps(result).encode())
+        self.server.json("GET", "/v1/applications/app/runs/run-1", json.dumps(result).encode())
+        polling_options = PollingOptions(initial_delay=0)
+
+        run_result = self.app.new_run_with_result(input={}, polling_options=polling_options, deadline=5)
+
+        self.assertEqual(run_result.output, {"foo": "bar"})
+        self.assertNotIn("PATCH", [r.method for r in self.server.requests])
+
+    def test_new_run_with_result_deadline_bounds_requests(self):
+        def slow(status, body):
+            def route(_):
+                time.sleep(1)
+                return status, {}, body
+
+            return route
+
+        polling_options = PollingOptions(initial_delay=0)
+        self.server.route("POST", "/v1/applications/app/runs", slow(200, b'{"run_id": "run-1"}'))
+        started = time.monotonic()
+        with self.assertRaises(RunDeadlineExceededError) as context:
+            self.app.new_run_with_result(input={}, polling_options=polling_options, deadline=0.2)
+
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertIsNone(context.exception.run_id)
+
+        # The run finished, but its result could not be downloaded in time.
+        result = json.dumps(run_information("run-1")).encode()
+        self.server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+        self.server.json("GET", "/v1/applications/app/runs/run-1/metadata", result)
+        self.server.route("GET", "/v1/applications/app/runs/run-1", slow(200, result))
+        started = time.monotonic()
+        with self.assertRaises(RunDeadlineExceededError) as context:
+            self.app.new_run_with_result(input={}, polling_options=polling_options, deadline=0.3)
+
+        self.assertLess(time.monotonic() - started, 0.9)
+        self.assertEqual(context.exception.run_id, "run-1")
+        self.assertEqual(context.exception.metadata.status_v2, StatusV2.succeeded)
+        self.assertNotIn("PATCH", [r.method for r in self.server.requests])
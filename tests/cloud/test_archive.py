@@ -0,0 +1,136 @@
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime, timezone
+from urllib.parse import parse_qs, urlparse
+
+from nextmv.cloud import Application, Client, RunArchive, StatusV2
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestRunArchive(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.archive = RunArchive(application=self.app, directory=self.tmpdir.name, include_inputs=True)
+        self.runs = {}
+        self.page_size = 100
+        self.server.route("GET", "/v1/applications/app/runs", self.list_runs)
+        for i, (status, instance_id) in enumerate([("succeeded", "devint"), ("failed", "prod"), ("running", "prod")]):
+            self.add_run(f"run-{i}", status, instance_id, created_at=f"2024-01-0{i + 1}T00:00:00Z")
+
+    def tearDown(self):
+        self.archive.close()
+        self.tmpdir.cleanup()
+        self.client.close()
+        self.server.__exit__()
+
+    def list_runs(self, request):
+        query = parse_qs(urlparse(request.path).query)
+        start = int(query.get("page_token", ["0"])[0])
+        runs = sorted(self.runs.values(), key=lambda run: run["metadata"]["created_at"], reverse=True)
+        body = {"runs": runs[start : start + self.page_size]}
+        if start + self.page_size < len(runs):
+            body["next_page_token"] = str(start + self.page_size)
+        return 200, {}, json.dumps(body).encode()
+
+    def add_run(self, run_id, status, instance_id, created_at, output=None):
+        run = run_information(run_id, status=status, instance_id=instance_id, duration=1000)
+        run["metadata"]["created_at"] = created_at
+        self.runs[run_id] = run
+
+        def result(_):
+            data = dict(self.runs[run_id])
+            if data["metadata"]["status_v2"] == "succeeded":
+                data["output"] = output or {"solution": run_id}
+            return 200, {}, json.dumps(data).encode()
+
+        self.server.route("GET", f"/v1/applications/app/runs/{run_id}", result)
+        self.server.json("GET", f"/v1/applications/app/runs/{run_id}/input", json.dumps({"input": run_id}).encode())
+        self.server.route(
+            "GET",
+            f"/v1/applications/app/runs/{run_id}/metadata",
+            lambda _: (200, {}, json.dumps(self.runs[run_id]).encode()),
+        )
+
+    def listings(self):
+        return [r.path for r in self.server.requests if r.path.split("?")[0] == "/v1/applications/app/runs"]
+
+    def fetched(self):
+        return [r.path for r in self.server.requests if r.path.split("?")[0] != "/v1/applications/app/runs"]
+
+    def test_sync_and_query(self):
+        stats = self.archive.sync()
+
+        self.assertEqual((stats.listed, stats.updated, stats.inputs, stats.outputs), (3, 3, 2, 1))
+        self.assertEqual([run.id for run in self.archive.runs()], ["run-2", "run-1", "run-0"])
+        self.assertEqual([run.id for run in self.archive.runs(instance_id="prod", status=StatusV2.failed)], ["run-1"])
+        created_after = datetime(2024, 1, 2, tzinfo=timezone.utc)
+        self.assertEqual([run.id for run in self.archive.runs(created_after=created_after, limit=1)], ["run-2"])
+        self.assertEqual(self.archive.output("run-0"), {"solution": "run-0"})
+        self.assertEqual(self.archive.input("run-1"), {"input": "run-1"})
+        self.assertIsNone(self.archive.output("run-1"))
+        self.assertEqual(
+            self.archive.query("SELECT instance_id, COUNT(*) AS runs FROM runs GROUP BY instance_id ORDER BY 1"),
+            [{"instance_id": "devint", "runs": 1}, {"instance_id": "prod", "runs": 2}],
+        )
+
+    def test_incremental_sync(self):
+        self.archive.sync()
+        self.server.requests.clear()
+        self.runs["run-2"] = run_information("run-2", status="succeeded", instance_id="prod")
+        self.add_run("run-3", "succeeded", "devint", created_at="2024-01-04T00:00:00Z", output={"solution": "run-0"})
+
+        stats = self.archive.sync()
+
+        self.assertEqual((stats.listed, stats.updated, stats.inputs, stats.outputs), (4, 2, 2, 2))
+        self.assertEqual(self.archive.runs(status=StatusV2.succeeded)[-1].id, "run-0")
+        self.assertEqual(self.archive.output("run-2"), {"solution": "run-2"})
+        expected = [
+            f"/v1/applications/app/runs/{run_id}{suffix}" for run_id in ["run-2", "run-3"] for suffix in ["", "/input"]
+        ]
+        self.assertEqual(sorted(self.fetched()), expected)
+
+        # The identical outputs of run-0 and run-3 are stored once.
+        blobs = [name for _, _, names in os.walk(os.path.join(self.tmpdir.name, "blobs")) for name in names]
+        self.assertEqual(len(blobs), 6)
+
+        self.server.requests.clear()
+        self.archive.sync()
+        self.assertEqual(self.fetched(), [])
+
+    def test_paginated_sync(self):
+        self.page_size = 2
+        for i in range(3, 7):
+            self.add_run(f"run-{i}", "succeeded", "devint", created_at=f"2024-01-0{i + 1}T00:00:00Z")
+
+        self.assertEqual(len(self.app.list_runs()), 7)
+        self.server.requests.clear()
+        stats = self.archive.sync()
+
+        self.assertEqual((stats.listed, stats.updated, stats.refreshed), (7, 7, 0))
+        self.assertEqual(len(self.listings()), 4)
+
+        # Only the pages up to the first one of finished runs are listed, and
+        # the unfinished run-2, which is older, is requested on its own.
+        self.server.requests.clear()
+        self.runs["run-2"]["metadata"]["status_v2"] = "succeeded"
+        self.add_run("run-7", "succeeded", "devint", created_at="2024-01-08T00:00:00Z")
+        stats = self.archive.sync()
+
+        self.assertEqual((stats.listed, stats.updated, stats.refreshed, stats.outputs), (4, 2, 1, 2))
+        self.assertEqual(self.listings(), ["/v1/applications/app/runs", "/v1/applications/app/runs?page_token=2"])
+        self.assertIn("/v1/applications/app/runs/run-2/metadata", self.fetched())
+        self.assertEqual(len(self.archive.runs(status=StatusV2.succeeded)), 7)
+
+    def test_persistent(self):
+        self.archive.sync()
+        self.archive.close()
+
+        with RunArchive(application=self.app, directory=self.tmpdir.name) as archive:
+            self.assertEqual(len(archive.runs()), 3)
+            self.assertEqual(archive.output("run-0"), {"solution": "run-0"})
+        self.archive = RunArchive(application=self.app, directory=self.tmpdir.name)
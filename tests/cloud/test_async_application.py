@@ -0,0 +1,149 @@
+import asyncio
+import json
+import time
+import unittest
+from unittest.mock import patch
+
+from nextmv.cloud import AsyncApplication, AsyncClient, Client, PollingOptions, RunDeadlineExceededError
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestAsyncApplication(unittest.TestCase):
+    def test_concurrent_runs_with_polling(self):
+        n_runs = 20
+        polls = {}
+
+        def new_run(request):
+            run_id = f"run-{len(polls)}"
+            polls[run_id] = 0
+            return 200, {}, json.dumps({"run_id": run_id}).encode()
+
+        def run_route(run_id, metadata_only):
+            def route(_):
+                if metadata_only:
+                    polls[run_id] += 1
+                    status = "succeeded" if polls[run_id] >= 3 else "running"
+                    return 200, {}, json.dumps(run_information(run_id, status=status)).encode()
+
+                result = run_information(run_id)
+                result["output"] = {"run": run_id}
+                return 200, {}, json.dumps(result).encode()
+
+            return route
+
+        polling_options = PollingOptions(initial_delay=0, delay=0.01, max_tries=10)
+
+        async def main(server):
+            async with AsyncClient(client=Client(api_key="foo", url=server.url), max_workers=4) as client:
+                app = AsyncApplication(client=client, id="app")
+                return await asyncio.gather(
+                    *[app.new_run_with_result(input={"i": i}, polling_options=polling_options) for i in range(n_runs)]
+                )
+
+        with LocalServer() as server:
+            server.route("POST", "/v1/applications/app/runs", new_run)
+            for i in range(n_runs):
+                run_id = f"run-{i}"
+                server.route("GET", f"/v1/applications/app/runs/{run_id}/metadata", run_route(run_id, True))
+                server.route("GET", f"/v1/applications/app/runs/{run_id}", run_route(run_id, False))
+
+            results = asyncio.run(main(server))
+
+        self.assertEqual(len(results), n_runs)
+        self.assertEqual({r.output["run"] for r in results}, {f"run-{i}" for i in range(n_runs)})
+        self.assertTrue(all(count >= 3 for count in polls.values()))
+
+    def test_polling_exhausted(self):
+        async def main(server):
+            async with AsyncClient(client=Client(api_key="foo", url=server.url)) as client:
+                app = AsyncApplication(client=client, id="app")
+                await app.run_result_with_polling(
+                    run_id="run-1",
+                    polling_options=PollingOptions(initial_delay=0, delay=0, max_tries=2),
+                )
+
+        with LocalServer() as server:
+            server.json(
+                "GET",
+                "/v1/applications/app/runs/run-1/metadata",
+                json.dumps(run_information("run-1", status="running")).encode(),
+            )
+            with self.assertRaises(RuntimeError):
+                asyncio.run(main(server))
+
+    def test_deadline_cancels_run(self):
+        async def main(server):
+            async with AsyncClient(client=Client(api_key="foo", url=server.url)) as client:
+                app = AsyncApplication(client=client, id="app")
+                await app.new_run_with_result(
+                    input={"foo": "bar"},
+                    polling_options=PollingOptions(initial_delay=0, delay=0.05, max_tries=1000),
+                    deadline=0.2,
+                )
+
+        with LocalServer() as server:
+            server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+            server.json(
+                "GET",
+                "/v1/applications/app/runs/run-1/metadata",
+                json.dumps(run_information("run-1", status="running")).encode(),
+            )
+            server.json("PATCH", "/v1/applications/app/runs/run-1/cancel", b"{}")
+            with self.assertRaises(RunDeadlineExceededError) as context:
+                asyncio.run(main(server))
+
+            self.assertEqual(server.requests[-1].method, "PATCH")
+
+        self.assertEqual(context.exception.run_id, "run-1")
+        self.assertIsNotNone(context.exception.metadata)
+
+    def test_deadline_bounds_requests(self):
+        def new_run(_):
+            time.sleep(1)
+            return 200, {}, b'{"run_id": "run-1"}'
+
+        async def main(server):
+            async with AsyncClient(client=Client(api_key="foo", url=server.url)) as client:
+                app = AsyncApplication(client=client, id="app")
+                await app.new_run_with_result(input={}, deadline=0.2)
+
+        with LocalServer() as server:
+            server.route("POST", "/v1/applications/app/runs", new_run)
+            started = time.monotonic()
+            with self.assertRaises(RunDeadlineExceededError) as context:
+                asyncio.run(main(server))
+
+            self.assertLess(time.monotonic() - started, 0.8)
+
+        self.assertIsNone(context.exception.run_id)
+
+    def test_polling_reuses_run_information(self):
+        output = {"solution": list(range(100))}
+        download = json.dumps(output).encode()
+
+        def result(request):
+            data = run_information("run-1", output_size=len(download))
+            if request.path.endswith("?format=url"):
+                data["output"] = {"url": f"{server.url}/download"}
+            return 200, {}, json.dumps(data).encode()
+
+        async def main(server):
+            async with AsyncClient(client=Client(api_key="foo", url=server.url)) as client:
+                app = AsyncApplication(client=client, id="app")
+                polling_options = PollingOptions(initial_delay=0)
+                return await app.run_result_with_polling(run_id="run-1", polling_options=polling_options)
+
+        with LocalServer() as server, patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            metadata = run_information("run-1", output_size=len(download))
+            server.json("GET", "/v1/applications/app/runs/run-1/metadata", json.dumps(metadata).encode())
+            server.route("GET", "/v1/applications/app/runs/run-1", result)
+            server.json("GET", "/download", download)
+            run_result = asyncio.run(main(server))
+
+            paths = [r.path for r in server.requests]
+
+        self.assertEqual(run_result.output, output)
+        self.assertEqual(
+            paths,
+            ["/v1/applications/app/runs/run-1/metadata", "/v1/applications/app/runs/run-1?format=url", "/download"],
+        )
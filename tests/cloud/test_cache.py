@@ -0,0 +1,83 @@
+import os
+import tempfile
+import time
+import unittest
+
+from nextmv.cloud import CacheEntry, DiskCache, MemoryCache, TieredCache
+
+
+class TestMemoryCache(unittest.TestCase):
+    def test_lru_eviction_by_size(self):
+        cache = MemoryCache(max_bytes=10)
+        cache.set("a", CacheEntry(data=b"aaaa"))
+        cache.set("b", CacheEntry(data=b"bbbb"))
+        self.assertEqual(cache.get("a").data, b"aaaa")
+
+        cache.set("c", CacheEntry(data=b"cccc"))
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+        self.assertEqual(cache.size, 8)
+
+        cache.set("big", CacheEntry(data=b"x" * 11))
+        self.assertIsNone(cache.get("big"))
+
+        cache.delete("a")
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.size, 4)
+
+
+class TestDiskCache(unittest.TestCase):
+    def test_roundtrip_and_eviction(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = DiskCache(directory=tmpdir, max_bytes=300)
+            cache.set("a", CacheEntry(data=b"a" * 100, etag='"etag-a"'))
+            entry = cache.get("a")
+            self.assertEqual(entry.data, b"a" * 100)
+            self.assertEqual(entry.etag, '"etag-a"')
+
+            # Make "a" the oldest entry, then fill the cache past its bound.
+            past = time.time() - 100
+            os.utime(cache._path("a"), (past, past))
+            cache.set("b", CacheEntry(data=b"b" * 100))
+            cache.set("c", CacheEntry(data=b"c" * 100))
+
+            self.assertIsNone(cache.get("a"))
+            self.assertIsNotNone(cache.get("b"))
+            self.assertIsNotNone(cache.get("c"))
+            self.assertFalse(any(name.endswith(".tmp") for name in os.listdir(tmpdir)))
+
+            # A second cache on the same directory sees the same entries.
+            other = DiskCache(directory=tmpdir, max_bytes=300)
+            self.assertEqual(other.get("b").data, b"b" * 100)
+
+            other.delete("b")
+            self.assertIsNone(cache.get("b"))
+
+    def test_size_on_overwrite_and_delete(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = DiskCache(directory=tmpdir, max_bytes=300)
+            for _ in range(5):
+                cache.set("a", CacheEntry(data=b"a" * 100))
+            cache.set("b", CacheEntry(data=b"b" * 50))
+
+            self.assertEqual(cache.size, cache._scan_size())
+            self.assertIsNotNone(cache.get("a"))
+
+            cache.delete("a")
+            cache.delete("a")
+            self.assertEqual(cache.size, cache._scan_size())
+
+            cache.delete("b")
+            self.assertEqual(cache.size, 0)
+
+
+class TestTieredCache(unittest.TestCase):
+    def test_promotion(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            disk = DiskCache(directory=tmpdir)
+            disk.set("a", CacheEntry(data=b"a"))
+            cache = TieredCache(memory=MemoryCache(), disk=disk)
+
+            self.assertEqual(cache.get("a").data, b"a")
+            self.assertEqual(cache.memory.get("a").data, b"a")
@@ -1,7 +1,56 @@
+import contextlib
+import gzip
+import json
 import os
+import pathlib
+import re
+import socket
+import tempfile
+import threading
+import time
 import unittest
 
-from nextmv.cloud import Client
+import requests
+
+from nextmv.cloud import Client, EncodedPayload
+from nextmv.cloud.client import _request_deadline, get_size
+from tests.cloud.local_server import LocalServer
+
+
+class DroppingStorage:
+    """Storage stand-in that accepts PUT requests, dropping the connection
+    of the first ones before their body is received."""
+
+    def __init__(self, drops: int):
+        self.drops = drops
+        self.bodies = []
+        self.socket = socket.create_server(("127.0.0.1", 0))
+        self.url = f"http://127.0.0.1:{self.socket.getsockname()[1]}/upload"
+        threading.Thread(target=self.serve, daemon=True).start()
+
+    def serve(self):
+        while True:
+            try:
+                connection, _ = self.socket.accept()
+            except OSError:
+                return
+            with connection:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    data += connection.recv(65536)
+                head, body = data.split(b"\r\n\r\n", 1)
+                if self.drops > 0:
+                    self.drops -= 1
+                    continue
+
+                length = int(re.search(rb"(?i)content-length: *(\d+)", head).group(1))
+                while len(body) < length:
+                    body += connection.recv(65536)
+                self.bodies.append(body)
+                connection.sendall(b"HTTP/1.1 200 OK\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+
+    def close(self):
+        self.socket.close()
 
 
 class TestClient(unittest.TestCase):
@@ -33,3 +82,170 @@ class TestClient(unittest.TestCase):
         self.assertEqual(client2.api_key, "bar")
         self.assertIsNotNone(client2.headers)
         os.environ.pop("NEXTMV_API_KEY")
+
+    def test_session_reuse(self):
+        with LocalServer() as server:
+            server.json("GET", "/v1/foo", b'{"foo": "bar"}')
+            client = Client(api_key="foo", url=server.url)
+            for _ in range(5):
+                response = client.request(method="GET", endpoint="v1/foo")
+                self.assertEqual(response.json(), {"foo": "bar"})
+
+            self.assertEqual(len(server.requests), 5)
+            self.assertEqual(len(server.connections), 1)
+            client.close()
+
+    def test_separate_storage_session(self):
+        client = Client(api_key="foo")
+        api_session = client._session_for("https://api.cloud.nextmv.io/v1/foo")
+        storage_session = client._session_for("https://bucket.s3.amazonaws.com/foo")
+
+        self.assertIsNot(api_session, storage_session)
+        self.assertIs(api_session, client._session_for("https://api.cloud.nextmv.io/v1/bar"))
+        self.assertIs(storage_session, client._session_for("https://other.s3.amazonaws.com/bar"))
+
+    def test_context_manager_closes_sessions(self):
+        with Client(api_key="foo") as client:
+            _ = client._session_for(client.url)
+            self.assertIsNotNone(client._session)
+
+        self.assertIsNone(client._session)
+        self.assertIsNone(client._storage_session)
+
+
+class TestEncodedPayload(unittest.TestCase):
+    def test_from_object(self):
+        payload = EncodedPayload.from_object({"foo": "bär"})
+        self.assertEqual(json.loads(payload.data), {"foo": "bär"})
+        self.assertEqual(payload.size, len(payload.data))
+        self.assertEqual(get_size(payload), payload.size)
+        self.assertIs(EncodedPayload.from_object(payload), payload)
+        self.assertEqual(EncodedPayload.from_object("text").content_type, "text/plain")
+
+        with self.assertRaises(TypeError):
+            EncodedPayload.from_object(1)
+
+    def test_embed(self):
+        value = EncodedPayload.from_object({"a": [1, 2]})
+        payload = EncodedPayload.from_object({"name": "foo"}).embed("input", value)
+        self.assertEqual(json.loads(payload.data), {"input": {"a": [1, 2]}, "name": "foo"})
+
+        empty = EncodedPayload.from_object({}).embed("input", value)
+        self.assertEqual(json.loads(empty.data), {"input": {"a": [1, 2]}})
+
+        with self.assertRaises(ValueError):
+            EncodedPayload.from_object([1]).embed("input", value)
+
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.server.json("POST", "/v1/foo", b"{}")
+        self.server.json("PUT", "/upload", b"")
+
+    def tearDown(self):
+        self.server.__exit__()
+
+    def test_request_payload_compressed(self):
+        client = Client(api_key="foo", url=self.server.url, compression=True, compression_threshold=100)
+        payload = {"stops": [{"id": "stop", "quantity": 1}] * 100}
+        client.request(method="POST", endpoint="v1/foo", payload=payload)
+        client.request(method="POST", endpoint="v1/foo", payload={"small": True})
+
+        compressed, small = self.server.requests
+        self.assertEqual(compressed.headers["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(compressed.body)), payload)
+        self.assertLess(len(compressed.body), len(json.dumps(payload)))
+        self.assertNotIn("Content-Encoding", small.headers)
+        self.assertEqual(json.loads(small.body), {"small": True})
+
+    def test_upload_compressed(self):
+        client = Client(api_key="foo", url=self.server.url, compression=True, compression_threshold=1)
+        data = b'{"foo": "bar"}' * 1000
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / "input.json"
+            path.write_bytes(data)
+            client.upload_to_presigned_url(data=path, url=f"{self.server.url}/upload")
+
+        client.upload_to_presigned_url(data=iter([data[:10], data[10:]]), url=f"{self.server.url}/upload")
+        client.upload_to_presigned_url(data=data, url=f"{self.server.url}/upload")
+
+        for request in self.server.requests:
+            self.assertEqual(request.headers["Content-Encoding"], "gzip")
+            self.assertIn("Content-Length", request.headers)
+            self.assertEqual(gzip.decompress(request.body), data)
+
+    def test_stream_not_resent_on_server_error(self):
+        statuses = [503, 200]
+
+        def upload(request):
+            return statuses.pop(0), {}, b""
+
+        self.server.route("PUT", "/flaky", upload)
+        client = Client(api_key="foo", url=self.server.url, backoff_factor=0)
+
+        with self.assertRaises(requests.HTTPError):
+            client.upload_to_presigned_url(data=iter([b"foo", b"bar"]), url=f"{self.server.url}/flaky")
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(self.server.requests[0].body, b"foobar")
+
+        # Bodies that can be sent again are still retried.
+        statuses[:] = [503, 200]
+        client.upload_to_presigned_url(data=b"foobar", url=f"{self.server.url}/flaky")
+        self.assertEqual([r.body for r in self.server.requests[1:]], [b"foobar", b"foobar"])
+
+    def test_upload_sent_again_after_dropped_connection(self):
+        data = os.urandom(4 * 1024 * 1024)
+        client = Client(api_key="foo", backoff_factor=0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / "input.json"
+            path.write_bytes(data)
+            for upload in [
+                lambda url: client.upload_to_presigned_url(data=path, url=url),
+                lambda url: client.upload_to_presigned_url(data=EncodedPayload(data=data), url=url),
+            ]:
+                for deadline_at in [None, time.monotonic() + 30]:
+                    storage = DroppingStorage(drops=2)
+                    with _request_deadline(deadline_at) if deadline_at else contextlib.nullcontext():
+                        upload(storage.url)
+                    storage.close()
+                    self.assertEqual(storage.bodies, [data])
+
+        # Iterators cannot be sent again.
+        storage = DroppingStorage(drops=1)
+        with self.assertRaises(requests.ConnectionError):
+            client.upload_to_presigned_url(data=iter([data]), url=storage.url)
+        storage.close()
+
+    def test_deadline_retries_while_time_is_left(self):
+        statuses = [503, 503, 200]
+        self.server.route("GET", "/flaky", lambda _: (statuses.pop(0), {}, b"{}"))
+        client = Client(api_key="foo", url=self.server.url, backoff_factor=0.01)
+
+        with _request_deadline(time.monotonic() + 5):
+            response = client.request(method="GET", endpoint="flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+        with _request_deadline(time.monotonic() - 1), self.assertRaises(requests.Timeout):
+            client.request(method="GET", endpoint="flaky")
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_download_decompressed(self):
+        client = Client(api_key="foo", url=self.server.url)
+        data = b'{"foo": "bar"}' * 1000
+        self.server.route("GET", "/encoded", lambda _: (200, {"Content-Encoding": "gzip"}, gzip.compress(data)))
+        self.server.route("GET", "/stored", lambda _: (200, {}, gzip.compress(data[:7]) + gzip.compress(data[7:])))
+        self.server.route("GET", "/plain", lambda _: (200, {}, data))
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ["encoded", "stored", "plain"]:
+                path = pathlib.Path(tmpdir) / name
+                written = client.download_from_presigned_url(url=f"{self.server.url}/{name}", path=path)
+                self.assertEqual(path.read_bytes(), data)
+                self.assertEqual(written, len(data))
+
+            path = pathlib.Path(tmpdir) / "raw"
+            client.download_from_presigned_url(url=f"{self.server.url}/stored", path=path, decompress=False)
+            self.assertEqual(path.read_bytes()[:2], b"\x1f\x8b")
@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from nextmv.cloud import Application, ChecksumError, Client, RangedDownloader
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class RangeStandIn:
+    """Local stand-in for a storage serving an object with HTTP ranges."""
+
+    def __init__(self, server: LocalServer, path: str, content: bytes):
+        self.content = content
+        self.etag = f'"{hashlib.md5(content).hexdigest()}"'
+        self.ranges = []
+        self.failures = {}
+        self.accept_ranges = True
+        self.lock = threading.Lock()
+        server.route("GET", path, self.get)
+
+    def get(self, request):
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", request.headers.get("Range", ""))
+        if not self.accept_ranges or match is None:
+            return 200, {"ETag": self.etag}, self.content
+
+        start, end = int(match.group(1)), int(match.group(2))
+        with self.lock:
+            self.ranges.append(start)
+            if self.failures.get(start, 0) > 0:
+                self.failures[start] -= 1
+                return 403, {}, b"<Error><Code>AccessDenied</Code></Error>"
+
+        headers = {"Content-Range": f"bytes {start}-{end}/{len(self.content)}", "ETag": self.etag}
+        return 206, headers, self.content[start : end + 1]
+
+
+class TestRangedDownloader(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.content = os.urandom(10 * 1024 + 17)
+        self.storage = RangeStandIn(self.server, "/bucket/output.json", self.content)
+        self.url = f"{self.server.url}/bucket/output.json"
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "output.json")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        self.client.close()
+        self.server.__exit__()
+
+    def downloader(self, **kwargs):
+        return RangedDownloader(client=self.client, chunk_size=1024, min_size=0, backoff=0, **kwargs)
+
+    def read(self):
+        with open(self.path, "rb") as f:
+            return f.read()
+
+    def test_download_in_ranges(self):
+        written = self.downloader().download(self.url, self.path)
+
+        self.assertEqual(written, len(self.content))
+        self.assertEqual(self.read(), self.content)
+        # The probe of the first byte, then the 11 chunks.
+        self.assertEqual(sorted(self.storage.ranges), [0] + list(range(0, len(self.content), 1024)))
+        self.assertEqual(os.listdir(self.tmpdir.name), ["output.json"])
+
+    def test_gzip_content_decompressed(self):
+        self.storage.content = gzip.compress(self.content)
+        self.storage.etag = f'"{hashlib.md5(self.storage.content).hexdigest()}"'
+
+        self.downloader().download(self.url, self.path)
+
+        self.assertEqual(self.read(), self.content)
+
+    def test_single_request_without_ranges(self):
+        self.storage.accept_ranges = False
+        self.downloader().download(self.url, self.path)
+
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(self.storage.ranges, [])
+
+    def test_single_request_for_small_content(self):
+        downloader = RangedDownloader(client=self.client, chunk_size=1024, min_size=len(self.content) + 1)
+        downloader.download(self.url, self.path)
+
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(self.storage.ranges, [0])
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_requests_reported_to_hooks(self):
+        records = []
+        self.client.request_hooks.append(records.append)
+        self.downloader().download(self.url, self.path)
+
+        self.assertEqual(len(records), 12)
+        self.assertTrue(all(r.method == "GET" and r.status_code == 206 for r in records))
+        self.assertEqual(sum(r.bytes_received for r in records[1:]), len(self.content))
+
+        records.clear()
+        RangedDownloader(client=self.client, min_size=len(self.content) + 1).download(self.url, self.path)
+        self.assertEqual([r.bytes_received for r in records], [len(self.content)])
+
+    def test_chunk_retried(self):
+        self.storage.failures[3072] = 2
+        self.downloader().download(self.url, self.path)
+
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(self.storage.ranges.count(3072), 3)
+
+    def test_resume(self):
+        self.storage.failures[6144] = 1
+        downloader = self.downloader(max_workers=1, max_retries=0)
+        with self.assertRaises(requests.HTTPError):
+            downloader.download(self.url, self.path)
+
+        self.assertTrue(os.path.exists(f"{self.path}.download.json"))
+        self.storage.ranges.clear()
+        downloader.download(self.url, self.path)
+
+        self.assertEqual(self.read(), self.content)
+        # The probe, then the chunks from the one that failed. The first 6
+        # chunks were completed before the failure, and are not downloaded again.
+        self.assertEqual(self.storage.ranges[:2], [0, 6144])
+        self.assertLessEqual(set(self.storage.ranges[1:]), set(range(6144, len(self.content), 1024)))
+
+    def test_changed_content_restarts(self):
+        self.storage.failures[2048] = 1
+        downloader = self.downloader(max_workers=1, max_retries=0)
+        with self.assertRaises(requests.HTTPError):
+            downloader.download(self.url, self.path)
+
+        self.storage.content = self.content = os.urandom(5000)
+        self.storage.etag = f'"{hashlib.md5(self.content).hexdigest()}"'
+        downloader.download(self.url, self.path)
+
+        self.assertEqual(self.read(), self.content)
+
+    def test_checksum_mismatch(self):
+        self.storage.etag = f'"{hashlib.md5(b"other content").hexdigest()}"'
+        with self.assertRaises(ChecksumError):
+            self.downloader().download(self.url, self.path)
+
+        self.assertEqual(os.listdir(self.tmpdir.name), [])
+
+        self.downloader(verify_checksum=False).download(self.url, self.path)
+        self.assertEqual(self.read(), self.content)
+
+    def test_application_run_result_to_file(self):
+        def route(request):
+            result = run_information("run-1", output_size=len(self.content))
+            if request.path.endswith("?format=url"):
+                result["output"] = {"url": self.url}
+            return 200, {}, json.dumps(result).encode()
+
+        self.server.route("GET", "/v1/applications/app/runs/run-1", route)
+        app = Application(client=self.client, id="app", downloader=self.downloader())
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            result_file = app.run_result_to_file(run_id="run-1", path=self.path)
+
+        self.assertEqual(result_file.output_path, self.path)
+        self.assertEqual(self.read(), self.content)
+        self.assertEqual(len(self.storage.ranges), 12)
@@ -0,0 +1,145 @@
+import concurrent.futures
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from nextmv.cloud import Application, Client, PollingOptions, RunExecutor
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestRunExecutor(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+        self.polling_options = PollingOptions(initial_delay=0, delay=0.01, max_tries=50)
+        self.lock = threading.Lock()
+        self.polls = {}
+        self.polls_needed = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.canceled = []
+        self.server.route("POST", "/v1/applications/app/runs", self.new_run)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def new_run(self, request):
+        body = json.loads(request.body)
+        with self.lock:
+            run_id = f"run-{len(self.polls)}"
+            self.polls[run_id] = 0
+            self.polls_needed[run_id] = body["input"].get("polls", 1)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+        self.server.route("GET", f"/v1/applications/app/runs/{run_id}/metadata", self.metadata(run_id))
+        self.server.route("GET", f"/v1/applications/app/runs/{run_id}", self.result(run_id, body["input"]))
+        self.server.route("PATCH", f"/v1/applications/app/runs/{run_id}/cancel", self.cancel(run_id))
+
+        return 200, {}, json.dumps({"run_id": run_id}).encode()
+
+    def metadata(self, run_id):
+        def route(_):
+            with self.lock:
+                self.polls[run_id] += 1
+                done = self.polls[run_id] >= self.polls_needed[run_id]
+                if done and self.polls[run_id] == self.polls_needed[run_id]:
+                    self.in_flight -= 1
+            status = "succeeded" if done else "running"
+            return 200, {}, json.dumps(run_information(run_id, status=status)).encode()
+
+        return route
+
+    def result(self, run_id, input):
+        def route(_):
+            result = run_information(run_id)
+            result["output"] = input
+            return 200, {}, json.dumps(result).encode()
+
+        return route
+
+    def cancel(self, run_id):
+        def route(_):
+            self.canceled.append(run_id)
+            return 200, {}, b"{}"
+
+        return route
+
+    def test_submit(self):
+        with RunExecutor(application=self.app, polling_options=self.polling_options) as executor:
+            future = executor.submit(input={"i": 1, "polls": 3}, options={"duration": "1s"})
+            callback_results = []
+            future.add_done_callback(lambda f: callback_results.append(f.result().output["i"]))
+            result = future.result(timeout=5)
+
+        self.assertEqual(result.output["i"], 1)
+        self.assertEqual(future.run_id, "run-0")
+        self.assertEqual(self.polls["run-0"], 3)
+        self.assertEqual(callback_results, [1])
+        self.assertEqual(json.loads(self.server.requests[0].body)["options"], {"duration": "1s"})
+
+    def test_map_bounds_runs_in_flight(self):
+        inputs = [{"i": i, "polls": 1 + i % 3} for i in range(12)]
+        with RunExecutor(application=self.app, max_in_flight=3, polling_options=self.polling_options) as executor:
+            results = list(executor.map(inputs))
+
+        self.assertEqual(sorted(r.output["i"] for r in results), list(range(12)))
+        self.assertLessEqual(self.max_in_flight, 3)
+
+    def test_map_completion_order(self):
+        inputs = [{"i": 0, "polls": 20}, {"i": 1, "polls": 1}]
+        with RunExecutor(application=self.app, polling_options=self.polling_options) as executor:
+            results = [r.output["i"] for r in executor.map(inputs)]
+
+        self.assertEqual(results, [1, 0])
+
+    def test_cancel(self):
+        with RunExecutor(application=self.app, polling_options=self.polling_options) as executor:
+            future = executor.submit(input={"polls": 1000})
+            while future.run_id is None:
+                time.sleep(0.01)
+
+            self.assertTrue(future.cancel())
+            self.assertTrue(future.cancelled())
+
+        self.assertEqual(self.canceled, ["run-0"])
+
+    def test_cancel_while_submitting(self):
+        self.server.json("PATCH", "/v1/applications/app/runs/run-blocked/cancel", b"{}")
+
+        def new_run(**_):
+            time.sleep(0.5)
+            return "run-blocked"
+
+        executor = RunExecutor(application=self.app, polling_options=self.polling_options)
+        with patch.object(self.app, "new_run", side_effect=new_run):
+            future = executor.submit(input={})
+            second = executor.submit(input={})
+            time.sleep(0.1)
+
+            self.assertTrue(future.cancel())
+            done, _ = concurrent.futures.wait([future], timeout=2)
+            self.assertEqual(done, {future})
+
+            started = time.monotonic()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(second.cancelled())
+
+    def test_polling_exhausted(self):
+        polling_options = PollingOptions(initial_delay=0, delay=0, max_tries=2)
+        with RunExecutor(application=self.app, polling_options=polling_options) as executor:
+            future = executor.submit(input={"polls": 1000})
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_shutdown(self):
+        executor = RunExecutor(application=self.app, polling_options=self.polling_options)
+        executor.shutdown()
+        with self.assertRaises(RuntimeError):
+            executor.submit(input={})
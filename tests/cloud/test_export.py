@@ -0,0 +1,97 @@
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+from nextmv.cloud import Application, Client, ExportFormat, InputSet
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestExportRuns(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+        self.tmpdir = tempfile.TemporaryDirectory()
+        for i in range(5):
+            self.add_run(f"run-{i}")
+        self.add_run("run-running", status="running")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+        self.client.close()
+        self.server.__exit__()
+
+    def add_run(self, run_id, status="succeeded"):
+        result = run_information(run_id, status=status)
+        if status == "succeeded":
+            result["output"] = {"solution": run_id}
+        endpoint = f"/v1/applications/app/runs/{run_id}"
+        self.server.json("GET", endpoint, json.dumps(result).encode())
+        self.server.json("GET", f"{endpoint}/input", json.dumps({"input": run_id}).encode())
+        self.server.json("GET", f"{endpoint}/logs", json.dumps({"log": f"solving {run_id}"}).encode())
+
+    def fetched_runs(self):
+        return {r.path.split("/")[5].split("?")[0] for r in self.server.requests}
+
+    def test_directory(self):
+        destination = os.path.join(self.tmpdir.name, "export")
+        run_ids = ["run-0", "run-1", "run-running", "run-missing"]
+        stats = self.app.export_runs(run_ids, destination=destination, max_workers=2)
+
+        self.assertEqual((stats.exported, stats.skipped, stats.unfinished), (2, 0, ["run-running"]))
+        self.assertEqual(list(stats.failed), ["run-missing"])
+        self.assertEqual(sorted(os.listdir(destination)), ["run-0", "run-1"])
+        run_directory = os.path.join(destination, "run-1")
+        self.assertEqual(sorted(os.listdir(run_directory)), ["input.json", "logs.txt", "metadata.json", "output.json"])
+        with open(os.path.join(run_directory, "metadata.json")) as f:
+            self.assertEqual(json.load(f)["metadata"]["status_v2"], "succeeded")
+        with open(os.path.join(run_directory, "output.json")) as f:
+            self.assertEqual(json.load(f), {"solution": "run-1"})
+
+        self.server.requests.clear()
+        stats = self.app.export_runs([f"run-{i}" for i in range(5)], destination=destination)
+
+        self.assertEqual((stats.exported, stats.skipped), (3, 2))
+        self.assertEqual(self.fetched_runs(), {"run-2", "run-3", "run-4"})
+
+    def test_jsonl_from_input_set(self):
+        destination = os.path.join(self.tmpdir.name, "runs.jsonl")
+        with open(destination, "w") as f:
+            f.write(json.dumps({"id": "run-0"}) + "\n" + '{"id": "run-1", "inf')
+        input_set = InputSet(
+            app_id="app",
+            created_at=datetime.now(),
+            description="",
+            id="set",
+            input_ids=["run-0", "run-1", "run-2"],
+            name="set",
+            updated_at=datetime.now(),
+        )
+
+        stats = self.app.export_runs(input_set, destination=destination, format=ExportFormat.jsonl, include_logs=False)
+
+        self.assertEqual((stats.exported, stats.skipped), (2, 1))
+        with open(destination) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual(sorted(record["id"] for record in records), ["run-0", "run-1", "run-2"])
+        record = next(record for record in records if record["id"] == "run-2")
+        self.assertEqual(record["input"], {"input": "run-2"})
+        self.assertEqual(record["output"], {"solution": "run-2"})
+        self.assertEqual(record["information"]["id"], "run-2")
+        self.assertNotIn("logs", record)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet
+
+        destination = os.path.join(self.tmpdir.name, "dataset")
+        run_ids = [f"run-{i}" for i in range(5)]
+        self.app.export_runs(run_ids[:3], destination=destination, format=ExportFormat.parquet)
+        stats = self.app.export_runs(run_ids, destination=destination, format=ExportFormat.parquet)
+
+        self.assertEqual((stats.exported, stats.skipped), (2, 3))
+        table = pyarrow.parquet.read_table(destination)
+        self.assertEqual(sorted(table.column("id").to_pylist()), run_ids)
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from nextmv.cloud import _io
+
+
+class TestState(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "state.json")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        _io.write_state(self.path, {"etag": "abc", "parts": [1, 2]})
+
+        self.assertEqual(_io.read_state(self.path), {"etag": "abc", "parts": [1, 2]})
+        self.assertEqual(os.listdir(self.directory.name), ["state.json"])
+
+    def test_invalid_state_is_ignored(self):
+        self.assertIsNone(_io.read_state(self.path))
+
+        with open(self.path, "w") as f:
+            f.write("{not json")
+
+        self.assertIsNone(_io.read_state(self.path))
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        _io.write_state(self.path, {"etag": "abc"})
+
+        with patch("nextmv.cloud._io.os.replace", side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                _io.write_state(self.path, {"etag": "def"})
+
+        with self.assertRaises(TypeError):
+            _io.write_state(self.path, {"etag": object()})
+
+        self.assertEqual(os.listdir(self.directory.name), ["state.json"])
+        self.assertEqual(_io.read_state(self.path), {"etag": "abc"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import time
+import unittest
+
+from nextmv.cloud import Application, Client, LogFollower, LogTail
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestLogs(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+        self.logs = {}
+        self.done_at = {}
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def add_run(self, run_id, lines=None, duration=None):
+        self.logs[run_id] = ""
+        started = time.monotonic()
+
+        def logs(request):
+            log = self.logs[run_id]
+            if lines is not None:
+                elapsed = time.monotonic() - started
+                log = "".join(f"{run_id} line {i}\n" for i in range(min(lines, int(elapsed / 0.05))))
+            etag = f'"{hashlib.md5(log.encode()).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                return 304, {"ETag": etag}, b""
+            return 200, {"ETag": etag}, json.dumps({"log": log}).encode()
+
+        def metadata(_):
+            status = "succeeded" if time.monotonic() - started >= duration else "running"
+            return 200, {}, json.dumps(run_information(run_id, status=status)).encode()
+
+        self.server.route("GET", f"/v1/applications/app/runs/{run_id}/logs", logs)
+        self.server.route("GET", f"/v1/applications/app/runs/{run_id}/metadata", metadata)
+
+    def test_tail(self):
+        self.add_run("run-1")
+        tail = LogTail(self.app, "run-1")
+
+        self.logs["run-1"] = "solving\n"
+        self.assertEqual(tail.poll().text, "solving\n")
+        self.assertEqual(tail.poll().text, "")
+        self.logs["run-1"] += "iteration 1\n"
+        chunk = tail.poll()
+        self.assertEqual((chunk.text, chunk.offset, chunk.reset), ("iteration 1\n", 20, False))
+
+        self.logs["run-1"] = "restarted\n" + "x" * 20
+        chunk = tail.poll()
+        self.assertEqual((chunk.text, chunk.reset), (self.logs["run-1"], True))
+        self.assertEqual(
+            [r.headers.get("If-None-Match") is not None for r in self.server.requests], [False, True, True, True]
+        )
+
+    def test_follow(self):
+        self.add_run("run-1", lines=4, duration=0.3)
+        self.add_run("run-2", lines=8, duration=0.5)
+        received = {"run-1": "", "run-2": ""}
+        finished = []
+        with LogFollower(self.app, interval=0.02) as follower:
+            for chunk in follower.follow(["run-1", "run-2"], timeout=5):
+                self.assertNotIn(chunk.run_id, finished)
+                received[chunk.run_id] += chunk.text
+                if chunk.finished:
+                    finished.append(chunk.run_id)
+
+        self.assertEqual(finished, ["run-1", "run-2"])
+        for run_id, lines in [("run-1", 4), ("run-2", 8)]:
+            self.assertEqual(received[run_id], "".join(f"{run_id} line {i}\n" for i in range(lines)))
+
+    def test_follow_timeout(self):
+        self.add_run("run-1", lines=100, duration=60)
+        with LogFollower(self.app, interval=0.02) as follower, self.assertRaises(TimeoutError):
+            for _ in follower.follow(["run-1"], timeout=0.2):
+                pass
@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+import requests
+
+from nextmv.cloud import Client, MetricsRegistry, RequestRecord
+from nextmv.cloud.metrics import PRESIGNED_ENDPOINT, endpoint_template
+from tests.cloud.local_server import LocalServer
+
+
+class TestMetrics(unittest.TestCase):
+    def test_endpoint_template(self):
+        api = "https://api.cloud.nextmv.io"
+        cases = [
+            (
+                f"{api}/v1/applications/app/runs/run-1/metadata",
+                "v1/applications/{application_id}/runs/{run_id}/metadata",
+            ),
+            (f"{api}/v1/applications/app/runs/uploadurl", "v1/applications/{application_id}/runs/uploadurl"),
+            (f"{api}/v1/applications/app/runs?instance_id=x", "v1/applications/{application_id}/runs"),
+            (
+                f"{api}/v1/applications/app/experiments/batch/b-1",
+                "v1/applications/{application_id}/experiments/batch/{batch_id}",
+            ),
+            (f"{api}/v1/account/queue", "v1/account/queue"),
+            ("https://bucket.s3.amazonaws.com/key?signature=secret", PRESIGNED_ENDPOINT),
+        ]
+        for url, expected in cases:
+            with self.subTest(url=url):
+                self.assertEqual(endpoint_template(url=url, api_url=api), expected)
+
+    def test_registry(self):
+        registry = MetricsRegistry(buckets=(0.1, 1))
+        for i, status in enumerate([200, 200, 200, 500]):
+            registry(
+                RequestRecord(
+                    method="GET",
+                    endpoint="v1/foo/{foo_id}",
+                    url="https://api.cloud.nextmv.io/v1/foo/1",
+                    start_time=0,
+                    latency=(i + 1) / 10,
+                    status_code=status,
+                    bytes_received=10,
+                    retries=1,
+                )
+            )
+
+        self.assertAlmostEqual(registry.percentile(50), 0.25)
+        self.assertAlmostEqual(registry.percentile(100, method="GET", endpoint="v1/foo/{foo_id}"), 0.4)
+        self.assertIsNone(registry.percentile(50, method="POST"))
+
+        summary = registry.summary()
+        self.assertEqual(len(summary), 1)
+        self.assertEqual(summary[0]["requests"], 4)
+        self.assertEqual(summary[0]["errors"], 1)
+        self.assertEqual(summary[0]["retries"], 4)
+        self.assertEqual(summary[0]["bytes_received"], 40)
+
+        exposition = registry.to_prometheus()
+        labels = 'method="GET",endpoint="v1/foo/{foo_id}"'
+        self.assertIn(f'nextmv_client_request_duration_seconds_bucket{{{labels},le="0.1"}} 1', exposition)
+        self.assertIn(f'nextmv_client_request_duration_seconds_bucket{{{labels},le="1"}} 4', exposition)
+        self.assertIn(f'nextmv_client_request_duration_seconds_bucket{{{labels},le="+Inf"}} 4', exposition)
+        self.assertIn(f'nextmv_client_requests_total{{{labels},status="200"}} 3', exposition)
+        self.assertIn(f'nextmv_client_requests_total{{{labels},status="500"}} 1', exposition)
+
+    def test_client_hooks(self):
+        with LocalServer() as server:
+            server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-1"}')
+            server.route("PUT", "/upload", lambda _: (200, {}, b""))
+            server.route("GET", "/download", lambda _: (200, {}, b"x" * 2048))
+
+            records = []
+            registry = MetricsRegistry()
+            client = Client(api_key="foo", url=server.url, request_hooks=[records.append, registry])
+            client.request(method="POST", endpoint="v1/applications/app/runs", payload={"input": {"foo": "bar"}})
+
+            # Presigned URLs are told apart from the API by their host.
+            storage_url = server.url.replace("127.0.0.1", "localhost")
+            client.upload_to_presigned_url(data=iter([b"abc", b"defg"]), url=f"{storage_url}/upload?sig=1")
+            with tempfile.TemporaryDirectory() as tmp:
+                client.download_from_presigned_url(url=f"{storage_url}/download", path=os.path.join(tmp, "out"))
+            client.close()
+
+        self.assertEqual([r.method for r in records], ["POST", "PUT", "GET"])
+        self.assertEqual(
+            [r.endpoint for r in records],
+            ["v1/applications/{application_id}/runs", PRESIGNED_ENDPOINT, PRESIGNED_ENDPOINT],
+        )
+        self.assertEqual([r.status_code for r in records], [200, 200, 200])
+        self.assertEqual(records[0].bytes_sent, len(b'{"input":{"foo":"bar"}}'))
+        self.assertEqual(records[0].bytes_received, len(b'{"run_id": "run-1"}'))
+        self.assertEqual(records[1].bytes_sent, 7)
+        self.assertNotIn("sig", records[1].url)
+        self.assertEqual(records[2].bytes_received, 2048)
+        self.assertTrue(all(r.latency > 0 for r in records))
+        self.assertEqual(len(registry.summary()), 3)
+
+    def test_client_hooks_on_error(self):
+        records = []
+        client = Client(api_key="foo", url="http://127.0.0.1:1", max_retries=0, request_hooks=[records.append])
+        with self.assertRaises(requests.ConnectionError):
+            client.request(method="GET", endpoint="v1/foo")
+
+        self.assertEqual(len(records), 1)
+        self.assertIsNone(records[0].status_code)
+        self.assertEqual(records[0].error, "ConnectionError")
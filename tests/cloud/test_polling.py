@@ -0,0 +1,102 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from nextmv.cloud import AdaptivePollingOptions, DurationModel, PollingOptions
+from nextmv.cloud.application import Metadata
+from tests.cloud.local_server import run_information
+
+
+def metadata(status="running", age=0.0, input_size=0.0, duration=0.0):
+    data = run_information("run", status=status, input_size=input_size, duration=duration)["metadata"]
+    data["created_at"] = (datetime.now(timezone.utc) - timedelta(seconds=age)).isoformat()
+    return Metadata.from_dict(data)
+
+
+class TestDurationModel(unittest.TestCase):
+    def test_not_enough_observations(self):
+        model = DurationModel(min_observations=3)
+        model.observe("devint", 0, 30)
+        model.observe("devint", 0, 30)
+
+        self.assertIsNone(model.predict("devint", 0))
+
+    def test_constant_duration(self):
+        model = DurationModel()
+        for duration in [30.0, 30.1, 30.2, 30.3, 30.4]:
+            model.observe("devint", 100, duration)
+
+        low, high = model.predict("devint", 100)
+        self.assertAlmostEqual(low, 30.04)
+        self.assertAlmostEqual(high, 30.36)
+        self.assertIsNone(model.predict("prod", 100))
+
+    def test_duration_grows_with_input_size(self):
+        model = DurationModel()
+        for size in [1000, 2000, 3000, 4000]:
+            model.observe("devint", size, size / 100)
+
+        low, high = model.predict("devint", 10000)
+        self.assertAlmostEqual(low, 100)
+        self.assertAlmostEqual(high, 100)
+
+    def test_window(self):
+        model = DurationModel(window=3)
+        for duration in [1, 100, 100, 100]:
+            model.observe("devint", 0, duration)
+
+        self.assertEqual(model.predict("devint", 0), (100, 100))
+
+
+class TestPollingSchedule(unittest.TestCase):
+    def test_static(self):
+        schedule = PollingOptions(initial_delay=0.5, delay=1, backoff=2, max_delay=3, max_tries=4).schedule("run")
+
+        self.assertEqual(schedule.first_delay(), 0.5)
+        self.assertEqual([schedule.next_delay() for _ in range(3)], [1, 2, 3])
+        with self.assertRaises(RuntimeError):
+            schedule.next_delay()
+
+    def test_static_timeout(self):
+        schedule = PollingOptions(delay=1, backoff=10, max_duration=50).schedule("run")
+        schedule.next_delay()
+        schedule.next_delay()
+
+        with self.assertRaises(TimeoutError):
+            schedule.next_delay()
+
+    def test_adaptive_polls_near_predicted_finish(self):
+        options = AdaptivePollingOptions(delay=1, min_delay=0.1, finish_polls=4)
+        for duration in [29.8, 30.0, 30.0, 30.2]:
+            options.schedule("previous").finished(metadata(status="succeeded", duration=duration * 1000))
+
+        # Runs that are running when first polled are executing since their
+        # creation, at most.
+        self.assertAlmostEqual(options.schedule("run").next_delay(metadata(age=25)), 4.86, places=1)
+        self.assertEqual(options.schedule("run").next_delay(metadata(age=5)), options.max_delay)
+        self.assertAlmostEqual(options.schedule("run").next_delay(metadata(age=29.9)), 0.1)
+        self.assertEqual(options.schedule("run").next_delay(metadata(age=40)), 1)
+
+    def test_adaptive_ignores_time_queued(self):
+        options = AdaptivePollingOptions(delay=1, min_delay=0.1, finish_polls=4, max_delay=60)
+        for duration in [1.8, 2.0, 2.0, 2.2]:
+            options.schedule("previous").finished(metadata(status="succeeded", duration=duration * 1000))
+
+        schedule = options.schedule("run")
+        self.assertEqual(schedule.next_delay(metadata(status="queued", age=100)), 1)
+        # The run was queued for 100 seconds, and has been executing since
+        # the last poll at most.
+        self.assertAlmostEqual(schedule.next_delay(metadata(age=101)), 1.86, places=1)
+
+    def test_adaptive_without_prediction(self):
+        options = AdaptivePollingOptions(delay=1, backoff=2)
+        schedule = options.schedule("run")
+
+        self.assertEqual(schedule.next_delay(metadata(age=5)), 1)
+        self.assertEqual(schedule.next_delay(metadata(status="queued")), 2)
+
+    def test_adaptive_learns_only_from_succeeded_runs(self):
+        options = AdaptivePollingOptions()
+        for _ in range(3):
+            options.schedule("previous").finished(metadata(status="failed", duration=1000))
+
+        self.assertIsNone(options.duration_model.predict("devint", 0))
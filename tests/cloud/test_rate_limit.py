@@ -0,0 +1,126 @@
+import threading
+import time
+import unittest
+
+import requests
+
+from nextmv.cloud import Client, EndpointClass, EndpointLimit, RateLimiter
+from nextmv.cloud.rate_limit import classify, parse_retry_after
+from tests.cloud.local_server import LocalServer
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_classify(self):
+        api = "https://api.cloud.nextmv.io"
+        app = f"{api}/v1/applications/app"
+        cases = [
+            ("POST", f"{app}/runs", EndpointClass.submission),
+            ("POST", f"{app}/runs/uploadurl", EndpointClass.submission),
+            ("GET", f"{app}/runs/run-1/metadata", EndpointClass.polling),
+            ("GET", f"{app}/runs/run-1/logs", EndpointClass.polling),
+            ("GET", f"{api}/v1/account/queue", EndpointClass.polling),
+            ("GET", f"{app}/runs/run-1?format=url", EndpointClass.download),
+            ("GET", f"{app}/runs/run-1/input", EndpointClass.download),
+            ("GET", "https://bucket.s3.amazonaws.com/output", EndpointClass.download),
+            ("PUT", "https://bucket.s3.amazonaws.com/input", EndpointClass.submission),
+            ("GET", f"{app}/experiments/batch/batch-1", EndpointClass.default),
+            ("PATCH", f"{app}/runs/run-1/cancel", EndpointClass.default),
+        ]
+        for method, url, expected in cases:
+            with self.subTest(method=method, url=url):
+                self.assertEqual(classify(method=method, url=url, api_url=api), expected)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after("3"), 3)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT"), 0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after("soon"))
+
+    def test_token_bucket(self):
+        limiter = RateLimiter(limits={EndpointClass.default: EndpointLimit(rate=20, burst=2, max_concurrency=10)})
+        start = time.monotonic()
+        for _ in range(4):
+            admitted_at = limiter.acquire(EndpointClass.default)
+            limiter.release(EndpointClass.default, admitted_at, status_code=200)
+
+        # The burst is admitted at once and the rest at the sustained rate.
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_aimd(self):
+        limiter = RateLimiter(
+            limits={EndpointClass.polling: EndpointLimit(rate=1000, burst=1000, max_concurrency=8)},
+            backoff=0,
+        )
+        admitted = [limiter.acquire(EndpointClass.polling) for _ in range(3)]
+
+        # Responses to requests in flight during one throttling event
+        # decrease the bound once.
+        for admitted_at in admitted:
+            limiter.release(EndpointClass.polling, admitted_at, status_code=429)
+        self.assertEqual(limiter.concurrency(EndpointClass.polling), 4)
+
+        admitted_at = limiter.acquire(EndpointClass.polling)
+        limiter.release(EndpointClass.polling, admitted_at, status_code=429)
+        self.assertEqual(limiter.concurrency(EndpointClass.polling), 2)
+
+        for _ in range(10):
+            admitted_at = limiter.acquire(EndpointClass.polling)
+            limiter.release(EndpointClass.polling, admitted_at, status_code=200)
+        self.assertGreater(limiter.concurrency(EndpointClass.polling), 2)
+
+        # Other classes are unaffected.
+        self.assertEqual(limiter.concurrency(EndpointClass.submission), 16)
+
+    def test_concurrency_bound(self):
+        limiter = RateLimiter(limits={EndpointClass.default: EndpointLimit(rate=1000, burst=1000, max_concurrency=1)})
+        admitted_at = limiter.acquire(EndpointClass.default)
+        acquired = threading.Event()
+
+        def acquire():
+            limiter.release(EndpointClass.default, limiter.acquire(EndpointClass.default), status_code=200)
+            acquired.set()
+
+        thread = threading.Thread(target=acquire)
+        thread.start()
+        self.assertFalse(acquired.wait(0.1))
+
+        limiter.release(EndpointClass.default, admitted_at, status_code=200)
+        self.assertTrue(acquired.wait(1))
+        thread.join()
+
+    def test_client_honors_retry_after(self):
+        with LocalServer() as server:
+            attempts = []
+
+            def handler(_):
+                attempts.append(time.monotonic())
+                if len(attempts) == 1:
+                    return 429, {"Retry-After": "0.2"}, b""
+                return 200, {"Content-Type": "application/json"}, b'{"ok": true}'
+
+            server.route("POST", "/v1/applications/app/runs", handler)
+            limiter = RateLimiter()
+            client = Client(api_key="foo", url=server.url, rate_limiter=limiter)
+            response = client.request(method="POST", endpoint="v1/applications/app/runs", payload={"input": {}})
+
+            self.assertEqual(response.json(), {"ok": True})
+            self.assertEqual(len(attempts), 2)
+            self.assertGreaterEqual(attempts[1] - attempts[0], 0.2)
+            self.assertEqual(limiter.concurrency(EndpointClass.submission), 8)
+            client.close()
+
+    def test_client_gives_up_on_throttling(self):
+        with LocalServer() as server:
+            server.json("GET", "/v1/foo", b"{}", status=429)
+            client = Client(
+                api_key="foo",
+                url=server.url,
+                max_retries=2,
+                rate_limiter=RateLimiter(backoff=0),
+            )
+            with self.assertRaises(requests.HTTPError) as context:
+                client.request(method="GET", endpoint="v1/foo")
+
+            self.assertEqual(context.exception.response.status_code, 429)
+            self.assertEqual(len(server.requests), 3)
+            client.close()
@@ -0,0 +1,77 @@
+import json
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from nextmv.cloud import Account, Application, Client, InstanceRouter
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestInstanceRouter(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+        self.account = Account(client=self.client)
+        self.queue = []
+        self.server.route("GET", "/v1/account/queue", lambda _: (200, {}, json.dumps({"runs": self.queue}).encode()))
+        self.server.json("POST", "/v1/applications/app/runs", b'{"run_id": "run-new"}')
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def queued(self, run_id, instance_id, status="queued", age=0.0, application_id="app"):
+        info = run_information(run_id, status=status, instance_id=instance_id)
+        run = {**info, **info["metadata"], "execution_class": "6c9500mb870s", "application_id": application_id}
+        run["created_at"] = (datetime.now(timezone.utc) - timedelta(seconds=age)).isoformat()
+        return run
+
+    def router(self, **kwargs):
+        router = InstanceRouter(self.app, self.account, ["a", "b", "c"], refresh_interval=60, **kwargs)
+        self.addCleanup(router.close)
+        router.refresh()
+        return router
+
+    def test_routes_to_shortest_queue(self):
+        self.queue = [self.queued(f"a-{i}", "a") for i in range(3)]
+        self.queue += [self.queued("b-0", "b"), self.queued("b-1", "b", status="running")]
+        self.queue += [self.queued("c-0", "c"), self.queued("other", "c", application_id="other")]
+        router = self.router()
+
+        # b and c have one queued run each, and c has no running run.
+        self.assertEqual(router.route(), "c")
+        # Routed runs count as queued until the next snapshot.
+        self.assertEqual([router.route() for _ in range(4)], ["b", "c", "b", "a"])
+
+        # The queued runs started right away, and the routed runs are in the
+        # snapshot, so they are no longer counted.
+        self.queue = []
+        router.refresh()
+        for instance_id in ["a", "b", "c"]:
+            self.assertLess(router.expected_wait(instance_id), 0.5)
+
+    def test_learns_wait_times(self):
+        self.queue = [self.queued("a-0", "a", age=10), self.queued("a-1", "a", age=10)]
+        router = self.router(default_wait_per_run=2)
+        self.queue = [self.queued("a-1", "a", age=10), self.queued("b-0", "b")]
+        router.refresh()
+
+        # a-0 waited 10 seconds for itself.
+        self.assertAlmostEqual(router.expected_wait("a"), 20, delta=0.5)
+        self.assertEqual(router.expected_wait("b"), 4)
+        self.assertEqual(router.route(), "c")
+        self.assertEqual(router.route(), "b")
+
+    def test_new_run(self):
+        self.queue = [self.queued("a-0", "a"), self.queued("b-0", "b")]
+        router = self.router()
+
+        self.assertEqual(router.new_run(input={"foo": "bar"}), "run-new")
+        self.assertTrue(self.server.requests[-1].path.endswith("instance_id=c"))
+
+    def test_refresh_failures_keep_routing(self):
+        self.server.routes.pop(("GET", "/v1/account/queue"))
+        with InstanceRouter(self.app, self.account, ["a", "b"], refresh_interval=0.01) as router:
+            time.sleep(0.05)
+            self.assertEqual([router.route() for _ in range(3)], ["a", "b", "a"])
@@ -0,0 +1,159 @@
+import json
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from nextmv.cloud import Application, Client, Configuration, PollingOptions, SubmissionScheduler
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestSubmissionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+        self.polling_options = PollingOptions(initial_delay=0, delay=0.01, backoff=1, max_tries=1000)
+        self.durations = {}
+        self.submitted = []
+        self.started_at = {}
+        self.max_running = 0
+        self.lock = threading.Lock()
+        self.server.route("POST", "/v1/applications/app/runs", self.new_run)
+        for i in range(10):
+            run_id = f"run-{i}"
+            self.server.route("GET", f"/v1/applications/app/runs/{run_id}/metadata", self.metadata(run_id))
+            self.server.route("GET", f"/v1/applications/app/runs/{run_id}", self.result(run_id))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def new_run(self, request):
+        name = json.loads(request.body)["input"]["name"]
+        with self.lock:
+            run_id = f"run-{len(self.submitted)}"
+            self.submitted.append(name)
+            self.started_at[run_id] = time.monotonic()
+            running = sum(1 for r in self.started_at if self.is_running(r))
+            self.max_running = max(self.max_running, running)
+        return 200, {}, json.dumps({"run_id": run_id}).encode()
+
+    def is_running(self, run_id):
+        name = self.submitted[int(run_id.split("-")[1])]
+        return time.monotonic() - self.started_at[run_id] < self.durations.get(name, 0.1)
+
+    def metadata(self, run_id):
+        def route(_):
+            with self.lock:
+                status = "running" if self.is_running(run_id) else "succeeded"
+            return 200, {}, json.dumps(run_information(run_id, status=status)).encode()
+
+        return route
+
+    def result(self, run_id):
+        def route(_):
+            data = run_information(run_id)
+            data["output"] = {"run_id": run_id}
+            return 200, {}, json.dumps(data).encode()
+
+        return route
+
+    def scheduler(self, **kwargs):
+        return SubmissionScheduler(application=self.app, polling_options=self.polling_options, **kwargs)
+
+    def test_max_in_flight(self):
+        with self.scheduler(limits={("devint", None): 2}) as scheduler:
+            futures = [scheduler.submit(input={"name": f"batch-{i}"}) for i in range(6)]
+            results = [future.result(timeout=5) for future in futures]
+
+        self.assertEqual(sorted(result.output["run_id"] for result in results), [f"run-{i}" for i in range(6)])
+        self.assertEqual(self.max_running, 2)
+        self.assertEqual(scheduler.in_flight("devint"), 0)
+
+    def test_priority(self):
+        with self.scheduler(max_in_flight=1) as scheduler:
+            first = scheduler.submit(input={"name": "first"})
+            while not self.submitted:
+                time.sleep(0.005)
+            batch = [scheduler.submit(input={"name": f"batch-{i}"}) for i in range(2)]
+            urgent = scheduler.submit(input={"name": "urgent"}, priority=10, deadline=5)
+            soon = scheduler.submit(input={"name": "soon"}, deadline=2)
+            for future in [first, urgent, soon, *batch]:
+                future.result(timeout=5)
+
+        self.assertEqual(self.submitted, ["first", "urgent", "soon", "batch-0", "batch-1"])
+
+    def test_deadline(self):
+        self.durations["long"] = 1
+        with self.scheduler(max_in_flight=1) as scheduler:
+            long = scheduler.submit(input={"name": "long"})
+            while not self.submitted:
+                time.sleep(0.005)
+            late = scheduler.submit(input={"name": "late"}, deadline=0.05)
+
+            # Waiting on the future also raises a TimeoutError: the deadline
+            # error must be its exception.
+            self.assertIsInstance(late.exception(timeout=1), TimeoutError)
+            long.result(timeout=5)
+
+        self.assertEqual(self.submitted, ["long"])
+
+    def test_deadline_behind_higher_priority(self):
+        self.durations["long"] = 1.5
+        with self.scheduler(max_in_flight=1) as scheduler:
+            long = scheduler.submit(input={"name": "long"})
+            while not self.submitted:
+                time.sleep(0.005)
+            urgent = scheduler.submit(input={"name": "urgent"}, priority=10)
+            late = scheduler.submit(input={"name": "late"}, deadline=0.2)
+
+            # Waiting on the future also raises a TimeoutError: the deadline
+            # error must be its exception.
+            self.assertIsInstance(late.exception(timeout=1), TimeoutError)
+            self.assertFalse(urgent.done())
+            long.result(timeout=5)
+            urgent.result(timeout=5)
+
+        self.assertEqual(self.submitted, ["long", "urgent"])
+
+    def test_slots_per_execution_class(self):
+        self.durations["batch"] = 0.3
+        with self.scheduler(max_in_flight=1) as scheduler:
+            batch = scheduler.submit(input={"name": "batch"})
+            realtime = scheduler.submit(input={"name": "realtime"}, configuration=Configuration(execution_class="6c"))
+
+            realtime.result(timeout=5)
+            self.assertFalse(batch.done())
+            batch.result(timeout=5)
+
+    def test_cancel_pending(self):
+        self.durations["first"] = 0.2
+        with self.scheduler(max_in_flight=1) as scheduler:
+            first = scheduler.submit(input={"name": "first"})
+            pending = scheduler.submit(input={"name": "pending"})
+            self.assertTrue(pending.cancel())
+            first.result(timeout=5)
+
+        self.assertEqual(self.submitted, ["first"])
+
+    def test_shutdown_cancels_submissions(self):
+        self.server.json("PATCH", "/v1/applications/app/runs/run-blocked/cancel", b"{}")
+
+        def new_run(**_):
+            time.sleep(0.5)
+            return "run-blocked"
+
+        scheduler = self.scheduler(max_in_flight=1)
+        with patch.object(self.app, "new_run", side_effect=new_run):
+            submitting = scheduler.submit(input={"name": "submitting"})
+            pending = scheduler.submit(input={"name": "pending"})
+            time.sleep(0.1)
+
+            started = time.monotonic()
+            scheduler.shutdown(wait=True, cancel_futures=True)
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(submitting.cancelled())
+        self.assertTrue(pending.cancelled())
+        self.assertEqual(scheduler.in_flight("devint"), 0)
@@ -0,0 +1,198 @@
+import json
+import pathlib
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from nextmv.cloud import Application, Client, UploadCache, UploadURLPool
+from nextmv.cloud.application import UploadURL
+from nextmv.cloud.client import EncodedPayload
+from nextmv.cloud.upload import _expires_in, input_digest
+from tests.cloud.local_server import LocalServer
+
+
+class TestUploadCache(unittest.TestCase):
+    def test_ttl(self):
+        cache = UploadCache(ttl=0.05)
+        cache.set("a", "upload-1")
+        self.assertEqual(cache.get("a"), "upload-1")
+
+        time.sleep(0.06)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_max_entries(self):
+        cache = UploadCache(max_entries=2)
+        cache.set("a", "upload-1")
+        cache.set("b", "upload-2")
+        cache.get("a")
+        cache.set("c", "upload-3")
+
+        self.assertEqual(cache.get("a"), "upload-1")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "upload-3")
+
+    def test_invalidate(self):
+        cache = UploadCache()
+        cache.set("a", "upload-1")
+
+        self.assertTrue(cache.invalidate("upload-1"))
+        self.assertFalse(cache.invalidate("upload-1"))
+        self.assertIsNone(cache.get("a"))
+
+    def test_input_digest(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir) / "input.json"
+            path.write_bytes(b'{"foo": "bar"}')
+
+            self.assertEqual(input_digest(path), input_digest(EncodedPayload(data=b'{"foo": "bar"}')))
+            with open(path, "rb") as f:
+                self.assertIsNone(input_digest(f))
+
+
+class TestUploadURLPool(unittest.TestCase):
+    def fetcher(self, url="https://bucket/upload"):
+        fetched = []
+
+        def fetch():
+            fetched.append(None)
+            return UploadURL(upload_id=f"upload-{len(fetched)}", upload_url=url)
+
+        return fetched, fetch
+
+    def wait_full(self, pool):
+        for _ in range(100):
+            if len(pool) == pool.size:
+                return
+            time.sleep(0.01)
+
+    def test_refill_in_background(self):
+        fetched, fetch = self.fetcher()
+        pool = UploadURLPool(fetch=fetch, size=2)
+
+        self.assertEqual(pool.get().upload_id, "upload-1")
+        self.wait_full(pool)
+        self.assertEqual(pool.get().upload_id, "upload-2")
+        self.assertEqual(pool.get().upload_id, "upload-3")
+        self.wait_full(pool)
+        self.assertEqual(len(fetched), 5)
+
+    def test_expired_urls_discarded(self):
+        fetched, fetch = self.fetcher(url=f"https://bucket/upload?Expires={int(time.time()) + 10}")
+        pool = UploadURLPool(fetch=fetch, size=2, margin=30)
+        pool.refill()
+        time.sleep(0.05)
+
+        self.assertEqual(len(pool), 0)
+        self.assertGreaterEqual(len(fetched), 2)
+
+    def test_expires_in(self):
+        signed_at = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime(time.time() - 100))
+        url = f"https://bucket/upload?X-Amz-Date={signed_at}&X-Amz-Expires=900&X-Amz-Signature=abc"
+
+        self.assertAlmostEqual(_expires_in(url, 0), 800, delta=2)
+        self.assertEqual(_expires_in("https://bucket/upload", 42), 42)
+
+
+class TestUploadDeduplication(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app", upload_cache=UploadCache())
+        self.uploads = []
+        self.rejected = set()
+        self.server.route("POST", "/v1/applications/app/runs/uploadurl", self.upload_url)
+        self.server.route("PUT", "/upload", lambda request: self.uploads.append(request.body) or (200, {}, b""))
+        self.server.route("POST", "/v1/applications/app/runs", self.new_run)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def upload_url(self, _):
+        upload_id = f"upload-{len(self.uploads)}"
+        body = {"upload_id": upload_id, "upload_url": f"{self.server.url}/upload"}
+        return 200, {}, json.dumps(body).encode()
+
+    def new_run(self, request):
+        if "instance_id=missing" in request.path:
+            return 404, {}, b'{"error": "instance missing not found"}'
+        if json.loads(request.body).get("upload_id") in self.rejected:
+            return 400, {}, b'{"error": "upload not found"}'
+        return 200, {}, b'{"run_id": "run-1"}'
+
+    def submissions(self):
+        return [json.loads(r.body) for r in self.server.requests if r.path.startswith("/v1/applications/app/runs?")]
+
+    def test_identical_inputs_uploaded_once(self):
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            for instance_id in ["baseline", "candidate"]:
+                self.app.new_run(input={"foo": "a large input"}, instance_id=instance_id)
+            self.app.new_run(input={"foo": "another large input"})
+
+        self.assertEqual(len(self.uploads), 2)
+        upload_ids = [s["upload_id"] for s in self.submissions()]
+        self.assertEqual(upload_ids, ["upload-0", "upload-0", "upload-1"])
+
+    def test_rejected_upload_uploaded_again(self):
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            self.app.new_run(input={"foo": "a large input"})
+            self.rejected.add("upload-0")
+            run_id = self.app.new_run(input={"foo": "a large input"})
+
+        self.assertEqual(run_id, "run-1")
+        self.assertEqual(len(self.uploads), 2)
+        upload_ids = [s["upload_id"] for s in self.submissions()]
+        self.assertEqual(upload_ids, ["upload-0", "upload-0", "upload-1"])
+
+    def test_other_errors_not_uploaded_again(self):
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 10):
+            self.app.new_run(input={"foo": "a large input"})
+            with self.assertRaises(requests.HTTPError) as cm:
+                self.app.new_run(input={"foo": "a large input"}, instance_id="missing")
+            self.app.new_run(input={"foo": "a large input"})
+
+        self.assertEqual(cm.exception.response.status_code, 404)
+        self.assertEqual(len(self.uploads), 1)
+        upload_ids = [s["upload_id"] for s in self.submissions()]
+        self.assertEqual(upload_ids, ["upload-0", "upload-0", "upload-0"])
+
+    def test_new_runs(self):
+        app = Application(client=self.client, id="app", upload_url_pool_size=2)
+        inputs = [{"i": i, "padding": "x" * 20} for i in range(3)] + [{"i": 3}]
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 30):
+            run_ids = app.new_runs(inputs, instance_id="candidate")
+
+        self.assertEqual(run_ids, ["run-1"] * 4)
+        submissions = self.submissions()
+        self.assertEqual(len(submissions), 4)
+        self.assertTrue(all("upload_id" in s for s in submissions[:3]))
+        self.assertEqual(submissions[3], {"input": {"i": 3}})
+        self.assertEqual([json.loads(body)["i"] for body in self.uploads], [0, 1, 2])
+
+    def test_pool_started_once(self):
+        app = Application(client=self.client, id="app", upload_url_pool_size=2)
+        pools = []
+
+        def new_pool(**kwargs):
+            time.sleep(0.05)
+            pools.append(UploadURLPool(**kwargs))
+            return pools[-1]
+
+        with patch("nextmv.cloud.application._MAX_RUN_SIZE", 10), patch(
+            "nextmv.cloud.application.UploadURLPool", side_effect=new_pool
+        ):
+            threads = [
+                threading.Thread(target=app.new_run, kwargs={"input": {"i": i, "padding": "x" * 20}}) for i in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(pools), 1)
+        self.assertEqual(len(self.uploads), 4)
@@ -0,0 +1,115 @@
+import concurrent.futures
+import json
+import threading
+import time
+import unittest
+
+from nextmv.cloud import Account, Application, Client, PollingOptions, RunWaiter
+from tests.cloud.local_server import LocalServer, run_information
+
+
+class TestRunWaiter(unittest.TestCase):
+    def setUp(self):
+        self.server = LocalServer().__enter__()
+        self.client = Client(api_key="foo", url=self.server.url)
+        self.app = Application(client=self.client, id="app")
+        self.polling_options = PollingOptions(initial_delay=0, delay=0.01, backoff=1, max_tries=200)
+        self.done_at = {}
+        self.server.route("GET", "/v1/account/queue", self.queue)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def add_run(self, run_id, duration):
+        self.done_at[run_id] = time.monotonic() + duration
+        self.server.route("GET", f"/v1/applications/app/runs/{run_id}/metadata", self.metadata(run_id))
+
+    def metadata(self, run_id):
+        def route(_):
+            status = "succeeded" if time.monotonic() >= self.done_at[run_id] else "running"
+            return 200, {}, json.dumps(run_information(run_id, status=status)).encode()
+
+        return route
+
+    def queue(self, _):
+        now = time.monotonic()
+        runs = []
+        for run_id, done_at in self.done_at.items():
+            if now < done_at:
+                info = run_information(run_id, status="running")
+                runs.append({**info, **info["metadata"], "execution_class": "6c9500mb870s"})
+
+        return 200, {}, json.dumps({"runs": runs}).encode()
+
+    def requests_to(self, suffix):
+        return [r for r in self.server.requests if r.path.endswith(suffix)]
+
+    def test_as_completed(self):
+        self.add_run("slow", 0.3)
+        self.add_run("fast", 0)
+        with RunWaiter(application=self.app, polling_options=self.polling_options) as waiter:
+            run_ids = [info.id for info in waiter.as_completed(["slow", "fast"], timeout=5)]
+
+        self.assertEqual(run_ids, ["fast", "slow"])
+        self.assertEqual(self.requests_to("/queue"), [])
+
+    def test_queue_avoids_polling_queued_runs(self):
+        run_ids = [f"run-{i}" for i in range(20)]
+        for i, run_id in enumerate(run_ids):
+            self.add_run(run_id, 0.2 + 0.01 * i)
+
+        account = Account(client=self.client)
+        with RunWaiter(
+            application=self.app,
+            account=account,
+            polling_options=self.polling_options,
+            queue_interval=0.05,
+        ) as waiter:
+            finished = [info.id for info in waiter.as_completed(run_ids, timeout=5)]
+
+        self.assertEqual(sorted(finished), sorted(run_ids))
+        metadata_requests = self.requests_to("/metadata")
+        # Every run is polled once before the first queue snapshot and about
+        # once after leaving the queue, instead of every 0.01 seconds.
+        self.assertLess(len(metadata_requests), 4 * len(run_ids))
+        self.assertLess(len(self.requests_to("/queue")), len(metadata_requests))
+
+    def test_same_run_same_future(self):
+        self.add_run("run", 0)
+        with RunWaiter(application=self.app, polling_options=self.polling_options) as waiter:
+            self.assertIs(waiter.add("run"), waiter.add("run"))
+
+    def test_polling_exhausted(self):
+        self.add_run("run", 1000)
+        polling_options = PollingOptions(initial_delay=0, delay=0, max_tries=2)
+        with RunWaiter(application=self.app, polling_options=polling_options) as waiter:
+            with self.assertRaises(RuntimeError):
+                waiter.add("run").result(timeout=5)
+
+    def test_close(self):
+        self.add_run("run", 1000)
+        waiter = RunWaiter(application=self.app, polling_options=self.polling_options)
+        future = waiter.add("run")
+        waiter.close()
+
+        self.assertTrue(future.cancelled())
+        with self.assertRaises(RuntimeError):
+            waiter.add("other")
+
+    def test_close_notifies_waiting_callers(self):
+        self.add_run("slow", 60)
+        waiter = RunWaiter(application=self.app, polling_options=self.polling_options)
+        future = waiter.add("slow")
+        waited = []
+        thread = threading.Thread(target=lambda: waited.append(concurrent.futures.wait([future], timeout=5)))
+        thread.start()
+        time.sleep(0.05)
+
+        waiter.close()
+        thread.join()
+
+        done, _ = waited[0]
+        self.assertEqual(done, {future})
+        self.assertTrue(future.cancelled())
+        self.assertEqual(list(concurrent.futures.as_completed([future], timeout=1)), [future])
@@ -0,0 +1,82 @@
+import ast
+import importlib
+import json
+import subprocess
+import sys
+import unittest
+
+_HEAVY_MODULES = ["pydantic", "requests", "urllib3", "yaml"]
+
+
+def run_isolated(code: str):
+    """Runs code in a fresh interpreter and returns the modules of the
+    package and the heavy modules that were imported."""
+
+    script = f"""
+import json, sys
+{code}
+print(json.dumps(sorted(m for m in sys.modules if m.split(".")[0] in {["nextmv", *_HEAVY_MODULES]!r})))
+"""
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, check=True, text=True)
+    return json.loads(result.stdout)
+
+
+def type_checking_imports(package: str):
+    """Names imported by a package under `if TYPE_CHECKING:`, and the module
+    each of them is imported from."""
+
+    with open(importlib.import_module(package).__file__, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    names = {}
+    for node in tree.body:
+        if isinstance(node, ast.If) and isinstance(node.test, ast.Name) and node.test.id == "TYPE_CHECKING":
+            for statement in node.body:
+                for alias in statement.names:
+                    names[alias.asname or alias.name] = statement.module
+
+    return names
+
+
+class TestImportTime(unittest.TestCase):
+    def test_import_loads_no_submodules(self):
+        self.assertEqual(run_isolated("import nextmv"), ["nextmv", "nextmv.__about__"])
+
+    def test_lazy_dependencies(self):
+        cases = [
+            ("import nextmv.cloud", []),
+            ("import nextmv; nextmv.Options; nextmv.InputFormat", []),
+            ("from nextmv.cloud import Client", ["requests", "urllib3"]),
+            ("import nextmv; nextmv.Output", ["pydantic"]),
+        ]
+        for code, expected in cases:
+            with self.subTest(code=code):
+                imported = [m for m in run_isolated(code) if m in _HEAVY_MODULES]
+                self.assertEqual(imported, expected)
+
+    def test_lazy_attributes(self):
+        import nextmv
+        import nextmv.cloud
+
+        self.assertIs(nextmv.Input, nextmv.input.Input)
+        self.assertIn("Options", dir(nextmv))
+        self.assertIn("Client", dir(nextmv.cloud))
+        with self.assertRaises(AttributeError):
+            _ = nextmv.DoesNotExist
+
+    def test_lazy_submodules(self):
+        self.assertIn("nextmv.cloud.client", run_isolated("import nextmv.cloud; nextmv.cloud.client.Client"))
+        for package in ["nextmv", "nextmv.cloud"]:
+            module = importlib.import_module(package)
+            for name in module._LAZY_SUBMODULES:
+                with self.subTest(package=package, name=name):
+                    self.assertIs(getattr(module, name), importlib.import_module(f"{package}.{name}"))
+
+    def test_lazy_attributes_match_type_checking_imports(self):
+        for package in ["nextmv", "nextmv.cloud"]:
+            with self.subTest(package=package):
+                lazy_attributes = importlib.import_module(package)._LAZY_ATTRIBUTES
+                self.assertEqual(type_checking_imports(package), lazy_attributes)
+                for name, module_name in lazy_attributes.items():
+                    module = importlib.import_module(f".{module_name}", package)
+                    self.assertTrue(hasattr(module, name), f"{module.__name__} has no attribute {name}")
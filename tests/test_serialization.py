@@ -0,0 +1,103 @@
+import datetime
+import json
+import math
+import unittest
+
+from nextmv import serialization
+from nextmv.output import _custom_serial
+
+
+def available_codecs():
+    codecs = []
+    for name in ["orjson", "msgspec", "ujson", "json"]:
+        try:
+            codecs.append(serialization._CODECS[name]())
+        except ImportError:
+            continue
+
+    return codecs
+
+
+class TestSerialization(unittest.TestCase):
+    def tearDown(self):
+        serialization._codec = None
+
+    def test_round_trip(self):
+        obj = {"empanadas": ["carne", "pollo"], "count": 2, "price": 1.5, "ok": True, "none": None, "ñ": "ü"}
+        for codec in available_codecs():
+            with self.subTest(codec=codec.name):
+                data = codec.dumps(obj)
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(json.loads(data), obj)
+                self.assertEqual(codec.loads(data), obj)
+                self.assertEqual(codec.loads(data.decode("utf-8")), obj)
+                self.assertEqual(json.loads(codec.dumps(obj, indent=True)), obj)
+
+    def test_indent_matches_stdlib(self):
+        obj = {"options": {}, "solution": {"a": [1, 2]}, "statistics": {"foo": "bar"}}
+        for codec in available_codecs():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.dumps(obj, indent=True).decode("utf-8"), json.dumps(obj, indent=2))
+
+    def test_non_ascii(self):
+        obj = {"ñandú": "café €", "emoji": "😀", "plain": "empanadas"}
+        for codec in available_codecs():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(json.loads(codec.dumps(obj)), obj)
+                self.assertEqual(json.loads(codec.dumps(obj, indent=True)), obj)
+                self.assertEqual(codec.loads(codec.dumps(obj)), obj)
+
+    def test_non_finite_floats_written_as_null(self):
+        obj = {"nan": math.nan, "values": (1.5, math.inf, -math.inf), "none": None}
+        expected = {"nan": None, "values": [1.5, None, None], "none": None}
+        for codec in available_codecs():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(json.loads(codec.dumps(obj)), expected)
+                self.assertEqual(json.loads(codec.dumps(obj, indent=True)), expected)
+                self.assertEqual(
+                    json.loads(codec.dumps({"custom": object()}, default=lambda _: [math.nan])),
+                    {"custom": [None]},
+                )
+
+        circular = []
+        circular.append(circular)
+        with self.assertRaises(ValueError):
+            serialization.JSONCodec().dumps(circular)
+
+    def test_each_codec(self):
+        obj = {"date": datetime.datetime(2024, 1, 2, 3, 4, 5), "nan": math.nan, "ñ": [1, 2**70]}
+        for codec in available_codecs():
+            with self.subTest(codec=codec.name):
+                serialization.set_codec(codec.name)
+                self.assertEqual(serialization.get_codec().name, codec.name)
+                self.assertEqual(
+                    serialization.loads(serialization.dumps(obj, default=_custom_serial)),
+                    {"date": "2024-01-02T03:04:05", "nan": None, "ñ": [1, 2**70]},
+                )
+
+    def test_default(self):
+        obj = {"date": datetime.datetime(2024, 1, 2, 3, 4, 5), "day": datetime.date(2024, 1, 2)}
+        for codec in available_codecs():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(
+                    codec.loads(codec.dumps(obj, default=_custom_serial)),
+                    {"date": "2024-01-02T03:04:05", "day": "2024-01-02"},
+                )
+                with self.assertRaises(TypeError):
+                    codec.dumps({"foo": object()}, default=_custom_serial)
+
+    def test_fallback(self):
+        for codec in available_codecs():
+            with self.subTest(codec=codec.name):
+                self.assertEqual(codec.loads(codec.dumps({1: 2**70})), {"1": 2**70})
+                self.assertTrue(math.isnan(codec.loads(b"[NaN]")[0]))
+                with self.assertRaises(ValueError):
+                    codec.loads(b"{")
+
+    def test_set_codec(self):
+        serialization.set_codec("json")
+        self.assertEqual(serialization.get_codec().name, "json")
+        self.assertEqual(serialization.dumps({"a": 1}), b'{"a":1}')
+
+        with self.assertRaises(ValueError):
+            serialization.set_codec("yaml")